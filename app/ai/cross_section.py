@@ -0,0 +1,205 @@
+from dataclasses import dataclass
+from typing import Dict, Hashable, List, Mapping
+
+import numpy as np
+import pandas as pd
+
+from app.features.panel import FeaturePanel
+from app.features.registry import compute_arrays
+
+# ============================
+# Features cross-seccionales (todo el universo a la vez)
+# ============================
+# Sobre el panel (S, T) se calculan en una pasada:
+#   - componentes de rank_signals (retorno, tendencia EMA, rango, volumen)
+#   - fuerza relativa vs BENCHMARK
+#   - percentiles de retorno y volumen dentro del universo
+#   - tendencia z-score (vs media / std del universo)
+# rank_signals(features=...) consume estos vectores sin rehacer pandas por símbolo.
+BENCHMARK = "BTCUSDT"
+
+# mismas ventanas que rank_signals
+RET_WINDOW = 12
+EMA_FAST = 14
+EMA_SLOW = 28
+RANGE_WINDOW = 10
+VOLUME_WINDOW = 20
+
+MIN_ROWS = 30
+MIN_VOLUME_ROWS = 25
+
+REGIME_MULT = {"bull": 1.08, "bear": 0.85}
+
+
+@dataclass
+class CrossSection:
+    symbols: List[str]
+    ret: np.ndarray
+    trend: np.ndarray
+    hl_range: np.ndarray
+    volume_ratio: np.ndarray
+    rel_strength: np.ndarray
+    ret_rank: np.ndarray
+    volume_rank: np.ndarray
+    trend_z: np.ndarray
+    valid: np.ndarray
+
+    def __post_init__(self):
+        self._index = {s: i for i, s in enumerate(self.symbols)}
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._index
+
+    def row(self, symbol: str) -> Dict[str, float]:
+        i = self._index[symbol]
+        return {
+            "ret": float(self.ret[i]),
+            "trend": float(self.trend[i]),
+            "hl_range": float(self.hl_range[i]),
+            "volume_ratio": float(self.volume_ratio[i]),
+            "rel_strength": float(self.rel_strength[i]),
+            "ret_rank": float(self.ret_rank[i]),
+            "volume_rank": float(self.volume_rank[i]),
+            "trend_z": float(self.trend_z[i]),
+            "valid": bool(self.valid[i]),
+        }
+
+    def scores(self, regimes: Mapping[str, str] | str = "neutral") -> np.ndarray:
+        """
+        Score de rank_signals para TODOS los símbolos (vectorizado).
+        regimes: un régimen para todos o {symbol: régimen}.
+        """
+        if isinstance(regimes, str):
+            mult = np.full(len(self), REGIME_MULT.get(regimes.lower().strip(), 1.0))
+        else:
+            mult = np.array([REGIME_MULT.get(str(regimes.get(s, "")).lower().strip(), 1.0) for s in self.symbols])
+
+        out = score_components(self.ret, self.trend, self.hl_range, self.volume_ratio, mult)
+        out[~self.valid] = 0.0
+        return out
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "ret": self.ret,
+                "trend": self.trend,
+                "hl_range": self.hl_range,
+                "volume_ratio": self.volume_ratio,
+                "rel_strength": self.rel_strength,
+                "ret_rank": self.ret_rank,
+                "volume_rank": self.volume_rank,
+                "trend_z": self.trend_z,
+                "valid": self.valid,
+            },
+            index=pd.Index(self.symbols, name="symbol"),
+        )
+
+
+def score_components(ret, trend, hl_range, volume_ratio, regime_mult=1.0) -> np.ndarray:
+    """
+    Fórmula de rank_signals sobre arrays (o escalares).
+    """
+    ret = np.clip(np.asarray(ret, dtype=np.float64), -0.20, 0.20)
+    trend = np.clip(np.asarray(trend, dtype=np.float64), -0.05, 0.05)
+    hl_range = np.clip(np.asarray(hl_range, dtype=np.float64), 0.0, 0.20)
+    volume_ratio = np.clip(np.asarray(volume_ratio, dtype=np.float64), 0.0, 10.0)
+
+    volu_norm = np.minimum(volume_ratio / 3.0, 3.0)
+
+    base = ret * 0.60 + trend * 0.40
+
+    # volatilidad muy baja (no se mueve) o muy alta (ruidoso)
+    base = np.where(hl_range < 0.005, base * 0.85, np.where(hl_range > 0.12, base * 0.90, base))
+
+    base = base * (1.0 + volu_norm * 0.05) * regime_mult
+
+    return np.where(np.isfinite(base), base, 0.0)
+
+
+def _percentile(x: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    out = np.full(len(x), np.nan)
+    if valid.any():
+        out[valid] = pd.Series(x[valid]).rank(pct=True).to_numpy()
+    return out
+
+
+def _zscore(x: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    out = np.full(len(x), np.nan)
+    v = x[valid & np.isfinite(x)]
+    if len(v):
+        std = v.std()
+        out[valid] = (x[valid] - v.mean()) / std if std > 0 else 0.0
+    return out
+
+
+def compute_cross_section(
+    source: FeaturePanel | Mapping[str, pd.DataFrame],
+    keys: Mapping[str, Hashable] | None = None,
+    benchmark: str = BENCHMARK,
+) -> CrossSection:
+    """
+    source: panel ya armado (ej. el del scanner) o {symbol: DataFrame OHLCV}.
+    keys:   {symbol: clave en el panel} si las claves no son el símbolo
+            (el scanner usa (symbol, 0) para el timeframe de entrada).
+    """
+    panel = source if isinstance(source, FeaturePanel) else FeaturePanel.from_frames(source)
+
+    if keys is None:
+        keys = {str(k): k for k in panel.keys}
+
+    symbols = [s for s, k in keys.items() if k in panel]
+    rows = np.array([panel.index[keys[s]] for s in symbols], dtype=np.int64)
+
+    def field(name: str) -> np.ndarray:
+        return panel.values[rows, :, panel.fields.index(name)]
+
+    close, high, low, volume = (field(c) for c in ("close", "high", "low", "volume"))
+    lengths = panel.lengths[rows]
+
+    if len(symbols) == 0 or close.shape[1] == 0:
+        empty = np.zeros(0)
+        return CrossSection([], *(empty,) * 8, np.zeros(0, dtype=bool))
+
+    emas = compute_arrays({"close": close}, [f"ema_{EMA_FAST}", f"ema_{EMA_SLOW}"])
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        last = close[:, -1]
+        prev = close[:, -RET_WINDOW] if close.shape[1] >= RET_WINDOW else np.full(len(rows), np.nan)
+        ret = np.where((last > 0) & (prev > 0), last / prev - 1.0, 0.0)
+
+        spread = emas[f"ema_{EMA_FAST}"][:, -1] - emas[f"ema_{EMA_SLOW}"][:, -1]
+        trend = np.where(last > 0, spread / last, 0.0)
+
+        close_mean = np.nanmean(close[:, -RANGE_WINDOW:], axis=1)
+        hl_mean = np.nanmean(np.abs(high - low)[:, -RANGE_WINDOW:], axis=1)
+        hl_range = np.where(close_mean != 0, hl_mean / close_mean, 0.0)
+
+        avg_vol = np.nanmean(volume[:, -VOLUME_WINDOW:], axis=1)
+        volume_ratio = np.where(
+            (lengths >= MIN_VOLUME_ROWS) & (avg_vol > 0),
+            volume[:, -1] / avg_vol,
+            0.0,
+        )
+
+    valid = lengths >= MIN_ROWS
+
+    if benchmark in symbols:
+        rel_strength = ret - ret[symbols.index(benchmark)]
+    else:
+        rel_strength = np.full(len(symbols), np.nan)
+
+    return CrossSection(
+        symbols=symbols,
+        ret=ret,
+        trend=trend,
+        hl_range=hl_range,
+        volume_ratio=volume_ratio,
+        rel_strength=np.where(valid, rel_strength, np.nan),
+        ret_rank=_percentile(ret, valid),
+        volume_rank=_percentile(volume_ratio, valid),
+        trend_z=_zscore(trend, valid),
+        valid=valid,
+    )
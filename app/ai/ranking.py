@@ -1,10 +1,13 @@
 # app/ai/ranking.py
 
 from __future__ import annotations
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, Mapping, Tuple
 
 import pandas as pd
 
+from app.ai.cross_section import REGIME_MULT, score_components
+from app.features.registry import compute_features
+
 
 def _safe_int(x: Any, default: int) -> int:
     try:
@@ -27,9 +30,26 @@ def _has_cols(df: pd.DataFrame, cols: Tuple[str, ...]) -> bool:
     return df is not None and not df.empty and all(c in df.columns for c in cols)
 
 
-def rank_signals(df: pd.DataFrame, regime: str = "neutral") -> float:
+def _score(ret_score: float, trend_score: float, vol_score: float, volu_score: float, regime: str) -> float:
+    """
+    Score final (misma fórmula que CrossSection.scores).
+    Retorno y tendencia = lo principal; volatilidad y volumen modulan.
+    """
+    mult = REGIME_MULT.get((regime or "").lower().strip(), 1.0)
+    return float(score_components(ret_score, trend_score, vol_score, volu_score, mult))
+
+
+def rank_signals(
+    df: pd.DataFrame | None = None,
+    regime: str = "neutral",
+    features: Mapping[str, Any] | None = None,
+) -> float:
     """
     rank_signals(df, regime) -> float
+    rank_signals(regime=..., features=cross.row(symbol)) -> float
+
+    features: componentes ya calculados para todo el universo
+    (app.ai.cross_section); evita el pipeline pandas por símbolo.
 
     Devuelve un SCORE numérico para ordenar candidatos en scanner.py:
       ranked = sorted(candidates, key=lambda x: x["score"], reverse=True)[:top_n]
@@ -41,6 +61,18 @@ def rank_signals(df: pd.DataFrame, regime: str = "neutral") -> float:
     """
 
     try:
+        # ✅ vectores precalculados (cross-section)
+        if features is not None:
+            if not features.get("valid", True):
+                return 0.0
+            return _score(
+                _safe_float(features.get("ret")),
+                _safe_float(features.get("trend")),
+                _safe_float(features.get("hl_range")),
+                _safe_float(features.get("volume_ratio")),
+                regime,
+            )
+
         # Validación rápida
         if df is None or df.empty:
             return 0.0
@@ -90,8 +122,9 @@ def rank_signals(df: pd.DataFrame, regime: str = "neutral") -> float:
         # =========================
         # 2) Tendencia simple (EMA)
         # =========================
-        ema_fast = close.ewm(span=w_fast, adjust=False).mean()
-        ema_slow = close.ewm(span=w_slow, adjust=False).mean()
+        emas = compute_features(close.to_frame("close"), [f"ema_{w_fast}", f"ema_{w_slow}"])
+        ema_fast = emas[f"ema_{w_fast}"]
+        ema_slow = emas[f"ema_{w_slow}"]
 
         trend = _safe_float(ema_fast.iloc[-1] - ema_slow.iloc[-1], 0.0)
 
@@ -140,48 +173,7 @@ def rank_signals(df: pd.DataFrame, regime: str = "neutral") -> float:
         # =========================
         # Score final (robusto)
         # =========================
-        # Retorno y tendencia = lo principal
-        # Volatilidad y volumen modulan el ranking
-
-        # Limitar extremos para evitar locuras por datos raros
-        ret_score = max(min(ret_score, 0.20), -0.20)        # -20% a +20%
-        trend_score = max(min(trend_score, 0.05), -0.05)    # -5% a +5%
-        vol_score = max(min(vol_score, 0.20), 0.0)          # 0 a 20%
-        volu_score = max(min(volu_score, 10.0), 0.0)        # 0 a 10x
-
-        # Normalización ligera del volumen para que no domine
-        volu_norm = min(volu_score / 3.0, 3.0)  # 0..3
-
-        base = (ret_score * 0.60) + (trend_score * 0.40)
-
-        # Penaliza si volatilidad está MUY baja (no se mueve) o MUY alta (ruidoso)
-        # Esto es suave para no matar señales
-        if vol_score < 0.005:
-            base *= 0.85
-        elif vol_score > 0.12:
-            base *= 0.90
-
-        # Ajuste por volumen (solo empuja un poco)
-        base *= (1.0 + (volu_norm * 0.05))  # +0% a +15%
-
-        # Ajuste por régimen
-        r = (regime or "").lower().strip()
-
-        if r == "bull":
-            base *= 1.08
-        elif r == "bear":
-            base *= 0.85
-        else:
-            base *= 1.0
-
-        # Nunca devuelvas NaN
-        score = _safe_float(base, 0.0)
-
-        # Si algo quedó raro, neutraliza
-        if score != score:  # NaN check
-            return 0.0
-
-        return float(score)
+        return _score(ret_score, trend_score, vol_score, volu_score, regime)
 
     except Exception:
         # Blindaje total: nunca romper scanner
@@ -1,5 +1,23 @@
 from enum import Enum
 import numpy as np
+import pandas as pd
+
+from app.features import kernels as k
+from app.features.registry import ensure_features
+
+REGIME_FEATURES = ("ema_fast", "ema_slow", "atr")
+
+# ============================
+# Parámetros del régimen
+# ============================
+# ventana (velas) para suavizar pendiente y volatilidad
+REGIME_WINDOW = 5
+
+# |pendiente media de ema_slow| por encima de esto = tendencia
+SLOPE_THRESHOLD = 0.0005
+
+# ATR / close medio por encima de esto = caótico
+CHAOTIC_ATR_REL = 0.06
 
 
 class MarketRegime(str, Enum):
@@ -8,29 +26,115 @@ class MarketRegime(str, Enum):
     CHAOTIC = "chaotic"
 
 
-def detect_market_regime(df):
+class Regime(str, Enum):
     """
-    Detecta el régimen de mercado usando datos 1H.
-    Devuelve: MarketRegime
+    Régimen direccional (el orden define los códigos de regime_codes).
+    """
+    BULL = "bull"
+    BEAR = "bear"
+    RANGE = "range"
+    CHAOTIC = "chaotic"
+
+
+_REGIMES = list(Regime)
+_CATEGORIES = [r.value for r in _REGIMES]
+
+_TO_MARKET = {
+    Regime.BULL: MarketRegime.TRENDING,
+    Regime.BEAR: MarketRegime.TRENDING,
+    Regime.RANGE: MarketRegime.RANGING,
+    Regime.CHAOTIC: MarketRegime.CHAOTIC,
+}
+
+
+# ============================
+# Serie completa (vectorizada)
+# ============================
+def _codes(ema_slow: np.ndarray, atr: np.ndarray, close: np.ndarray) -> np.ndarray:
+    # rolling con min_periods=1 == tail(5).mean() (ignora NaN) en cada vela
+    slope = pd.Series(k.diff(ema_slow)).rolling(REGIME_WINDOW, min_periods=1).mean().to_numpy()
+    atr_rel = pd.Series(k.safe_div(atr, close)).rolling(REGIME_WINDOW, min_periods=1).mean().to_numpy()
+
+    codes = np.full(len(close), _REGIMES.index(Regime.RANGE), dtype=np.int8)
+    codes[slope > SLOPE_THRESHOLD] = _REGIMES.index(Regime.BULL)
+    codes[slope < -SLOPE_THRESHOLD] = _REGIMES.index(Regime.BEAR)
+    codes[atr_rel > CHAOTIC_ATR_REL] = _REGIMES.index(Regime.CHAOTIC)
+    return codes
+
+
+def regime_codes(df: pd.DataFrame, prev: np.ndarray | None = None) -> np.ndarray:
+    """
+    Código de régimen (índice en Regime) para CADA vela en una sola pasada.
+
+    prev: códigos ya calculados para las primeras len(prev) filas de df;
+    solo se calculan las velas nuevas (ventana de REGIME_WINDOW + 1 filas).
+    """
+    df = ensure_features(df, REGIME_FEATURES)
+    n = len(df)
+
+    start = 0
+    if prev is not None and 0 < len(prev) <= n:
+        if len(prev) == n:
+            return np.asarray(prev, dtype=np.int8)
+        start = max(0, len(prev) - REGIME_WINDOW)
+
+    cols = [df[c].to_numpy(dtype=np.float64)[start:] for c in ("ema_slow", "atr", "close")]
+    codes = _codes(*cols)
+
+    if start == 0:
+        return codes
+    return np.concatenate([np.asarray(prev, dtype=np.int8), codes[len(prev) - start:]])
+
+
+def regime_series(df: pd.DataFrame, prev: np.ndarray | None = None) -> pd.Series:
+    """
+    Régimen por vela como Series categórica (bull / bear / range / chaotic).
     """
+    codes = regime_codes(df, prev)
+    return pd.Series(pd.Categorical.from_codes(codes, categories=_CATEGORIES), index=df.index, name="regime")
 
-    ema_fast = df["ema_fast"]
-    ema_slow = df["ema_slow"]
-    atr = df["atr"]
-    close = df["close"]
 
-    # Pendiente de la EMA lenta
-    slope = ema_slow.diff().tail(5).mean()
+def add_regime(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Agrega la columna `regime` (precalculada): detect_regime la lee
+    directamente en backtests en vez de recalcular por ventana.
+    """
+    if "regime" in df.columns:
+        return df
+    return ensure_features(df, REGIME_FEATURES).assign(regime=regime_series(df))
 
-    atr_relative = (atr / close).tail(5).mean()
 
-    # 🔹 CAÓTICO: volatilidad extrema
-    if atr_relative > 0.06:
-        return MarketRegime.CHAOTIC
+def regime_labels(df: pd.DataFrame) -> np.ndarray:
+    """
+    Códigos de régimen por vela: la columna `regime` si df la trae
+    (add_regime), si no regime_codes(df).
+    """
+    if "regime" in df.columns:
+        return pd.Categorical(df["regime"].astype(str), categories=_CATEGORIES).codes.astype(np.int8)
+    return regime_codes(df)
 
-    # 🔹 TENDENCIA: pendiente clara
-    if abs(slope) > 0.0005:
-        return MarketRegime.TRENDING
 
-    # 🔹 RANGO
-    return MarketRegime.RANGING
+# ============================
+# Última vela
+# ============================
+def detect_regime(df) -> Regime:
+    """
+    Régimen direccional de la última vela.
+    Si df trae `regime` (add_regime) se usa esa columna.
+    """
+    if "regime" in df.columns:
+        return Regime(str(df["regime"].iloc[-1]))
+
+    df = ensure_features(df, REGIME_FEATURES)
+
+    # solo hace falta la cola: ventana + 1 (diff)
+    tail = df.tail(REGIME_WINDOW + 1)
+    return _REGIMES[int(regime_codes(tail)[-1])]
+
+
+def detect_market_regime(df):
+    """
+    Detecta el régimen de mercado usando datos 1H.
+    Devuelve: MarketRegime
+    """
+    return _TO_MARKET[detect_regime(df)]
@@ -0,0 +1,168 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+from app.ai.regime import Regime, detect_regime
+from app.core.logger import get_logger
+from app.data.cache import BoundedCache
+from app.data.timeframes import now_ms, timeframe_ms
+
+logger = get_logger(__name__)
+
+# ============================
+# Cache de régimen por (symbol, timeframe)
+# ============================
+# El régimen se calcula SOLO con velas cerradas, así que no puede cambiar
+# hasta que cierre la siguiente vela de ese timeframe: la entrada vale
+# hasta ese instante (valid_until) y el scanner no necesita volver a
+# descargar 4h / 1d en cada scan horario.
+REGIME_CACHE_MAX_BYTES = int(os.getenv("REGIME_CACHE_MAX_BYTES", str(4 * 1024 * 1024)))
+
+# warmup al arrancar (0 = desactivado)
+REGIME_WARM_UNIVERSE = int(os.getenv("REGIME_WARM_UNIVERSE", "50"))
+REGIME_WARM_TIMEFRAMES = ("4h", "1d")
+REGIME_WARM_LIMITS = {"4h": 260, "1d": 220}
+REGIME_WARM_MAX_WORKERS = 8
+
+
+def _ms(col: pd.Series) -> np.ndarray:
+    if pd.api.types.is_datetime64_any_dtype(col):
+        return col.to_numpy(dtype="datetime64[ms]").astype(np.int64)
+    return col.to_numpy(dtype=np.int64)
+
+
+class RegimeEntry:
+    __slots__ = ("regime", "valid_from", "valid_until", "computed_at", "nbytes")
+
+    def __init__(self, regime: Regime, valid_from: int, valid_until: int):
+        self.regime = regime
+        self.valid_from = int(valid_from)
+        self.valid_until = int(valid_until)
+        self.computed_at = now_ms()
+        self.nbytes = 128
+
+    def to_dict(self) -> dict:
+        return {
+            "regime": self.regime.value,
+            "valid_from": self.valid_from,
+            "valid_until": self.valid_until,
+            "computed_at": self.computed_at,
+            "ttl_ms": max(0, self.valid_until - now_ms()),
+        }
+
+
+class RegimeCache:
+    def __init__(self, max_bytes: int = REGIME_CACHE_MAX_BYTES):
+        self._cache = BoundedCache(max_bytes)
+        self.computed = 0
+
+    @staticmethod
+    def _key(symbol: str, timeframe: str):
+        return (str(symbol).upper(), str(timeframe))
+
+    def entry(self, symbol: str, timeframe: str) -> RegimeEntry | None:
+        return self._cache.get(self._key(symbol, timeframe))
+
+    def get(self, symbol: str, timeframe: str) -> Regime | None:
+        entry = self.entry(symbol, timeframe)
+        return entry.regime if entry is not None else None
+
+    def update(self, symbol: str, timeframe: str, df: pd.DataFrame) -> Regime:
+        """
+        Calcula el régimen con las velas CERRADAS de df y lo guarda hasta
+        el cierre de la siguiente vela. Si df no llega hasta la última vela
+        cerrada (datos viejos) el resultado se devuelve sin cachear.
+        """
+        step = timeframe_ms(timeframe)
+
+        if step is None or "close_time" not in df.columns:
+            return detect_regime(df)
+
+        close_time = _ms(df["close_time"])
+        n_closed = int(np.searchsorted(close_time, now_ms(), side="left"))
+        closed = df.iloc[:n_closed] if n_closed else df
+
+        regime = detect_regime(closed)
+        self.computed += 1
+
+        if n_closed:
+            valid_from = int(close_time[n_closed - 1]) + 1
+            valid_until = valid_from + step
+            if valid_until > now_ms():
+                self._cache.set(self._key(symbol, timeframe), RegimeEntry(regime, valid_from, valid_until), expires_at=valid_until)
+
+        return regime
+
+    def validity(self, symbol: str, timeframe: str) -> dict | None:
+        entry = self.entry(symbol, timeframe)
+        return entry.to_dict() if entry is not None else None
+
+    def warm(
+        self,
+        symbols: Iterable[str],
+        timeframes: Iterable[str] = REGIME_WARM_TIMEFRAMES,
+        max_workers: int = REGIME_WARM_MAX_WORKERS,
+    ) -> dict:
+        """
+        Descarga y calcula el régimen de todo el universo (solo lo que no
+        esté vigente). Devuelve conteos de ok / skipped / failed.
+        """
+        from app.data.binance_client import load_market_data
+        from app.features.cache import get_features
+
+        todo = [(s, tf) for s in symbols for tf in timeframes if self.entry(s, tf) is None]
+        counts = {"ok": 0, "skipped": 0, "failed": 0}
+
+        def work(item):
+            symbol, tf = item
+            df = load_market_data(symbol, timeframe=tf, limit=REGIME_WARM_LIMITS.get(tf, 260))
+            if df is None or df.empty:
+                return "skipped"
+            self.update(symbol, tf, get_features(symbol, tf, df))
+            return "ok"
+
+        if not todo:
+            return counts
+
+        with ThreadPoolExecutor(max_workers=max(1, int(max_workers))) as pool:
+            futures = [pool.submit(work, item) for item in todo]
+            for item, fut in zip(todo, futures):
+                try:
+                    counts[fut.result()] += 1
+                except Exception as e:
+                    counts["failed"] += 1
+                    logger.warning(f"[REGIME WARM] {item[0]} {item[1]} failed: {e}")
+
+        return counts
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return {**self._cache.stats(), "computed": self.computed}
+
+
+# ============================
+# Cache global
+# ============================
+_REGIME_CACHE = RegimeCache()
+
+
+def get_regime_cache() -> RegimeCache:
+    return _REGIME_CACHE
+
+
+def warm_regime_cache(universe_size: int = REGIME_WARM_UNIVERSE, timeframes: List[str] | None = None) -> Dict[str, int]:
+    """
+    Warmup del régimen 4h / 1d para el TOP `universe_size` por volumen.
+    """
+    from app.data.binance_client import get_top_usdt_pairs_by_volume
+
+    if int(universe_size) <= 0:
+        return {"ok": 0, "skipped": 0, "failed": 0}
+
+    symbols = get_top_usdt_pairs_by_volume(top_n=int(universe_size))
+    return _REGIME_CACHE.warm(symbols, timeframes or REGIME_WARM_TIMEFRAMES)
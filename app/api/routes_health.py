@@ -1,5 +1,12 @@
 from fastapi import APIRouter
 from app.db.session import SessionLocal
+from app.data.cache import get_cache_stats
+from app.data.exchange_client import get_pool_stats
+from app.data.exchange_snapshot import get_snapshot_service
+from app.features.cache import get_feature_cache_stats
+from app.ai.regime_cache import get_regime_cache
+from app.models.registry import get_active_artifact_meta, get_model_registry
+from app.models.retrain import get_retrain_service
 from app.signals.signal_engine import generate_signal
 
 router = APIRouter(prefix="/health", tags=["Health"])
@@ -24,6 +31,14 @@ def health():
     return {
         "status": "ok" if db_ok and signal_engine_ok else "degraded",
         "db": db_ok,
-        "signal_engine": signal_engine_ok
+        "signal_engine": signal_engine_ok,
+        "exchange_pool": get_pool_stats(),
+        "market_cache": get_cache_stats(),
+        "exchange_snapshot": get_snapshot_service().stats(),
+        "feature_cache": get_feature_cache_stats(),
+        "regime_cache": get_regime_cache().stats(),
+        "model": get_active_artifact_meta(),
+        "model_registry": get_model_registry().stats(),
+        "model_retrain": get_retrain_service().stats(),
     }
 
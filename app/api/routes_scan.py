@@ -1,6 +1,8 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query
 from typing import Optional
 
+from app.ai.regime_cache import get_regime_cache
+from app.models.registry import ModelUnavailable, get_active_model
 from app.scanner.scanner import run_market_scan
 
 router = APIRouter()
@@ -10,6 +12,10 @@ def scan_market(
     timeframe: str = Query("1h", description="Timeframe de análisis (ej: 1h, 4h)"),
     universe_size: int = Query(50, ge=10, le=300, description="Cantidad de pares USDT a escanear"),
     top_n: Optional[int] = Query(5, ge=1, le=20, description="Top N señales a devolver"),
+    max_workers: int = Query(8, ge=1, le=32, description="Descargas simultáneas a Binance"),
+    fetch_timeout: float = Query(10.0, gt=0, le=60, description="Timeout por request (segundos)"),
+    resample_higher: bool = Query(False, description="Construir 4h/1d desde velas 1h (1 descarga por par; conviene con el kline store caliente)"),
+    panel: bool = Query(False, description="Calcular técnicos de todo el universo en un solo panel vectorizado"),
 ):
     """
     Escanea el mercado USDT completo usando AI Scanner institucional
@@ -22,8 +28,35 @@ def scan_market(
     /scan?timeframe=1h&universe_size=50&top_n=5
     """
 
+    # sin modelo no se descarga el universo (503 hasta que haya uno)
+    try:
+        get_active_model()
+    except ModelUnavailable as e:
+        raise HTTPException(status_code=503, detail=f"Model not available yet: {e}")
+
     return run_market_scan(
         timeframe=timeframe,
         universe_size=universe_size,
         top_n=top_n,
+        max_workers=max_workers,
+        fetch_timeout=fetch_timeout,
+        resample_higher=resample_higher,
+        panel=panel,
     )
+
+
+@router.get("/scan/regime")
+def scan_regime(
+    symbol: str = Query(..., min_length=1, description="Par USDT (ej: BTCUSDT)"),
+    timeframe: str = Query("4h", description="Timeframe del régimen (ej: 4h, 1d)"),
+):
+    """
+    Régimen cacheado y su ventana de validez (hasta el próximo cierre).
+    """
+    validity = get_regime_cache().validity(symbol, timeframe)
+    return {
+        "symbol": symbol.upper(),
+        "timeframe": timeframe,
+        "cached": validity is not None,
+        **(validity or {}),
+    }
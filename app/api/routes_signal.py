@@ -2,7 +2,9 @@ from fastapi import APIRouter, HTTPException, Query
 import pandas as pd
 
 from app.data.loaders import load_market_data
-from app.features.technicals import add_technicals
+from app.features.cache import get_features
+from app.models.registry import ModelUnavailable, get_active_artifact_meta, get_active_model, get_model_registry
+from app.models.retrain import get_retrain_service
 from app.signals.signal_engine import generate_signal
 
 router = APIRouter()
@@ -18,6 +20,9 @@ def get_signal(
     limit: int = Query(200, ge=50, le=1000),
 ):
     try:
+        # 0. Sin modelo no tiene sentido descargar nada
+        get_active_model()
+
         # 1. Cargar datos de mercado
         df = load_market_data(symbol, timeframe, limit)
 
@@ -40,8 +45,8 @@ def get_signal(
                 detail="Market data missing required columns",
             )
 
-        # 2. Indicadores técnicos
-        df = add_technicals(df)
+        # 2. Indicadores técnicos (cache por serie / última vela cerrada)
+        df = get_features(symbol, timeframe, df)
 
         if df is None or df.empty:
             raise HTTPException(
@@ -50,7 +55,7 @@ def get_signal(
             )
 
         # 3. Generar señal
-        signal = generate_signal(df)
+        signal = generate_signal(df, symbol=symbol, timeframe=timeframe)
 
         if not isinstance(signal, dict):
             raise HTTPException(
@@ -74,8 +79,36 @@ def get_signal(
     except HTTPException:
         raise
 
+    except ModelUnavailable as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Model not available yet: {str(e)}",
+        )
+
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Signal endpoint error: {str(e)}",
         )
+
+
+# ========================================================
+# MODELO ACTIVO / REENTRENAMIENTO
+# ========================================================
+
+@router.get("/model")
+def get_model():
+    return {
+        "active": get_active_artifact_meta(),
+        "specialized": get_model_registry().stats(),
+        "retrain": get_retrain_service().stats(),
+    }
+
+
+@router.post("/model/retrain")
+def retrain_model():
+    """
+    Reentrena en background; el modelo nuevo se publica solo si no
+    empeora al activo en el holdout (ver GET /model).
+    """
+    return get_retrain_service().trigger()
@@ -2,6 +2,7 @@ import pandas as pd
 
 from app.data.loaders import load_market_data
 from app.features import build_features
+from app.ai.regime import add_regime
 from app.signals.signal_engine import SignalEngine
 from app.services.risk_service import enrich_signal_with_risk
 from app.core.logger import get_logger
@@ -14,6 +15,7 @@ def run_backtest(
     symbol: str,
     timeframe: str,
     initial_equity: float = 10_000.0,
+    compact: bool = False,
 ) -> pd.DataFrame:
     equity = float(initial_equity)
     equity_curve = []
@@ -37,16 +39,24 @@ def run_backtest(
         logger.warning(f"No data for {symbol} {timeframe}")
         return pd.DataFrame([])
 
-    df = build_features(df)
+    # compact=True: indicadores en float32 (historias largas)
+    df = build_features(df, compact=compact)
 
-    engine = SignalEngine(threshold=0.55)
+    # régimen de TODAS las velas en una pasada (SignalEngine lee la columna)
+    df = add_regime(df)
+
+    engine = SignalEngine(threshold=0.55, symbol=symbol, timeframe=timeframe)
+
+    # ✅ señales de TODA la historia (un predict_proba); la vela i-1 es
+    # la última de la ventana df.iloc[:i]
+    signals = engine.generate_series(df)
+    closes = df["close"].to_numpy(dtype=float)
 
     for i in range(100, len(df)):
-        window = df.iloc[:i].copy()
-        price = float(window.iloc[-1]["close"])
+        price = float(closes[i - 1])
 
-        # ✅ Generar señal ML
-        raw_signal = engine.generate(window)
+        # ✅ Señal ML de la ventana
+        raw_signal = engine.signal_at(signals, i - 1)
 
         # ✅ Enriquecer con gestión de riesgo
         signal = enrich_signal_with_risk(
@@ -108,7 +118,7 @@ def run_backtest(
 
         equity_curve.append(
             {
-                "timestamp": window.index[-1],
+                "timestamp": df.index[i - 1],
                 "equity": equity,
                 "price": price,
                 "position": position["side"] if position else None,
@@ -10,14 +10,17 @@ def run_backtest(symbol="BTCUSDT", timeframe="1h", capital=10_000):
     df = add_technicals(df)
 
     engine = BacktestEngine(capital)
-    signal_engine = SignalEngine()
+    signal_engine = SignalEngine(symbol=symbol, timeframe=timeframe)
     risk = RiskManager()
 
+    # señales de toda la historia; la vela i-1 es la última de df.iloc[:i]
+    signals = signal_engine.generate_series(df)
+
     for i in range(50, len(df)):
         slice_df = df.iloc[:i]
-        signal = signal_engine.generate(slice_df, probability=0.55)
+        signal = signal_engine.signal_at(signals, i - 1)
 
-        if signal.type == SignalType.BUY:
+        if signal["signal"] == SignalType.BUY.value:
             trade = risk.build_trade(
                 capital=engine.capital,
                 entry_price=slice_df.iloc[-1]["close"],
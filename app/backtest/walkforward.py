@@ -2,8 +2,9 @@ import pandas as pd
 
 from app.data.loaders import load_binance_history
 from app.features import build_features
+from app.ai.regime import add_regime
 from app.models.registry import prepare_dataset
-from app.signals.signal_engine import generate_signal
+from app.signals.signal_engine import SignalEngine
 from app.backtest.metrics import compute_expectancy
 
 
@@ -15,6 +16,10 @@ def walk_forward_validation(
 ):
     df = load_binance_history(symbol, timeframe)
     df = build_features(df)
+    df = add_regime(df)
+
+    # señales de toda la historia en una pasada (modelo congelado)
+    signals = SignalEngine(symbol=symbol, timeframe=timeframe).generate_series(df)
 
     results = []
     start = 0
@@ -33,8 +38,7 @@ def walk_forward_validation(
         trades = []
 
         for i in range(len(test_df)):
-            slice_df = df.iloc[: start + train_size + i + 1]
-            signal = generate_signal(slice_df, symbol)
+            signal = SignalEngine.signal_at(signals, start + train_size + i)
 
             if signal["signal"] in ("BUY", "SELL"):
                 trades.append({
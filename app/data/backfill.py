@@ -0,0 +1,248 @@
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+from app.core.logger import get_logger
+from app.data.kline_store import (
+    MAX_KLINES_PER_REQUEST,
+    STORE_DIR,
+    read_klines,
+    write_klines,
+)
+from app.data.ohlcv import OHLCV, decode_klines
+from app.data.timeframes import candle_open_time, now_ms, timeframe_ms
+
+logger = get_logger(__name__)
+
+# ============================
+# Backfill histórico (paralelo + reanudable)
+# ============================
+# El rango [start, end) se parte en chunks de MAX_KLINES_PER_REQUEST velas.
+# Cada chunk descargado se guarda como checkpoint:
+#   <STORE_DIR>/_backfill/<SYMBOL>/<timeframe>/<start>_<end>/<chunk_start>.npz
+# Si el proceso se corta, la siguiente corrida solo baja los chunks que faltan.
+# Al terminar, todo se mergea en el kline store y se borran los checkpoints.
+#
+# Si Binance no tiene velas anteriores (símbolo listado hace poco) se guarda
+#   <STORE_DIR>/_backfill/<SYMBOL>/<timeframe>/listing.json
+# con la primera vela existente y no se vuelve a pedir ese rango vacío.
+CHECKPOINT_DIR = STORE_DIR / "_backfill"
+LISTING_FILE = "listing.json"
+
+BACKFILL_MAX_WORKERS = int(os.getenv("BACKFILL_MAX_WORKERS", "4"))
+BACKFILL_RETRIES = 3
+
+
+def _checkpoint_dir(symbol: str, timeframe: str, start_ms: int, end_ms: int) -> Path:
+    return CHECKPOINT_DIR / str(symbol).upper() / str(timeframe) / f"{start_ms}_{end_ms}"
+
+
+def _listing_path(symbol: str, timeframe: str) -> Path:
+    return CHECKPOINT_DIR / str(symbol).upper() / str(timeframe) / LISTING_FILE
+
+
+def listing_start(symbol: str, timeframe: str) -> int | None:
+    """
+    Primera vela que tiene Binance (si ya se comprobó), en ms.
+    """
+    try:
+        return int(json.loads(_listing_path(symbol, timeframe).read_text())["first_open"])
+    except (FileNotFoundError, KeyError, TypeError, ValueError):
+        return None
+
+
+def _mark_listing(symbol: str, timeframe: str, first_open: int) -> None:
+    path = _listing_path(symbol, timeframe)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"first_open": int(first_open)}))
+    os.replace(tmp, path)
+
+
+def _chunk_ranges(start_ms: int, end_ms: int, step: int) -> List[Tuple[int, int]]:
+    span = MAX_KLINES_PER_REQUEST * step
+    return [(s, min(s + span, end_ms)) for s in range(start_ms, end_ms, span)]
+
+
+def _save_chunk(path: Path, data: OHLCV) -> None:
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "wb") as fh:
+        np.savez(fh, prices=data.prices, times=data.times)
+    os.replace(tmp, path)
+
+
+def _load_chunk(path: Path) -> OHLCV:
+    with np.load(path) as z:
+        return OHLCV(z["prices"], z["times"])
+
+
+def _fetch_chunk(client, symbol: str, timeframe: str, chunk_start: int, chunk_end: int, request_kwargs: dict) -> OHLCV:
+    for attempt in range(BACKFILL_RETRIES):
+        try:
+            return decode_klines(
+                client.get_klines(
+                    symbol=symbol,
+                    interval=timeframe,
+                    startTime=chunk_start,
+                    endTime=chunk_end - 1,
+                    limit=MAX_KLINES_PER_REQUEST,
+                    **request_kwargs,
+                )
+            )
+        except Exception:
+            if attempt == BACKFILL_RETRIES - 1:
+                raise
+            time.sleep(0.5 * 2 ** attempt)
+
+
+def backfill_klines(
+    client,
+    symbol: str,
+    timeframe: str,
+    start_ms: int,
+    end_ms: int | None = None,
+    max_workers: int = BACKFILL_MAX_WORKERS,
+    **request_kwargs,
+) -> int:
+    """
+    Descarga [start_ms, end_ms) en chunks paralelos y lo mergea en el store.
+    Solo se persisten velas cerradas. Devuelve las filas del store resultante.
+    """
+    step = timeframe_ms(timeframe)
+    if step is None:
+        raise ValueError(f"Unsupported timeframe for backfill: {timeframe}")
+
+    now = now_ms()
+    start_ms = candle_open_time(int(start_ms), timeframe)
+    end_ms = candle_open_time(min(int(end_ms or now), now), timeframe)
+    if end_ms <= start_ms:
+        return len(read_klines(symbol, timeframe))
+
+    ckpt = _checkpoint_dir(symbol, timeframe, start_ms, end_ms)
+    ckpt.mkdir(parents=True, exist_ok=True)
+
+    manifest = ckpt / "manifest.json"
+    if not manifest.exists():
+        manifest.write_text(
+            json.dumps({"symbol": symbol, "timeframe": timeframe, "start": start_ms, "end": end_ms})
+        )
+
+    chunks = _chunk_ranges(start_ms, end_ms, step)
+    pending = [(s, e) for s, e in chunks if not (ckpt / f"{s}.npz").exists()]
+
+    if len(pending) < len(chunks):
+        logger.info(f"[BACKFILL] {symbol} {timeframe}: resuming, {len(chunks) - len(pending)}/{len(chunks)} chunks done")
+
+    # ✅ chunks en paralelo; cada uno queda en disco apenas termina
+    error = None
+    with ThreadPoolExecutor(max_workers=max(1, int(max_workers))) as pool:
+        futures = {
+            pool.submit(_fetch_chunk, client, symbol, timeframe, s, e, request_kwargs): s
+            for s, e in pending
+        }
+        for fut in as_completed(futures):
+            try:
+                _save_chunk(ckpt / f"{futures[fut]}.npz", fut.result())
+            except Exception as e:
+                # se guardan los demás chunks; la próxima corrida retoma desde aquí
+                error = error or e
+
+    if error is not None:
+        raise error
+
+    data = OHLCV.empty()
+    for s, _ in chunks:
+        data = data.concat(_load_chunk(ckpt / f"{s}.npz"))
+
+    data = data.take(data["close_time"] < now)
+
+    # merge con lo ya guardado (write_klines ordena y deduplica)
+    rows = write_klines(symbol, timeframe, read_klines(symbol, timeframe).concat(data))
+
+    shutil.rmtree(ckpt, ignore_errors=True)
+    logger.info(f"[BACKFILL] {symbol} {timeframe}: {len(data)} klines downloaded, {rows} stored")
+    return rows
+
+
+def ensure_history(client, symbol: str, timeframe: str, limit: int, max_workers: int = BACKFILL_MAX_WORKERS, **request_kwargs) -> int:
+    """
+    Garantiza que el store tenga (si Binance las tiene) las últimas `limit` velas:
+    - historia anterior a la primera vela guardada
+    - hueco reciente si el store quedó más de 1 request atrás
+    Devuelve las filas guardadas.
+    """
+    step = timeframe_ms(timeframe)
+    if step is None:
+        return 0
+
+    now = now_ms()
+    wanted_start = candle_open_time(now, timeframe) - (int(limit) - 1) * step
+    return ensure_range(client, symbol, timeframe, wanted_start, now, max_workers, **request_kwargs)
+
+
+def ensure_range(
+    client,
+    symbol: str,
+    timeframe: str,
+    start_ms: int,
+    end_ms: int,
+    max_workers: int = BACKFILL_MAX_WORKERS,
+    tail_gap: int = MAX_KLINES_PER_REQUEST,
+    **request_kwargs,
+) -> int:
+    """
+    Garantiza que el store cubra [start_ms, end_ms) (hasta donde Binance tenga):
+    - historia anterior a la primera vela guardada (salvo antes del listing)
+    - hueco final si el store quedó más de `tail_gap` velas atrás de end_ms
+      (por defecto 1 request: esa cola la completa sync_klines)
+    Devuelve las filas guardadas.
+    """
+    step = timeframe_ms(timeframe)
+    if step is None:
+        return 0
+
+    end_ms = min(int(end_ms), now_ms())
+    start_ms = candle_open_time(int(start_ms), timeframe)
+
+    # antes del listing no hay nada que pedir
+    listed = listing_start(symbol, timeframe)
+    if listed is not None:
+        start_ms = max(start_ms, listed)
+
+    # rango [start_ms, head_end) bajado por delante (None: no hizo falta)
+    head_end = None
+    first_open = None
+
+    stored = read_klines(symbol, timeframe)
+    if len(stored) == 0:
+        head_end = end_ms
+        backfill_klines(client, symbol, timeframe, start_ms, end_ms, max_workers, **request_kwargs)
+    else:
+        first_open = int(stored["open_time"][0])
+        last_close = int(stored["close_time"][-1])
+
+        if first_open > start_ms:
+            head_end = min(first_open, end_ms)
+            backfill_klines(client, symbol, timeframe, start_ms, head_end, max_workers, **request_kwargs)
+
+        if (end_ms - last_close) // step > tail_gap:
+            backfill_klines(client, symbol, timeframe, last_close + 1, end_ms, max_workers, **request_kwargs)
+
+    stored = read_klines(symbol, timeframe)
+
+    if head_end is not None and len(stored):
+        head = int(stored["open_time"][0])
+        if start_ms < head < head_end:
+            # primera vela que devolvió Binance en el rango: antes no hay nada
+            _mark_listing(symbol, timeframe, head)
+        elif head == first_open and head_end == first_open:
+            # rango vacío hasta la primera vela guardada: esa es el listing
+            _mark_listing(symbol, timeframe, head)
+
+    return len(stored)
@@ -1,6 +1,11 @@
+import numpy as np
 import pandas as pd
 from binance.client import Client
 from app.core.config import settings
+from app.data.exchange_client import get_shared_client
+from app.data.exchange_snapshot import get_snapshot
+from app.data.kline_store import sync_klines
+from app.data.stream import read_stream
 
 
 # ============================
@@ -9,8 +14,9 @@ from app.core.config import settings
 def get_client() -> Client:
     """
     Devuelve un cliente Binance autenticado.
+    Compartido por todo el proceso (sesión keep-alive con pool).
     """
-    return Client(
+    return get_shared_client(
         api_key=settings.BINANCE_API_KEY,
         api_secret=settings.BINANCE_API_SECRET
     )
@@ -22,10 +28,9 @@ def get_client() -> Client:
 def get_exchange_info() -> dict:
     """
     Wrapper institucional para obtener exchangeInfo.
-    Usado por universe / filtros de mercado.
+    Servido desde el snapshot compartido (refresco en background).
     """
-    client = get_client()
-    return client.get_exchange_info()
+    return get_snapshot().exchange_info
 
 
 # ============================
@@ -35,97 +40,45 @@ def get_top_usdt_pairs_by_volume(top_n: int = 50) -> list[str]:
     """
     Devuelve TOP pares USDT ordenados por volumen 24h (quoteVolume).
     Esto es lo más profesional para un scanner institucional.
+    Sin requests: exchangeInfo + tickers 24h salen del snapshot en memoria.
     """
-    client = get_client()
-
-    # Exchange info para filtrar solo TRADING + USDT
-    info = get_exchange_info()
-    symbols_info = info.get("symbols", [])
-
-    tradable_usdt = set()
-    for s in symbols_info:
-        try:
-            sym = s.get("symbol", "")
-            status = s.get("status", "")
-            quote = s.get("quoteAsset", "")
-
-            if status != "TRADING":
-                continue
-            if quote != "USDT":
-                continue
-            if not sym.endswith("USDT"):
-                continue
-
-            # excluir cosas raras si quieres (UP/DOWN tokens)
-            if sym.endswith("UPUSDT") or sym.endswith("DOWNUSDT"):
-                continue
-
-            tradable_usdt.add(sym)
-        except Exception:
-            continue
-
-    # 24h tickers
-    tickers = client.get_ticker()  # trae volume + quoteVolume por símbolo
-
-    ranked = []
-    for t in tickers:
-        try:
-            sym = t.get("symbol", "")
-            if sym not in tradable_usdt:
-                continue
-
-            # quoteVolume = volumen en USDT (mejor para ranking institucional)
-            qv = float(t.get("quoteVolume", 0.0) or 0.0)
-            ranked.append((sym, qv))
-        except Exception:
-            continue
-
-    # ordenar desc por quoteVolume
-    ranked.sort(key=lambda x: x[1], reverse=True)
-
-    top_symbols = [sym for sym, _ in ranked[: max(1, int(top_n))]]
-    return top_symbols
+    return get_snapshot().top_by_quote_volume("USDT", top_n=top_n)
 
 
 # ============================
 # Cargar velas (klines)
 # ============================
-def load_market_data(symbol: str, timeframe: str = "1h", limit: int = 200) -> pd.DataFrame:
+def load_market_data(
+    symbol: str,
+    timeframe: str = "1h",
+    limit: int = 200,
+    timeout: float | None = None,
+) -> pd.DataFrame:
     """
     Descarga velas (klines) y devuelve DataFrame estándar:
     open, high, low, close, volume
+
+    timeout: límite (segundos) del request HTTP a Binance.
     """
-    client = get_client()
+    # Stream en memoria (si está activo): sin ir a Binance
+    data = read_stream(symbol, timeframe, int(limit))
+    if data is not None:
+        return data.to_frame(datetimes=True)
 
-    klines = client.get_klines(symbol=symbol, interval=timeframe, limit=int(limit))
-    if not klines:
-        return pd.DataFrame()
+    client = get_client()
 
-    df = pd.DataFrame(
-        klines,
-        columns=[
-            "open_time",
-            "open",
-            "high",
-            "low",
-            "close",
-            "volume",
-            "close_time",
-            "quote_asset_volume",
-            "num_trades",
-            "taker_buy_base",
-            "taker_buy_quote",
-            "ignore",
-        ],
-    )
+    request_kwargs = {}
+    if timeout is not None:
+        request_kwargs["requests_params"] = {"timeout": float(timeout)}
 
-    # Convertir a float
-    for c in ["open", "high", "low", "close", "volume"]:
-        df[c] = pd.to_numeric(df[c], errors="coerce")
+    # Store local: solo se descargan las velas nuevas
+    data = sync_klines(client, symbol, timeframe, int(limit), **request_kwargs)
+    if len(data) == 0:
+        return pd.DataFrame()
 
     # Timestamps (por si lo necesitas en UI)
-    df["open_time"] = pd.to_datetime(df["open_time"], unit="ms", errors="coerce")
-    df["close_time"] = pd.to_datetime(df["close_time"], unit="ms", errors="coerce")
+    df = data.to_frame(datetimes=True)
 
-    df = df.dropna(subset=["open", "high", "low", "close", "volume"])
-    return df.reset_index(drop=True)
+    if np.isnan(data.prices).any():
+        df = df.dropna(subset=["open", "high", "low", "close", "volume"]).reset_index(drop=True)
+    return df
@@ -0,0 +1,147 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable
+
+import numpy as np
+import pandas as pd
+
+from app.data.timeframes import next_candle_close, now_ms, timeframe_ms
+
+# ============================
+# Cache en memoria (LRU + expiración por vela)
+# ============================
+MARKET_CACHE_MAX_BYTES = int(os.getenv("MARKET_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# solo para entradas sin timeframe conocido
+DEFAULT_TTL_MS = 60_000
+
+
+def estimate_nbytes(value: Any) -> int:
+    """
+    Tamaño aproximado en memoria de un valor cacheado.
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, np.ndarray) or hasattr(value, "nbytes"):
+        # ndarray / OHLCV
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_nbytes(v) for v in value.values())
+    return int(sys.getsizeof(value))
+
+
+class BoundedCache:
+    """
+    Cache LRU acotado por bytes.
+    Cada entrada expira al cierre de la vela en curso de su timeframe
+    (o en `expires_at` si se indica explícitamente).
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = int(max_bytes)
+        self._data: "OrderedDict[Hashable, tuple[Any, int, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable):
+        now = now_ms()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, nbytes, expires_at = entry
+            if now >= expires_at:
+                self._pop(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        timeframe: str | None = None,
+        expires_at: int | None = None,
+    ) -> bool:
+        """
+        Guarda un valor. Devuelve False si no entra en el límite de memoria.
+        """
+        if expires_at is None:
+            if timeframe is not None and timeframe_ms(timeframe) is not None:
+                expires_at = next_candle_close(timeframe)
+            else:
+                expires_at = now_ms() + DEFAULT_TTL_MS
+
+        nbytes = estimate_nbytes(value)
+
+        with self._lock:
+            if key in self._data:
+                self._pop(key)
+
+            if nbytes > self.max_bytes:
+                return False
+
+            while self._data and self._bytes + nbytes > self.max_bytes:
+                oldest = next(iter(self._data))
+                self._pop(oldest)
+                self.evictions += 1
+
+            self._data[key] = (value, nbytes, int(expires_at))
+            self._bytes += nbytes
+            return True
+
+    def _pop(self, key: Hashable) -> None:
+        _, nbytes, _ = self._data.pop(key)
+        self._bytes -= nbytes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+# ============================
+# Cache global de market data (usado por loaders)
+# ============================
+_MARKET_CACHE = BoundedCache(MARKET_CACHE_MAX_BYTES)
+
+
+def get_cached(key: Hashable):
+    return _MARKET_CACHE.get(key)
+
+
+def set_cached(key: Hashable, value: Any, timeframe: str | None = None) -> bool:
+    return _MARKET_CACHE.set(key, value, timeframe=timeframe)
+
+
+def get_cache_stats() -> dict:
+    return _MARKET_CACHE.stats()
@@ -1,11 +1,166 @@
+from dataclasses import asdict, dataclass
+from typing import Tuple
+
+import numpy as np
 import pandas as pd
 
-def clean_market_data(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.dropna()
+from app.data.timeframes import timeframe_ms
+
+PRICE_COLS = ["open", "high", "low", "close"]
+NUMERIC_COLS = PRICE_COLS + ["volume"]
+
+
+# ============================
+# Reporte de calidad por serie
+# ============================
+@dataclass
+class QualityReport:
+    symbol: str | None
+    timeframe: str | None
+    rows_in: int = 0
+    rows_out: int = 0
+    out_of_order: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    zero_volume: int = 0
+    gaps: int = 0
+    missing_bars: int = 0
+    filled_bars: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return not (self.out_of_order or self.duplicates or self.invalid or self.missing_bars)
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "ok": self.ok}
+
+
+def _open_time_ms(col: pd.Series) -> np.ndarray:
+    if pd.api.types.is_datetime64_any_dtype(col):
+        return col.to_numpy(dtype="datetime64[ms]").astype(np.int64)
+    return col.to_numpy(dtype=np.int64)
+
+
+def _like_time(ms: np.ndarray, col: pd.Series):
+    """
+    ms -> mismo tipo que `col` (epoch ms o datetime, con o sin tz).
+    """
+    if not pd.api.types.is_datetime64_any_dtype(col):
+        return ms
+    if isinstance(col.dtype, pd.DatetimeTZDtype):
+        return pd.to_datetime(ms, unit="ms", utc=True).tz_convert(col.dtype.tz)
+    return pd.to_datetime(ms, unit="ms").astype(col.dtype)
+
+
+# ============================
+# Validación vectorizada (una pasada sobre los arrays)
+# ============================
+def validate_ohlcv(
+    df: pd.DataFrame,
+    timeframe: str | None = None,
+    fill_gaps: bool = False,
+    drop_zero_volume: bool = True,
+    symbol: str | None = None,
+) -> Tuple[pd.DataFrame, QualityReport]:
+    """
+    Ordena, deduplica y valida una serie OHLCV sin loops por fila.
+    - open_time fuera de orden -> se ordena
+    - open_time duplicado -> gana la última ocurrencia
+    - NaN / precios <= 0 / high < low -> fila descartada
+    - huecos contra el espaciado del timeframe (inferido si no se pasa)
+    - fill_gaps: rellena velas faltantes con el close previo y volumen 0
+    Devuelve (df limpio, reporte). El df de entrada no se modifica.
+    """
+    if df is None or df.empty:
+        return pd.DataFrame(), QualityReport(symbol=symbol, timeframe=timeframe)
+
+    report = QualityReport(symbol=symbol, timeframe=timeframe, rows_in=len(df))
+
+    prices = df[NUMERIC_COLS].to_numpy(dtype=np.float64)
+    has_time = "open_time" in df.columns
+
+    # 1) filas inválidas (+ volumen 0)
+    valid = np.isfinite(prices).all(axis=1)
+    valid &= (prices[:, :4] > 0).all(axis=1) & (prices[:, 1] >= prices[:, 2])
+    report.invalid = int((~valid).sum())
+
+    if drop_zero_volume:
+        positive = prices[:, 4] > 0
+        report.zero_volume = int((valid & ~positive).sum())
+        valid &= positive
+
+    keep = np.flatnonzero(valid)
+
+    if not has_time:
+        out = df.take(keep).reset_index(drop=True)
+        out[NUMERIC_COLS] = out[NUMERIC_COLS].astype(np.float64)
+        report.rows_out = len(out)
+        return out, report
+
+    # 2) orden + duplicados
+    open_time = _open_time_ms(df["open_time"])[keep]
+    # filas que llegan después de una vela posterior (no cantidad de saltos)
+    if len(open_time) > 1:
+        report.out_of_order = int((open_time[1:] < np.maximum.accumulate(open_time)[:-1]).sum())
+
+    if report.out_of_order:
+        order = np.argsort(open_time, kind="stable")
+        keep = keep[order]
+        open_time = open_time[order]
+
+    last = np.append(open_time[1:] != open_time[:-1], True)
+    report.duplicates = int((~last).sum())
+    keep = keep[last]
+    open_time = open_time[last]
+
+    # 3) huecos contra el espaciado esperado
+    step = timeframe_ms(timeframe) if timeframe else None
+    diffs = np.diff(open_time)
+    if step is None and len(diffs):
+        step = int(np.median(diffs))
+
+    if step and len(diffs):
+        missing = diffs // step - 1
+        holes = missing > 0
+        report.gaps = int(holes.sum())
+        report.missing_bars = int(missing[holes].sum())
+
+    # 4) relleno opcional (forward-fill del close previo)
+    if fill_gaps and report.missing_bars:
+        slot = (open_time - open_time[0]) // step
+        n = int(slot[-1]) + 1
+
+        present = np.zeros(n, dtype=bool)
+        present[slot] = True
+        src = np.zeros(n, dtype=np.int64)
+        src[slot] = np.arange(len(slot))
+        src = np.maximum.accumulate(np.where(present, src, 0))
+
+        out = df.take(keep[src]).reset_index(drop=True)
+
+        filled = ~present
+        grid = open_time[0] + np.arange(n, dtype=np.int64) * step
+        prev_close = out["close"].to_numpy(dtype=np.float64)
+
+        for c in PRICE_COLS:
+            out[c] = np.where(filled, prev_close, out[c].to_numpy(dtype=np.float64))
+        out["volume"] = np.where(filled, 0.0, out["volume"].to_numpy(dtype=np.float64))
+
+        out["open_time"] = _like_time(grid, df["open_time"])
+        # velas rellenadas: close_time propio (no el de la vela previa), en ambos dtypes
+        if "close_time" in out.columns:
+            close_time = np.where(filled, grid + step - 1, _open_time_ms(out["close_time"]))
+            out["close_time"] = _like_time(close_time, df["close_time"])
+
+        report.filled_bars = int(filled.sum())
+    else:
+        out = df.take(keep).reset_index(drop=True)
+        out[NUMERIC_COLS] = out[NUMERIC_COLS].astype(np.float64)
 
-    numeric_cols = ["open", "high", "low", "close", "volume"]
-    df[numeric_cols] = df[numeric_cols].astype(float)
+    report.rows_out = len(out)
+    return out, report
 
-    df = df[df["volume"] > 0]
 
+def clean_market_data(df: pd.DataFrame, timeframe: str | None = None, fill_gaps: bool = False) -> pd.DataFrame:
+    df, _ = validate_ohlcv(df, timeframe=timeframe, fill_gaps=fill_gaps)
     return df
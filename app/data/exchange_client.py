@@ -0,0 +1,127 @@
+import os
+import threading
+from typing import Dict, Tuple
+
+from binance.client import Client
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# ============================
+# Cliente Binance compartido (pool keep-alive)
+# ============================
+# Un único pool HTTP por proceso: todos los clientes (con o sin API key)
+# montan el mismo adapter, así las conexiones TCP/TLS se reutilizan
+# entre loaders, scanner y universe.
+POOL_SIZE = int(os.getenv("BINANCE_POOL_SIZE", "16"))
+REQUEST_TIMEOUT_S = float(os.getenv("BINANCE_TIMEOUT", "10"))
+
+_STATS = {
+    "requests": 0,
+    "new_connections": 0,
+}
+_STATS_LOCK = threading.Lock()
+
+
+def _count(key: str) -> None:
+    with _STATS_LOCK:
+        _STATS[key] += 1
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        _count("new_connections")
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        _count("new_connections")
+        return super()._new_conn()
+
+
+class _PooledAdapter(HTTPAdapter):
+    """
+    HTTPAdapter con pool acotado que cuenta requests y conexiones nuevas.
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+    def send(self, request, *args, **kwargs):
+        _count("requests")
+        return super().send(request, *args, **kwargs)
+
+
+_ADAPTER: _PooledAdapter | None = None
+_CLIENTS: Dict[Tuple[str | None, str | None], Client] = {}
+_LOCK = threading.Lock()
+
+
+def _get_adapter() -> _PooledAdapter:
+    global _ADAPTER
+    if _ADAPTER is None:
+        _ADAPTER = _PooledAdapter(
+            pool_connections=4,       # hosts distintos (api, api1, ...)
+            pool_maxsize=POOL_SIZE,   # conexiones keep-alive por host
+            pool_block=False,
+        )
+    return _ADAPTER
+
+
+class _PooledClient(Client):
+    def _init_session(self):
+        session = super()._init_session()
+        adapter = _get_adapter()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+
+def get_shared_client(api_key: str | None = None, api_secret: str | None = None) -> Client:
+    """
+    Devuelve el cliente Binance del proceso para esas credenciales.
+    Se crea una sola vez; el pool HTTP es común a todos los clientes.
+    """
+    key = (api_key or None, api_secret or None)
+
+    client = _CLIENTS.get(key)
+    if client is not None:
+        return client
+
+    with _LOCK:
+        client = _CLIENTS.get(key)
+        if client is None:
+            kwargs = {"requests_params": {"timeout": REQUEST_TIMEOUT_S}}
+            try:
+                # sin ping en el constructor (evita un round-trip extra)
+                client = _PooledClient(api_key=key[0], api_secret=key[1], ping=False, **kwargs)
+            except TypeError:
+                # python-binance antiguo: no acepta ping=
+                client = _PooledClient(api_key=key[0], api_secret=key[1], **kwargs)
+            _CLIENTS[key] = client
+
+    return client
+
+
+def get_pool_stats() -> dict:
+    """
+    Contadores del pool HTTP:
+    - requests: requests enviados a Binance
+    - new_connections: conexiones TCP/TLS abiertas
+    - reused_connections: requests servidos con una conexión keep-alive
+    """
+    with _STATS_LOCK:
+        requests_sent = _STATS["requests"]
+        new_connections = _STATS["new_connections"]
+
+    return {
+        "pool_size": POOL_SIZE,
+        "clients": len(_CLIENTS),
+        "requests": requests_sent,
+        "new_connections": new_connections,
+        "reused_connections": max(0, requests_sent - new_connections),
+    }
@@ -0,0 +1,176 @@
+import os
+import threading
+from typing import Dict, List
+
+from app.core.logger import get_logger
+from app.data.exchange_client import get_shared_client
+from app.data.timeframes import now_ms
+
+logger = get_logger(__name__)
+
+# ============================
+# Snapshot de exchangeInfo + tickers 24h
+# ============================
+# Una sola copia en memoria para TODOS los builders de universo.
+# Se refresca en background; si nadie la refrescó y supera la
+# staleness máxima, se refresca en el momento (una sola vez).
+REFRESH_INTERVAL_S = float(os.getenv("EXCHANGE_SNAPSHOT_REFRESH", "120"))
+MAX_STALENESS_S = float(os.getenv("EXCHANGE_SNAPSHOT_MAX_STALENESS", "600"))
+
+
+class ExchangeSnapshot:
+    """
+    Vista inmutable de exchangeInfo + tickers 24h, indexada por
+    símbolo y por quote asset.
+    """
+
+    __slots__ = ("exchange_info", "symbols", "by_quote", "quote_volume", "refreshed_at")
+
+    def __init__(self, exchange_info: dict, tickers: list):
+        self.exchange_info = exchange_info or {}
+        self.symbols: Dict[str, dict] = {}
+        self.by_quote: Dict[str, List[str]] = {}
+        self.quote_volume: Dict[str, float] = {}
+        self.refreshed_at = now_ms()
+
+        for s in self.exchange_info.get("symbols", []):
+            sym = s.get("symbol")
+            if not sym:
+                continue
+            self.symbols[sym] = s
+            self.by_quote.setdefault(s.get("quoteAsset", ""), []).append(sym)
+
+        for t in tickers or []:
+            try:
+                self.quote_volume[t["symbol"]] = float(t.get("quoteVolume", 0.0) or 0.0)
+            except (KeyError, TypeError, ValueError):
+                continue
+
+    @property
+    def age_s(self) -> float:
+        return (now_ms() - self.refreshed_at) / 1000.0
+
+    def tradable(self, quote: str = "USDT", spot_only: bool = False) -> List[str]:
+        """
+        Símbolos en TRADING para un quote asset.
+        """
+        out = []
+        for sym in self.by_quote.get(quote, []):
+            s = self.symbols[sym]
+            if s.get("status") != "TRADING":
+                continue
+            if spot_only and not s.get("isSpotTradingAllowed", False):
+                continue
+            out.append(sym)
+        return out
+
+    def top_by_quote_volume(self, quote: str = "USDT", top_n: int = 50, exclude_leveraged: bool = True) -> List[str]:
+        """
+        TOP símbolos por quoteVolume 24h.
+        """
+        ranked = []
+        for sym in self.tradable(quote):
+            if not sym.endswith(quote):
+                continue
+            # excluir tokens apalancados (UP/DOWN)
+            if exclude_leveraged and (sym.endswith(f"UP{quote}") or sym.endswith(f"DOWN{quote}")):
+                continue
+            ranked.append((sym, self.quote_volume.get(sym, 0.0)))
+
+        ranked.sort(key=lambda x: x[1], reverse=True)
+        return [sym for sym, _ in ranked[: max(1, int(top_n))]]
+
+
+class ExchangeSnapshotService:
+    def __init__(self, client_factory=get_shared_client):
+        self._client_factory = client_factory
+        self._snapshot: ExchangeSnapshot | None = None
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.refreshes = 0
+        self.failures = 0
+
+    def refresh(self) -> ExchangeSnapshot:
+        client = self._client_factory()
+        snapshot = ExchangeSnapshot(client.get_exchange_info(), client.get_ticker())
+        # reemplazo atómico: los lectores ven la vieja o la nueva, nunca una a medias
+        self._snapshot = snapshot
+        self.refreshes += 1
+        return snapshot
+
+    def get(self, max_staleness_s: float = MAX_STALENESS_S) -> ExchangeSnapshot:
+        """
+        Snapshot con antigüedad <= max_staleness_s.
+        Si el refresh falla y hay una copia previa, se sirve la previa.
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.age_s <= max_staleness_s:
+            return snapshot
+
+        with self._refresh_lock:
+            # otro thread pudo refrescar mientras esperábamos
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.age_s <= max_staleness_s:
+                return snapshot
+
+            try:
+                return self.refresh()
+            except Exception as e:
+                self.failures += 1
+                if snapshot is not None:
+                    logger.warning(f"[SNAPSHOT] refresh failed, serving stale ({snapshot.age_s:.0f}s): {e}")
+                    return snapshot
+                raise
+
+    def _loop(self, interval_s: float) -> None:
+        # primer refresh inmediato: el primer scan ya encuentra el snapshot caliente
+        while True:
+            try:
+                with self._refresh_lock:
+                    self.refresh()
+            except Exception as e:
+                self.failures += 1
+                logger.warning(f"[SNAPSHOT] background refresh failed: {e}")
+
+            if self._stop.wait(interval_s):
+                break
+
+    def start(self, interval_s: float = REFRESH_INTERVAL_S) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._loop, args=(float(interval_s),), name="exchange-snapshot", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "age_s": round(snapshot.age_s, 1) if snapshot else None,
+            "symbols": len(snapshot.symbols) if snapshot else 0,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "background": self._thread is not None,
+        }
+
+
+# ============================
+# Servicio global
+# ============================
+_SERVICE = ExchangeSnapshotService()
+
+
+def get_snapshot_service() -> ExchangeSnapshotService:
+    return _SERVICE
+
+
+def get_snapshot(max_staleness_s: float = MAX_STALENESS_S) -> ExchangeSnapshot:
+    return _SERVICE.get(max_staleness_s)
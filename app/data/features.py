@@ -1,42 +1,24 @@
+import numpy as np
 import pandas as pd
 
-def add_features(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-
-    # Asegurar tipos
-    for col in ["open", "high", "low", "close", "volume"]:
-        df[col] = df[col].astype(float)
-
-    # Returns
-    df["return"] = df["close"].pct_change()
+from app.features.registry import compute_features
 
-    # RSI
-    delta = df["close"].diff()
-    gain = delta.clip(lower=0)
-    loss = -delta.clip(upper=0)
+# Variante usada por el modelo: EMAs con adjust=True y RSI sin relleno
+FEATURE_OVERRIDES = {
+    "ema_20": {"adjust": True},
+    "ema_50": {"adjust": True},
+    "ema_fast": {"adjust": True},
+    "ema_slow": {"adjust": True},
+    "rsi": {"fillna": None, "nan_on_zero_loss": False},
+}
 
-    roll = 14
-    avg_gain = gain.rolling(roll).mean()
-    avg_loss = loss.rolling(roll).mean()
-    rs = avg_gain / avg_loss
-    df["rsi"] = 100 - (100 / (1 + rs))
+FEATURE_COLUMNS = ["return", "rsi", "ema_20", "ema_50", "ema_fast", "ema_slow", "atr", "volatility"]
 
-    # EMAs
-    df["ema_20"] = df["close"].ewm(span=20).mean()
-    df["ema_50"] = df["close"].ewm(span=50).mean()
-    df["ema_fast"] = df["close"].ewm(span=12).mean()
-    df["ema_slow"] = df["close"].ewm(span=26).mean()
 
-    # ATR
-    high_low = df["high"] - df["low"]
-    high_close = (df["high"] - df["close"].shift()).abs()
-    low_close = (df["low"] - df["close"].shift()).abs()
-    tr = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-    df["atr"] = tr.rolling(14).mean()
-
-    # Volatilidad
-    df["volatility"] = df["return"].rolling(20).std()
+def add_features(df: pd.DataFrame) -> pd.DataFrame:
+    # Asegurar tipos
+    df = df.astype({col: np.float64 for col in ["open", "high", "low", "close", "volume"]})
 
-    df.dropna(inplace=True)
-    return df
+    df = compute_features(df, FEATURE_COLUMNS, overrides=FEATURE_OVERRIDES, reuse=False)
 
+    return df.dropna()
@@ -0,0 +1,253 @@
+import os
+import threading
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+
+from app.core.logger import get_logger
+from app.data.ohlcv import COLUMNS, OHLCV, TIME_COLUMNS, decode_klines
+from app.data.timeframes import now_ms, timeframe_ms
+
+logger = get_logger(__name__)
+
+# ============================
+# Store columnar local de velas
+# ============================
+# Layout en disco (un archivo binario por columna, append-only):
+#   <STORE_DIR>/<SYMBOL>/<timeframe>/<columna>.bin
+# Solo se persisten velas CERRADAS; la vela en curso siempre se pide a Binance.
+STORE_DIR = Path(os.getenv("KLINE_STORE_DIR", "app/data/klines"))
+
+# Binance devuelve como máximo 1000 velas por request
+MAX_KLINES_PER_REQUEST = 1000
+
+# columnas persistidas y su dtype en disco
+COLUMN_DTYPES = {c: np.int64 if c in TIME_COLUMNS else np.float64 for c in COLUMNS}
+
+_LOCKS: Dict[str, threading.Lock] = {}
+_LOCKS_GUARD = threading.Lock()
+
+
+def _partition_lock(symbol: str, timeframe: str) -> threading.Lock:
+    key = f"{symbol}:{timeframe}"
+    with _LOCKS_GUARD:
+        lock = _LOCKS.get(key)
+        if lock is None:
+            lock = threading.Lock()
+            _LOCKS[key] = lock
+        return lock
+
+
+def _partition_dir(symbol: str, timeframe: str) -> Path:
+    return STORE_DIR / str(symbol).upper() / str(timeframe)
+
+
+# ============================
+# Lectura / escritura
+# ============================
+def _stored_rows(path: Path) -> int:
+    """
+    Filas consistentes en disco (mínimo entre columnas).
+    Si un append se cortó a mitad, las columnas pueden diferir.
+    """
+    rows = None
+    for c, dt in COLUMN_DTYPES.items():
+        f = path / f"{c}.bin"
+        if not f.exists():
+            return 0
+        n = f.stat().st_size // np.dtype(dt).itemsize
+        rows = n if rows is None else min(rows, n)
+    return int(rows or 0)
+
+
+def read_klines(symbol: str, timeframe: str, limit: int | None = None) -> OHLCV:
+    """
+    Lee las últimas `limit` velas guardadas (todas si limit es None).
+    Cada columna se lee directo sobre su fila del bloque OHLCV.
+    """
+    path = _partition_dir(symbol, timeframe)
+
+    with _partition_lock(symbol, timeframe):
+        rows = _stored_rows(path)
+        if rows == 0:
+            return OHLCV.empty()
+
+        start = 0 if not limit or limit <= 0 else max(0, rows - int(limit))
+        out = OHLCV.empty(rows - start)
+        for c, dt in COLUMN_DTYPES.items():
+            with open(path / f"{c}.bin", "rb") as fh:
+                fh.seek(start * np.dtype(dt).itemsize)
+                fh.readinto(memoryview(out[c]).cast("B"))
+        return out
+
+
+def last_close_time(symbol: str, timeframe: str) -> int | None:
+    data = read_klines(symbol, timeframe, limit=1)
+    if len(data) == 0:
+        return None
+    return int(data["close_time"][-1])
+
+
+def append_klines(symbol: str, timeframe: str, data: OHLCV) -> int:
+    """
+    Agrega velas al final de la partición.
+    Solo escribe las que son posteriores a la última guardada (append-only).
+    Devuelve cuántas filas se escribieron.
+    """
+    if len(data) == 0:
+        return 0
+
+    path = _partition_dir(symbol, timeframe)
+
+    with _partition_lock(symbol, timeframe):
+        path.mkdir(parents=True, exist_ok=True)
+        rows = _stored_rows(path)
+
+        last_open = None
+        if rows:
+            last_open = int(
+                np.fromfile(path / "open_time.bin", dtype=np.int64, count=1, offset=(rows - 1) * 8)[0]
+            )
+
+        if last_open is not None:
+            data = data.take(data["open_time"] > last_open)
+            if len(data) == 0:
+                return 0
+
+        for c, dt in COLUMN_DTYPES.items():
+            f = path / f"{c}.bin"
+            # recorta restos de un append interrumpido antes de escribir
+            if f.exists() and f.stat().st_size != rows * np.dtype(dt).itemsize:
+                with open(f, "r+b") as fh:
+                    fh.truncate(rows * np.dtype(dt).itemsize)
+            with open(f, "ab") as fh:
+                np.ascontiguousarray(data[c], dtype=dt).tofile(fh)
+
+        return len(data)
+
+
+def write_klines(symbol: str, timeframe: str, data: OHLCV) -> int:
+    """
+    Reescribe la partición completa (ordenada por open_time, sin duplicados).
+    """
+    data = data.take(np.argsort(data["open_time"], kind="stable"))
+    if len(data):
+        # ante duplicados gana la última ocurrencia
+        open_time = data["open_time"]
+        data = data.take(np.append(open_time[1:] != open_time[:-1], True))
+
+    path = _partition_dir(symbol, timeframe)
+
+    with _partition_lock(symbol, timeframe):
+        path.mkdir(parents=True, exist_ok=True)
+        for c, dt in COLUMN_DTYPES.items():
+            tmp = path / f"{c}.bin.tmp"
+            np.ascontiguousarray(data[c], dtype=dt).tofile(tmp)
+            os.replace(tmp, path / f"{c}.bin")
+
+    return len(data)
+
+
+# ============================
+# Sync incremental con Binance
+# ============================
+def fetch_klines(client, symbol: str, timeframe: str, limit: int, **request_kwargs) -> OHLCV:
+    """
+    Descarga las últimas `limit` velas paginando hacia atrás
+    (Binance limita cada request a MAX_KLINES_PER_REQUEST).
+    """
+    limit = int(limit)
+    pages = []
+    remaining = limit
+    end_time = None
+
+    while remaining > 0:
+        params = {"limit": min(MAX_KLINES_PER_REQUEST, remaining)}
+        if end_time is not None:
+            params["endTime"] = end_time
+
+        page = decode_klines(
+            client.get_klines(symbol=symbol, interval=timeframe, **params, **request_kwargs)
+        )
+        if len(page) == 0:
+            break
+
+        pages.append(page)
+        remaining -= len(page)
+        end_time = int(page["open_time"][0]) - 1
+
+        # no hay más historia en Binance
+        if len(page) < params["limit"]:
+            break
+
+    out = OHLCV.empty()
+    for page in reversed(pages):
+        out = out.concat(page)
+    return out.tail(limit)
+
+
+def sync_klines(client, symbol: str, timeframe: str, limit: int, **request_kwargs) -> OHLCV:
+    """
+    Devuelve las últimas `limit` velas usando el store como fuente principal:
+    - Lee del disco lo ya descargado
+    - Pide a Binance SOLO las velas posteriores al último close_time guardado
+    - Persiste las velas cerradas nuevas (append)
+    La vela en curso se devuelve pero nunca se guarda.
+    """
+    limit = int(limit)
+    step = timeframe_ms(timeframe)
+
+    # timeframe desconocido para el store -> descarga directa
+    if step is None:
+        return fetch_klines(client, symbol, timeframe, limit, **request_kwargs)
+
+    stored = read_klines(symbol, timeframe, limit)
+    n = len(stored)
+    now = now_ms()
+
+    if n:
+        last_close = int(stored["close_time"][-1])
+        missing = max(0, (now - last_close) // step) + 1
+    else:
+        last_close = None
+        missing = None
+
+    incremental = last_close is not None and missing <= MAX_KLINES_PER_REQUEST and n + missing >= limit
+
+    if incremental:
+        # ✅ solo lo nuevo
+        fresh = decode_klines(
+            client.get_klines(
+                symbol=symbol,
+                interval=timeframe,
+                startTime=last_close + 1,
+                limit=min(MAX_KLINES_PER_REQUEST, int(missing) + 1),
+                **request_kwargs,
+            )
+        )
+    else:
+        # store vacío, desactualizado o con menos historia de la pedida
+        fresh = fetch_klines(client, symbol, timeframe, limit, **request_kwargs)
+
+    closed = fresh.take(fresh["close_time"] < now)
+
+    try:
+        if incremental:
+            append_klines(symbol, timeframe, closed)
+        elif len(closed):
+            previous = read_klines(symbol, timeframe)
+            contiguous = (
+                len(previous) > 0
+                and int(closed["open_time"][0]) <= int(previous["close_time"][-1]) + 1
+            )
+            # si queda un hueco, la partición se reinicia con lo descargado
+            write_klines(symbol, timeframe, previous.concat(closed) if contiguous else closed)
+    except OSError as e:
+        logger.warning(f"[KLINE STORE] write failed {symbol} {timeframe}: {e}")
+
+    if not incremental:
+        return fresh.tail(limit)
+
+    fresh = fresh.take(fresh["open_time"] > int(stored["open_time"][-1]))
+    return stored.concat(fresh).tail(limit)
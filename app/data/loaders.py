@@ -1,7 +1,12 @@
 from binance.client import Client
 import pandas as pd
 
+from app.data.backfill import ensure_history, ensure_range
 from app.data.cache import get_cached, set_cached
+from app.data.exchange_client import get_shared_client
+from app.data.kline_store import read_klines, sync_klines
+from app.data.stream import read_stream
+from app.data.timeframes import now_ms, timeframe_ms
 
 INTERVAL_MAP = {
     "1m": Client.KLINE_INTERVAL_1MINUTE,
@@ -13,6 +18,13 @@ INTERVAL_MAP = {
 }
 
 def load_market_data(symbol: str, timeframe: str, limit: int = 200) -> pd.DataFrame:
+    # 0️⃣ STREAM EN MEMORIA (si está activo)
+    data = read_stream(symbol, timeframe, limit)
+    if data is not None:
+        df = data.to_frame()
+        df["open_time"] = pd.to_datetime(df["open_time"], unit="ms")
+        return df
+
     cache_key = f"{symbol}:{timeframe}:{limit}"
 
     # 1️⃣ CACHE
@@ -28,44 +40,107 @@ def load_market_data(symbol: str, timeframe: str, limit: int = 200) -> pd.DataFr
         if timeframe not in INTERVAL_MAP:
             return pd.DataFrame()
 
-        client = Client(api_key=None, api_secret=None)
+        client = get_shared_client()
 
-        klines = client.get_klines(
-            symbol=symbol,
-            interval=INTERVAL_MAP[timeframe],
-            limit=limit,
-        )
+        # Store local: solo se descargan las velas nuevas
+        data = sync_klines(client, symbol, INTERVAL_MAP[timeframe], limit)
 
-        if not klines:
+        if len(data) == 0:
             return pd.DataFrame()
 
-        df = pd.DataFrame(
-            klines,
-            columns=[
-                "open_time",
-                "open",
-                "high",
-                "low",
-                "close",
-                "volume",
-                "close_time",
-                "quote_asset_volume",
-                "number_of_trades",
-                "taker_buy_base",
-                "taker_buy_quote",
-                "ignore",
-            ],
-        )
-
-        numeric_cols = ["open", "high", "low", "close", "volume"]
-        df[numeric_cols] = df[numeric_cols].astype(float)
+        df = data.to_frame()
         df["open_time"] = pd.to_datetime(df["open_time"], unit="ms")
 
-        df = df.sort_values("open_time").reset_index(drop=True)
+        if not df["open_time"].is_monotonic_increasing:
+            df = df.sort_values("open_time").reset_index(drop=True)
 
-        set_cached(cache_key, df)
+        # expira al cierre de la vela en curso del timeframe
+        set_cached(cache_key, df, timeframe=timeframe)
         return df
 
     except Exception:
         # 3️⃣ FALLBACK FINAL SEGURO
         return pd.DataFrame()
+
+
+# ============================
+# Historia larga (backtest / walk-forward / training)
+# ============================
+DEFAULT_HISTORY_LIMIT = 5000
+
+
+def load_binance_klines(symbol: str, timeframe: str, limit: int = 1000) -> pd.DataFrame:
+    """
+    Últimas `limit` velas, sin tope de 1000 por request:
+    la historia que falta en el store se baja en paralelo (backfill reanudable)
+    y luego solo se sincroniza la cola.
+    """
+    if timeframe not in INTERVAL_MAP:
+        return pd.DataFrame()
+
+    limit = int(limit)
+    client = get_shared_client()
+
+    # Binance puede tener menos historia (símbolo listado hace poco)
+    stored = ensure_history(client, symbol, timeframe, limit)
+    if 0 < stored < limit:
+        limit = stored + 1
+
+    data = sync_klines(client, symbol, timeframe, limit)
+    if len(data) == 0:
+        return pd.DataFrame()
+
+    df = data.to_frame()
+    df["open_time"] = pd.to_datetime(df["open_time"], unit="ms")
+    return df
+
+
+def _load_binance_range(symbol: str, timeframe: str, start_ms: int, end_ms: int) -> pd.DataFrame:
+    if timeframe not in INTERVAL_MAP:
+        return pd.DataFrame()
+
+    ensure_range(get_shared_client(), symbol, timeframe, start_ms, end_ms, tail_gap=0)
+
+    data = read_klines(symbol, timeframe)
+    data = data.take((data["open_time"] >= start_ms) & (data["open_time"] < end_ms))
+    if len(data) == 0:
+        return pd.DataFrame()
+
+    df = data.to_frame()
+    df["open_time"] = pd.to_datetime(df["open_time"], unit="ms")
+    return df
+
+
+def load_binance_history(
+    symbol: str,
+    timeframe: str,
+    start: str | None = None,
+    end: str | None = None,
+    limit: int = DEFAULT_HISTORY_LIMIT,
+) -> pd.DataFrame:
+    """
+    Historia completa para backtests.
+    - start/end: fechas (ej. "2021-01-01"); sin start -> últimas `limit` velas
+    """
+    if start is None:
+        df = load_binance_klines(symbol, timeframe, limit)
+    else:
+        step = timeframe_ms(timeframe)
+        if step is None:
+            return pd.DataFrame()
+
+        start_ms = int(pd.Timestamp(start, tz="UTC").timestamp() * 1000)
+        end_ms = now_ms() if end is None else int(pd.Timestamp(end, tz="UTC").timestamp() * 1000)
+
+        if end_ms < now_ms():
+            # rango cerrado: solo [start, end), sin sincronizar hasta hoy
+            df = _load_binance_range(symbol, timeframe, start_ms, end_ms)
+        else:
+            df = load_binance_klines(symbol, timeframe, (now_ms() - start_ms) // step + 1)
+
+    if df.empty or start is None:
+        return df
+
+    start_ts = pd.Timestamp(start_ms, unit="ms")
+    end_ts = pd.Timestamp(end_ms, unit="ms")
+    return df[(df["open_time"] >= start_ts) & (df["open_time"] < end_ts)].reset_index(drop=True)
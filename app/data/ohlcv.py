@@ -0,0 +1,120 @@
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+# ============================
+# Contenedor OHLCV compacto (struct-of-arrays)
+# ============================
+# Dos bloques contiguos:
+#   prices (5, n) float64 -> open, high, low, close, volume
+#   times  (2, n) int64   -> open_time, close_time (ms)
+# Cada columna es una vista (sin copia) sobre su bloque.
+PRICE_COLUMNS = ("open", "high", "low", "close", "volume")
+TIME_COLUMNS = ("open_time", "close_time")
+COLUMNS = ("open_time",) + PRICE_COLUMNS + ("close_time",)
+
+# posición de cada columna dentro de una kline cruda de Binance
+_RAW_PRICE_INDEX = (1, 2, 3, 4, 5)
+_RAW_TIME_INDEX = (0, 6)
+
+
+class OHLCV:
+    __slots__ = ("prices", "times")
+
+    def __init__(self, prices: np.ndarray, times: np.ndarray):
+        self.prices = prices
+        self.times = times
+
+    # ----------------------------
+    # Constructores
+    # ----------------------------
+    @classmethod
+    def empty(cls, n: int = 0) -> "OHLCV":
+        return cls(
+            np.empty((len(PRICE_COLUMNS), n), dtype=np.float64),
+            np.empty((len(TIME_COLUMNS), n), dtype=np.int64),
+        )
+
+    @classmethod
+    def from_columns(cls, cols: Dict[str, np.ndarray]) -> "OHLCV":
+        n = len(cols["open_time"])
+        out = cls.empty(n)
+        for i, c in enumerate(PRICE_COLUMNS):
+            out.prices[i] = cols[c]
+        for i, c in enumerate(TIME_COLUMNS):
+            out.times[i] = cols[c]
+        return out
+
+    # ----------------------------
+    # Acceso
+    # ----------------------------
+    def __len__(self) -> int:
+        return int(self.times.shape[1])
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        if name in TIME_COLUMNS:
+            return self.times[TIME_COLUMNS.index(name)]
+        return self.prices[PRICE_COLUMNS.index(name)]
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.prices.nbytes + self.times.nbytes)
+
+    def tail(self, limit: int | None) -> "OHLCV":
+        if limit is None or limit <= 0 or limit >= len(self):
+            return self
+        return OHLCV(self.prices[:, -int(limit):], self.times[:, -int(limit):])
+
+    def take(self, mask_or_index: np.ndarray) -> "OHLCV":
+        return OHLCV(self.prices[:, mask_or_index], self.times[:, mask_or_index])
+
+    def concat(self, other: "OHLCV") -> "OHLCV":
+        if len(other) == 0:
+            return self
+        if len(self) == 0:
+            return other
+        return OHLCV(
+            np.concatenate([self.prices, other.prices], axis=1),
+            np.concatenate([self.times, other.times], axis=1),
+        )
+
+    # ----------------------------
+    # Conversión (solo bajo demanda)
+    # ----------------------------
+    def to_frame(self, datetimes: bool = False) -> pd.DataFrame:
+        """
+        DataFrame estándar: open_time, open, high, low, close, volume, close_time.
+        Las columnas de precio comparten memoria con el bloque float64.
+        datetimes=True convierte open_time/close_time a datetime64.
+        """
+        df = pd.DataFrame(self.prices.T, columns=list(PRICE_COLUMNS), copy=False)
+
+        open_time = self.times[0]
+        close_time = self.times[1]
+        if datetimes:
+            open_time = pd.to_datetime(open_time, unit="ms")
+            close_time = pd.to_datetime(close_time, unit="ms")
+
+        df.insert(0, "open_time", open_time)
+        df["close_time"] = close_time
+        return df
+
+
+def decode_klines(klines) -> OHLCV:
+    """
+    Parsea klines crudas de Binance directo a los bloques preasignados.
+    Solo se leen las 7 columnas útiles; el resto de la kline se ignora.
+    """
+    if not klines:
+        return OHLCV.empty()
+
+    raw_cols = list(zip(*klines))
+    out = OHLCV.empty(len(klines))
+
+    for i, j in enumerate(_RAW_PRICE_INDEX):
+        out.prices[i] = raw_cols[j]
+    for i, j in enumerate(_RAW_TIME_INDEX):
+        out.times[i] = raw_cols[j]
+
+    return out
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+
+from app.data.ohlcv import OHLCV
+from app.data.timeframes import TIMEFRAME_MS, TIMEFRAME_OFFSET_MS
+
+# ============================
+# Resampling local de timeframes
+# ============================
+# Construye velas 4h / 1d (o cualquier múltiplo) desde una serie más fina:
+#   open   = open de la primera vela del bucket
+#   high   = máximo de highs
+#   low    = mínimo de lows
+#   close  = close de la última vela del bucket
+#   volume = suma de volúmenes
+# Velas parciales:
+#   - el PRIMER bucket se descarta si está incompleto (historia cortada)
+#   - el ÚLTIMO bucket incompleto se conserva: es la vela en curso,
+#     igual que la que devuelve Binance
+
+
+def can_resample(source_tf: str, target_tf: str) -> bool:
+    src = TIMEFRAME_MS.get(source_tf)
+    dst = TIMEFRAME_MS.get(target_tf)
+    if src is None or dst is None or dst < src or dst % src != 0:
+        return False
+    return TIMEFRAME_OFFSET_MS.get(target_tf, 0) % src == 0
+
+
+def source_limit(source_tf: str, target_tf: str, target_limit: int) -> int:
+    """
+    Velas del timeframe fuente necesarias para `target_limit` velas destino
+    (+1 bucket para cubrir el primero incompleto).
+    """
+    ratio = TIMEFRAME_MS[target_tf] // TIMEFRAME_MS[source_tf]
+    return (int(target_limit) + 1) * ratio
+
+
+def resample_ohlcv(data: OHLCV, source_tf: str, target_tf: str) -> OHLCV:
+    """
+    Agrega un OHLCV de `source_tf` a `target_tf` (vectorizado, sin loops).
+    """
+    if not can_resample(source_tf, target_tf):
+        raise ValueError(f"Cannot resample {source_tf} -> {target_tf}")
+
+    n = len(data)
+    if n == 0:
+        return OHLCV.empty()
+
+    step = TIMEFRAME_MS[target_tf]
+    offset = TIMEFRAME_OFFSET_MS.get(target_tf, 0)
+    ratio = step // TIMEFRAME_MS[source_tf]
+
+    open_time = data["open_time"]
+    bucket = ((open_time - offset) // step) * step + offset
+
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], n] - 1
+    counts = ends - starts + 1
+
+    out = OHLCV.empty(len(starts))
+    out.prices[0] = data["open"][starts]
+    out.prices[1] = np.maximum.reduceat(data["high"], starts)
+    out.prices[2] = np.minimum.reduceat(data["low"], starts)
+    out.prices[3] = data["close"][ends]
+    out.prices[4] = np.add.reduceat(data["volume"], starts)
+    out.times[0] = bucket[starts]
+    out.times[1] = bucket[starts] + step - 1
+
+    # primer bucket sin todas sus velas -> OHLC no sería exacto
+    if counts[0] < ratio and len(starts) > 1:
+        out = out.take(slice(1, None))
+    elif counts[0] < ratio and open_time[0] != bucket[0]:
+        out = OHLCV.empty()
+
+    return out
+
+
+def resample_frame(df: pd.DataFrame, source_tf: str, target_tf: str) -> pd.DataFrame:
+    """
+    Igual que resample_ohlcv pero sobre el DataFrame de los loaders.
+    Respeta el tipo de open_time / close_time de entrada (ms o datetime).
+    """
+    if df is None or df.empty:
+        return pd.DataFrame()
+
+    is_datetime = pd.api.types.is_datetime64_any_dtype(df["open_time"])
+
+    def _ms(col: pd.Series) -> np.ndarray:
+        if pd.api.types.is_datetime64_any_dtype(col):
+            return col.to_numpy(dtype="datetime64[ms]").astype(np.int64)
+        return col.to_numpy(dtype=np.int64)
+
+    close_time = df["close_time"] if "close_time" in df.columns else df["open_time"]
+
+    data = OHLCV.from_columns(
+        {
+            "open_time": _ms(df["open_time"]),
+            "close_time": _ms(close_time),
+            "open": df["open"].to_numpy(dtype=np.float64),
+            "high": df["high"].to_numpy(dtype=np.float64),
+            "low": df["low"].to_numpy(dtype=np.float64),
+            "close": df["close"].to_numpy(dtype=np.float64),
+            "volume": df["volume"].to_numpy(dtype=np.float64),
+        }
+    )
+
+    return resample_ohlcv(data, source_tf, target_tf).to_frame(datetimes=is_datetime)
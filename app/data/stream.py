@@ -0,0 +1,366 @@
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from app.core.logger import get_logger
+from app.data.ohlcv import OHLCV
+from app.data.timeframes import now_ms, timeframe_ms
+
+logger = get_logger(__name__)
+
+# ============================
+# Ingesta streaming de velas (ring buffers en memoria)
+# ============================
+# Cada (symbol, timeframe) tiene un ring buffer numpy de tamaño FIJO:
+#   7 columnas x 8 bytes x capacity
+#   300 símbolos x 3 timeframes x 500 velas ≈ 25 MB (constante)
+# Los loaders leen de aquí antes de ir a REST.
+DEFAULT_CAPACITY = 500
+
+# si un buffer no recibe mensajes en este tiempo, se considera caído
+MAX_STALENESS_MS = 90_000
+
+# mínimo entre reseeds del mismo buffer (la historia REST también puede tener huecos)
+RESEED_MIN_INTERVAL_MS = 30_000
+
+
+class KlineRingBuffer:
+    """
+    Últimas `capacity` velas de un símbolo/timeframe.
+    La vela en curso se sobrescribe en su lugar; una vela nueva
+    reemplaza a la más vieja cuando el buffer está lleno.
+
+    step (ms del timeframe): si llega una vela que saltea otras
+    (reconexión, mensaje perdido) el buffer queda `stale` hasta un
+    reset() con historia continua; read() no lo sirve mientras tanto.
+    """
+
+    __slots__ = ("capacity", "step", "prices", "times", "start", "size", "updated_at", "gaps", "stale", "_lock")
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, step: int | None = None):
+        self.capacity = int(capacity)
+        self.step = int(step) if step else None
+        self.prices = np.zeros((5, self.capacity), dtype=np.float64)
+        self.times = np.zeros((2, self.capacity), dtype=np.int64)
+        self.start = 0
+        self.size = 0
+        self.updated_at = 0
+        self.gaps = 0
+        self.stale = False
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.prices.nbytes + self.times.nbytes)
+
+    def _last_pos(self) -> int:
+        return (self.start + self.size - 1) % self.capacity
+
+    def update(self, open_time: int, close_time: int, o: float, h: float, l: float, c: float, v: float) -> None:
+        with self._lock:
+            if self.size:
+                last = self._last_pos()
+                last_open = int(self.times[0, last])
+
+                if open_time < last_open:
+                    # mensaje viejo / fuera de orden
+                    return
+
+                if self.step and open_time > last_open + self.step:
+                    # faltan velas entre la última y esta: la serie ya no es continua
+                    self.gaps += 1
+                    self.stale = True
+
+                if open_time == last_open:
+                    pos = last
+                elif self.size < self.capacity:
+                    pos = (self.start + self.size) % self.capacity
+                    self.size += 1
+                else:
+                    pos = self.start
+                    self.start = (self.start + 1) % self.capacity
+            else:
+                pos = self.start
+                self.size = 1
+
+            self.prices[:, pos] = (o, h, l, c, v)
+            self.times[:, pos] = (open_time, close_time)
+            self.updated_at = now_ms()
+
+    def extend(self, data: OHLCV) -> None:
+        """
+        Carga historia (ej. desde el kline store) en orden cronológico.
+        """
+        for i in range(max(0, len(data) - self.capacity), len(data)):
+            self.update(
+                int(data.times[0, i]),
+                int(data.times[1, i]),
+                *(float(x) for x in data.prices[:, i]),
+            )
+
+    def reset(self, data: OHLCV) -> None:
+        """
+        Reemplaza el contenido por `data` (reseed tras un hueco).
+        Queda vivo solo si `data` no tiene huecos.
+        """
+        with self._lock:
+            self.start = 0
+            self.size = 0
+            self.stale = True
+        before = self.gaps
+        self.extend(data)
+        with self._lock:
+            self.stale = self.gaps != before
+
+    def snapshot(self, limit: int | None = None) -> OHLCV:
+        """
+        Copia cronológica de las últimas `limit` velas.
+        """
+        with self._lock:
+            n = self.size if not limit or limit <= 0 else min(int(limit), self.size)
+            idx = (self.start + np.arange(self.size - n, self.size)) % self.capacity
+            return OHLCV(self.prices[:, idx], self.times[:, idx])
+
+
+def parse_kline_message(msg: dict) -> Tuple[str, str, tuple] | None:
+    """
+    Mensaje websocket de Binance (simple o combinado) -> (symbol, tf, fila).
+    """
+    if not isinstance(msg, dict):
+        return None
+
+    data = msg.get("data", msg)
+    if not isinstance(data, dict) or data.get("e") != "kline":
+        return None
+
+    k = data.get("k") or {}
+    try:
+        row = (
+            int(k["t"]),
+            int(k["T"]),
+            float(k["o"]),
+            float(k["h"]),
+            float(k["l"]),
+            float(k["c"]),
+            float(k["v"]),
+        )
+        return str(k.get("s") or data["s"]).upper(), str(k["i"]), row
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class KlineStreamService:
+    """
+    Servicio de larga vida que mantiene los ring buffers al día
+    consumiendo un stream de klines (websocket Binance o replay local).
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, seed_client=None):
+        self.capacity = int(capacity)
+        self.buffers: Dict[Tuple[str, str], KlineRingBuffer] = {}
+        self.messages = 0
+        self.dropped = 0
+        self.reseeds = 0
+        self.reseed_failures = 0
+        # cliente REST para recargar buffers con huecos (None = quedan stale)
+        self._seed_client = seed_client
+        self._reseeding: set = set()
+        self._last_reseed: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._twm = None
+
+    # ----------------------------
+    # Buffers
+    # ----------------------------
+    def buffer(self, symbol: str, timeframe: str) -> KlineRingBuffer:
+        key = (str(symbol).upper(), str(timeframe))
+        buf = self.buffers.get(key)
+        if buf is None:
+            with self._lock:
+                buf = self.buffers.get(key)
+                if buf is None:
+                    buf = KlineRingBuffer(self.capacity, step=timeframe_ms(timeframe))
+                    self.buffers[key] = buf
+        return buf
+
+    def seed(self, symbol: str, timeframe: str, data: OHLCV) -> None:
+        self.buffer(symbol, timeframe).extend(data)
+
+    def reseed(self, symbol: str, timeframe: str) -> bool:
+        """
+        Recarga un buffer desde kline store / REST (tras un hueco).
+        """
+        from app.data.kline_store import sync_klines
+
+        key = (str(symbol).upper(), str(timeframe))
+        try:
+            data = sync_klines(self._seed_client, key[0], key[1], self.capacity)
+            self.buffer(*key).reset(data)
+            self.reseeds += 1
+            return True
+        except Exception as e:
+            self.reseed_failures += 1
+            logger.warning(f"[STREAM] reseed failed {key[0]} {key[1]}: {e}")
+            return False
+        finally:
+            with self._lock:
+                self._reseeding.discard(key)
+
+    def _on_gap(self, symbol: str, timeframe: str) -> None:
+        if self._seed_client is None:
+            return
+        key = (symbol, timeframe)
+        with self._lock:
+            if key in self._reseeding or now_ms() - self._last_reseed.get(key, 0) < RESEED_MIN_INTERVAL_MS:
+                return
+            self._reseeding.add(key)
+            self._last_reseed[key] = now_ms()
+        # fuera del callback del websocket
+        threading.Thread(target=self.reseed, args=key, name="kline-reseed", daemon=True).start()
+
+    def handle_message(self, msg: dict) -> None:
+        parsed = parse_kline_message(msg)
+        if parsed is None:
+            self.dropped += 1
+            return
+
+        symbol, timeframe, row = parsed
+        buf = self.buffer(symbol, timeframe)
+        buf.update(*row)
+        self.messages += 1
+
+        if buf.stale:
+            self._on_gap(symbol, timeframe)
+
+    def read(self, symbol: str, timeframe: str, limit: int) -> OHLCV | None:
+        """
+        Últimas `limit` velas si el buffer las tiene y está vivo.
+        None -> el caller debe ir a REST.
+        """
+        buf = self.buffers.get((str(symbol).upper(), str(timeframe)))
+        if buf is None or buf.stale or buf.size < int(limit):
+            return None
+        if now_ms() - buf.updated_at > MAX_STALENESS_MS:
+            return None
+        return buf.snapshot(limit)
+
+    # ----------------------------
+    # Fuentes
+    # ----------------------------
+    def run(self, source: Iterable[dict]) -> None:
+        for msg in source:
+            if self._stop.is_set():
+                break
+            self.handle_message(msg)
+
+    def start_replay(self, source: Iterable[dict]) -> None:
+        """
+        Consume una fuente local (lista / generador de mensajes) en background.
+        Útil para tests y para reproducir sesiones grabadas.
+        """
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, args=(source,), name="kline-replay", daemon=True)
+        self._thread.start()
+
+    def start_websocket(self, symbols: List[str], timeframes: List[str]) -> None:
+        """
+        Suscribe los streams <symbol>@kline_<tf> de Binance.
+        """
+        from binance import ThreadedWebsocketManager
+
+        streams = [f"{s.lower()}@kline_{tf}" for s in symbols for tf in timeframes]
+
+        self._twm = ThreadedWebsocketManager()
+        self._twm.start()
+        self._twm.start_multiplex_socket(callback=self.handle_message, streams=streams)
+        logger.info(f"[STREAM] subscribed {len(streams)} kline streams")
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._twm is not None:
+            self._twm.stop()
+            self._twm = None
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "buffers": len(self.buffers),
+            "capacity": self.capacity,
+            "bytes": sum(b.nbytes for b in self.buffers.values()),
+            "messages": self.messages,
+            "dropped": self.dropped,
+            "gaps": sum(b.gaps for b in self.buffers.values()),
+            "stale": sum(1 for b in self.buffers.values() if b.stale),
+            "reseeds": self.reseeds,
+            "reseed_failures": self.reseed_failures,
+        }
+
+
+# ============================
+# Servicio global
+# ============================
+_SERVICE: KlineStreamService | None = None
+
+
+def get_stream_service() -> KlineStreamService | None:
+    return _SERVICE
+
+
+def start_stream_service(
+    symbols: List[str],
+    timeframes: List[str],
+    capacity: int = DEFAULT_CAPACITY,
+    source: Iterable[dict] | None = None,
+    seed_client=None,
+) -> KlineStreamService:
+    """
+    Arranca el servicio global.
+    - source=None: websocket de Binance; si no, replay de `source`
+    - seed_client: si se pasa, precarga cada buffer vía kline store/REST
+    """
+    global _SERVICE
+
+    if _SERVICE is not None:
+        _SERVICE.stop()
+
+    service = KlineStreamService(capacity=capacity, seed_client=seed_client)
+
+    if seed_client is not None:
+        from app.data.kline_store import sync_klines
+
+        for symbol in symbols:
+            for tf in timeframes:
+                try:
+                    service.seed(symbol, tf, sync_klines(seed_client, symbol, tf, capacity))
+                except Exception as e:
+                    logger.warning(f"[STREAM] seed failed {symbol} {tf}: {e}")
+
+    if source is None:
+        service.start_websocket(symbols, timeframes)
+    else:
+        service.start_replay(source)
+
+    _SERVICE = service
+    return service
+
+
+def stop_stream_service() -> None:
+    global _SERVICE
+    if _SERVICE is not None:
+        _SERVICE.stop()
+        _SERVICE = None
+
+
+def read_stream(symbol: str, timeframe: str, limit: int) -> OHLCV | None:
+    """
+    Atajo para loaders: velas desde memoria o None si no hay stream útil.
+    """
+    service = _SERVICE
+    if service is None:
+        return None
+    return service.read(symbol, timeframe, int(limit))
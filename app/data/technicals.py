@@ -1,22 +1,17 @@
 import pandas as pd
 
-def add_technicals(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-
-    df["return"] = df["close"].pct_change()
+from app.features.registry import compute_features
 
-    df["ema_20"] = df["close"].ewm(span=20).mean()
-    df["ema_50"] = df["close"].ewm(span=50).mean()
+# Variante legacy: EMAs con adjust=True y RSI sin relleno
+LEGACY_OVERRIDES = {
+    "ema_20": {"adjust": True},
+    "ema_50": {"adjust": True},
+    "rsi": {"fillna": None, "nan_on_zero_loss": False},
+}
 
-    delta = df["close"].diff()
-    gain = delta.clip(lower=0)
-    loss = -delta.clip(upper=0)
 
-    avg_gain = gain.rolling(14).mean()
-    avg_loss = loss.rolling(14).mean()
-
-    rs = avg_gain / avg_loss
-    df["rsi"] = 100 - (100 / (1 + rs))
+def add_technicals(df: pd.DataFrame) -> pd.DataFrame:
+    df = compute_features(df, ["return", "ema_20", "ema_50", "rsi"], overrides=LEGACY_OVERRIDES, reuse=False)
 
     df = df.dropna()
 
@@ -0,0 +1,55 @@
+import time
+
+# ============================
+# Duración de vela por timeframe (ms)
+# ============================
+TIMEFRAME_MS = {
+    "1m": 60_000,
+    "3m": 3 * 60_000,
+    "5m": 5 * 60_000,
+    "15m": 15 * 60_000,
+    "30m": 30 * 60_000,
+    "1h": 3_600_000,
+    "2h": 2 * 3_600_000,
+    "4h": 4 * 3_600_000,
+    "6h": 6 * 3_600_000,
+    "8h": 8 * 3_600_000,
+    "12h": 12 * 3_600_000,
+    "1d": 86_400_000,
+    "1w": 7 * 86_400_000,
+}
+
+# Binance abre las velas semanales el lunes 00:00 UTC.
+# El epoch (1970-01-01) fue jueves -> desfase de 4 días.
+TIMEFRAME_OFFSET_MS = {
+    "1w": 4 * 86_400_000,
+}
+
+
+def now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def timeframe_ms(timeframe: str) -> int | None:
+    """
+    Duración de una vela en ms. None si el timeframe no es soportado.
+    """
+    return TIMEFRAME_MS.get(str(timeframe or "").strip())
+
+
+def candle_open_time(ts_ms: int, timeframe: str) -> int:
+    """
+    open_time (ms) de la vela que contiene ts_ms.
+    """
+    step = TIMEFRAME_MS[timeframe]
+    offset = TIMEFRAME_OFFSET_MS.get(timeframe, 0)
+    return ((int(ts_ms) - offset) // step) * step + offset
+
+
+def next_candle_close(timeframe: str, ts_ms: int | None = None) -> int:
+    """
+    Instante (ms) en que cierra la vela en curso para el timeframe.
+    Coincide con el open_time de la siguiente vela.
+    """
+    ts = now_ms() if ts_ms is None else int(ts_ms)
+    return candle_open_time(ts, timeframe) + TIMEFRAME_MS[timeframe]
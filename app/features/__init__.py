@@ -1,17 +1,83 @@
-from app.features.technicals import add_technicals
-from app.features.trends import add_returns, add_target
-from app.features.volatility import add_volatility_features
+import numpy as np
+import pandas as pd
 
+from app.features.compact import COMPACT_DTYPE
+from app.features.registry import BASE_COLUMNS, compute_arrays
+from app.features.technicals import TECHNICAL_COLUMNS
 
-def build_features(df):
+
+def _is_valid(df: pd.DataFrame, col: str) -> bool:
+    """
+    Columna ya presente y utilizable: numérica/bool y con valor en la última fila.
+    """
+    if col not in df.columns:
+        return False
+    s = df[col]
+    if s.dtype == bool:
+        return True
+    if not pd.api.types.is_numeric_dtype(s):
+        return False
+    return len(s) == 0 or not pd.isna(s.iloc[-1])
+
+
+def build_features(df, horizon: int = 1, compact: bool = False):
     """
     Ensures the dataframe has all mandatory features required by the system.
+
+    Un solo bloque float (y uno bool) por llamada: cada feature se escribe
+    una vez, sin copias intermedias del DataFrame. Columnas ya válidas en
+    df no se recalculan. Incluye `target` (dirección del close a `horizon`).
+    compact=True: el bloque de indicadores se guarda en float32 (backtests
+    largos); OHLCV queda en float64.
     """
+    if not isinstance(df, pd.DataFrame):
+        raise ValueError("build_features expects a DataFrame")
+
+    missing = [c for c in BASE_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing required features: {missing}")
+
+    todo = [c for c in TECHNICAL_COLUMNS if not _is_valid(df, c)]
+
+    inputs = {c: df[c].to_numpy(dtype=np.float64) for c in BASE_COLUMNS}
+    for c in TECHNICAL_COLUMNS:
+        if c not in todo:
+            inputs[c] = df[c].to_numpy()
+
+    values = compute_arrays(inputs, todo)
+
+    float_cols = [c for c in todo if values[c].dtype != bool]
+    bool_cols = [c for c in todo if values[c].dtype == bool]
+
+    # bloques (F, n) contiguos: pandas los guarda tal cual (sin consolidar)
+    n = len(df)
+    float_block = np.empty((len(float_cols), n), dtype=COMPACT_DTYPE if compact else np.float64)
+    for j, c in enumerate(float_cols):
+        np.copyto(float_block[j], values[c])
+        float_block[j][np.isinf(float_block[j])] = np.nan
+
+    bool_block = np.empty((len(bool_cols), n), dtype=bool)
+    for j, c in enumerate(bool_cols):
+        bool_block[j] = values[c]
+
+    # Target: 1 si el close sube en `horizon` velas
+    close = inputs["close"]
+    target = np.zeros(n, dtype=np.int64)
+    if n > horizon:
+        target[:-horizon] = close[horizon:] > close[:-horizon]
+
+    # mismo orden de columnas que la cadena anterior (add_technicals -> add_target)
+    order = list(df.columns) + [c for c in todo + ["target"] if c not in df.columns]
+
+    parts = [df.drop(columns=[c for c in todo + ["target"] if c in df.columns])]
+    if float_cols:
+        parts.append(pd.DataFrame(float_block.T, columns=float_cols, index=df.index, copy=False))
+    if bool_cols:
+        parts.append(pd.DataFrame(bool_block.T, columns=bool_cols, index=df.index, copy=False))
+    parts.append(pd.DataFrame({"target": target}, index=df.index, copy=False))
 
-    df = add_technicals(df)
-    df = add_returns(df)
-    df = add_target(df)
-    df = add_volatility_features(df)
+    # seleccionar columnas no copia los bloques
+    df = pd.concat(parts, axis=1)[order]
 
     # HARD VALIDATION (no silent failure)
     required = ["return", "ema_20", "ema_50", "rsi"]
@@ -0,0 +1,222 @@
+import copy
+import os
+import threading
+from typing import Hashable
+
+import numpy as np
+import pandas as pd
+
+from app.data.cache import BoundedCache
+from app.data.timeframes import now_ms, timeframe_ms
+from app.features.compact import CompactFrame
+from app.features.incremental import IncrementalTechnicals
+from app.features.technicals import add_technicals
+
+# ============================
+# Cache de features por serie
+# ============================
+# Clave: (symbol, timeframe, FEATURE_SET_VERSION); cada entrada recuerda
+# el close_time de su última vela CERRADA.
+#   - misma última vela cerrada   -> hit (no se recalcula nada)
+#   - llegaron velas nuevas       -> update incremental O(1) por vela
+#   - historia distinta / vieja   -> recálculo completo
+# La vela en curso nunca se guarda: se calcula sobre una copia del estado.
+# Subir FEATURE_SET_VERSION cuando cambie la definición de alguna feature.
+FEATURE_SET_VERSION = "1"
+
+FEATURE_CACHE_MAX_BYTES = int(os.getenv("FEATURE_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
+
+# filas máximas por entrada (la serie crece con cada update incremental)
+FEATURE_CACHE_MAX_ROWS = 1500
+
+# una entrada sin uso se descarta tras este número de velas
+FEATURE_CACHE_TTL_CANDLES = 3
+
+# ✅ indicadores en float32 + flags en bitset (~mitad de memoria por entrada)
+FEATURE_CACHE_COMPACT = os.getenv("FEATURE_CACHE_COMPACT", "0").lower() in ("1", "true", "yes")
+
+# locks por clave repartidos en un número fijo de stripes (no crece con los símbolos)
+FEATURE_CACHE_LOCK_STRIPES = 64
+
+
+def _ms(col: pd.Series) -> np.ndarray:
+    if pd.api.types.is_datetime64_any_dtype(col):
+        return col.to_numpy(dtype="datetime64[ms]").astype(np.int64)
+    return col.to_numpy(dtype=np.int64)
+
+
+def _time_dtypes(df: pd.DataFrame) -> tuple:
+    return (df["open_time"].dtype, df["close_time"].dtype)
+
+
+def _time_columns(frame) -> tuple:
+    if isinstance(frame, CompactFrame):
+        return frame.column("open_time"), frame.column("close_time")
+    return frame["open_time"], frame["close_time"]
+
+
+class FeatureEntry:
+    __slots__ = ("frame", "engine", "first_open", "last_close", "time_dtypes", "nbytes")
+
+    def __init__(self, frame: pd.DataFrame | CompactFrame, engine: IncrementalTechnicals, compact: bool = False):
+        self.engine = engine
+
+        open_time, close_time = _time_columns(frame)
+        self.first_open = int(_ms(open_time)[0])
+        self.last_close = int(_ms(close_time)[-1])
+        self.time_dtypes = (open_time.dtype, close_time.dtype)
+
+        if compact and not isinstance(frame, CompactFrame):
+            frame = CompactFrame.from_frame(frame)
+
+        self.frame = frame
+        if isinstance(frame, CompactFrame):
+            self.nbytes = frame.nbytes
+        else:
+            self.nbytes = int(frame.memory_usage(index=True, deep=True).sum())
+
+    def rows(self, n: int) -> pd.DataFrame:
+        """
+        Últimas n filas como DataFrame.
+        """
+        if isinstance(self.frame, CompactFrame):
+            return self.frame.to_frame(start=-n)
+        return self.frame.iloc[-n:] if len(self.frame) > n else self.frame
+
+
+class FeatureCache:
+    def __init__(self, max_bytes: int = FEATURE_CACHE_MAX_BYTES, compact: bool = FEATURE_CACHE_COMPACT):
+        self._cache = BoundedCache(max_bytes)
+        self.compact = bool(compact)
+        self.incremental_updates = 0
+        self.full_computes = 0
+        self._locks = tuple(threading.Lock() for _ in range(FEATURE_CACHE_LOCK_STRIPES))
+
+    def _key_lock(self, key: Hashable) -> threading.Lock:
+        return self._locks[hash(key) % len(self._locks)]
+
+    def _store(self, key: Hashable, entry: FeatureEntry, timeframe: str) -> None:
+        step = timeframe_ms(timeframe) or 60_000
+        self._cache.set(key, entry, expires_at=now_ms() + FEATURE_CACHE_TTL_CANDLES * step)
+
+    def get_features(self, symbol: str, timeframe: str, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Equivalente a add_technicals(df) reutilizando lo ya calculado
+        para (symbol, timeframe). Las primeras filas pueden traer valores
+        ya "calentados" con historia previa cacheada (sin NaN de warmup).
+        """
+        if (
+            not isinstance(df, pd.DataFrame)
+            or df.empty
+            or "open_time" not in df.columns
+            or "close_time" not in df.columns
+        ):
+            return add_technicals(df)
+
+        close_time = _ms(df["close_time"])
+        n_closed = int(np.searchsorted(close_time, now_ms(), side="left"))
+
+        if n_closed == 0:
+            return add_technicals(df)
+
+        closed = df.iloc[:n_closed]
+        live = df.iloc[n_closed:]
+
+        key = (str(symbol).upper(), str(timeframe), FEATURE_SET_VERSION)
+        last_close = int(close_time[n_closed - 1])
+        first_open = int(_ms(df["open_time"])[0])
+
+        with self._key_lock(key):
+            entry = self._resolve(key, timeframe, closed, close_time, n_closed, first_open, last_close)
+
+        if entry is None:
+            # serie más vieja que la cacheada: se calcula aparte sin pisar la entrada
+            return add_technicals(df)
+
+        out = entry.rows(n_closed)
+
+        if len(live):
+            out = pd.concat([out, self._live_rows(entry.engine, live)], ignore_index=True)
+        else:
+            out = out.reset_index(drop=True)
+
+        return out
+
+    def _resolve(self, key, timeframe, closed, close_time, n_closed, first_open, last_close) -> FeatureEntry | None:
+        entry = self._cache.get(key)
+
+        if entry is not None and (entry.first_open > first_open or entry.time_dtypes != _time_dtypes(closed)):
+            # la entrada no cubre la historia pedida (o viene de otra fuente: ms vs datetime)
+            entry = None
+
+        if entry is not None and entry.last_close > last_close:
+            return None
+
+        if entry is not None and entry.last_close != last_close:
+            fresh = closed[close_time[:n_closed] > entry.last_close]
+            contiguous = len(fresh) and len(fresh) < n_closed and int(close_time[n_closed - len(fresh) - 1]) == entry.last_close
+
+            if contiguous:
+                # ✅ velas nuevas: O(1) por vela
+                entry = self._append(entry, fresh)
+                self._store(key, entry, timeframe)
+                self.incremental_updates += 1
+            else:
+                entry = None
+
+        if entry is None:
+            frame = add_technicals(closed)
+            entry = FeatureEntry(frame, IncrementalTechnicals.from_features(frame), self.compact)
+            self._store(key, entry, timeframe)
+            self.full_computes += 1
+
+        return entry
+
+    def _append(self, entry: FeatureEntry, fresh: pd.DataFrame) -> FeatureEntry:
+        # el engine publicado no se toca (otros hilos lo copian para la vela en curso):
+        # se avanza una copia y se publica con la entrada nueva
+        engine = copy.deepcopy(entry.engine)
+        rows = pd.concat([fresh, engine.update_frame(fresh)], axis=1)
+
+        if isinstance(entry.frame, CompactFrame):
+            # ✅ solo se empaquetan las filas nuevas
+            return FeatureEntry(entry.frame.append(rows, FEATURE_CACHE_MAX_ROWS), engine)
+
+        frame = pd.concat([entry.rows(len(entry.frame)), rows], ignore_index=True)
+
+        if len(frame) > FEATURE_CACHE_MAX_ROWS:
+            frame = frame.iloc[-FEATURE_CACHE_MAX_ROWS:].reset_index(drop=True)
+
+        return FeatureEntry(frame, engine, self.compact)
+
+    @staticmethod
+    def _live_rows(engine: IncrementalTechnicals, live: pd.DataFrame) -> pd.DataFrame:
+        # la vela en curso cambia: se calcula sobre una copia del estado
+        scratch = copy.deepcopy(engine)
+        return pd.concat([live.reset_index(drop=True), scratch.update_frame(live).reset_index(drop=True)], axis=1)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return {
+            **self._cache.stats(),
+            "incremental_updates": self.incremental_updates,
+            "full_computes": self.full_computes,
+            "version": FEATURE_SET_VERSION,
+            "compact": self.compact,
+        }
+
+
+# ============================
+# Cache global
+# ============================
+_FEATURE_CACHE = FeatureCache()
+
+
+def get_features(symbol: str, timeframe: str, df: pd.DataFrame) -> pd.DataFrame:
+    return _FEATURE_CACHE.get_features(symbol, timeframe, df)
+
+
+def get_feature_cache_stats() -> dict:
+    return _FEATURE_CACHE.stats()
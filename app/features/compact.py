@@ -0,0 +1,316 @@
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+from app.features.registry import BASE_COLUMNS
+
+# ============================
+# Almacenamiento compacto de features
+# ============================
+# - indicadores float64 -> float32 (mitad de bytes)
+# - flags bool          -> bitset (np.packbits, 1 bit por vela)
+# - OHLCV, tiempos y enteros se guardan TAL CUAL (entry/stop exactos)
+#
+# Tolerancia: float32 tiene ~7 dígitos significativos (error relativo
+# <= 2**-24 ~ 6e-8). Una decisión solo puede cambiar si un indicador queda
+# a menos de ese margen de su umbral (rsi 55, adx 18, ema20 vs ema50...).
+# check_decision_tolerance lo verifica sobre una serie real
+# (scripts/check_compact_tolerance.py, sale con código != 0 si falla).
+COMPACT_DTYPE = np.float32
+
+# error relativo máximo aceptado al volver de float32
+COMPACT_RTOL = 1e-6
+
+
+class CompactFrame:
+    """
+    DataFrame de features en formato compacto.
+    to_frame() lo reconstruye con el mismo orden de columnas.
+
+    Las columnas viven en buffers con capacidad libre al final: append()
+    escribe solo las filas nuevas y devuelve otro CompactFrame que comparte
+    los buffers (el original sigue viendo sus mismas filas). Recortar por
+    delante solo mueve `offset`.
+    """
+
+    __slots__ = (
+        "columns", "n", "offset", "exact", "ext_dtypes",
+        "float_fields", "floats", "flag_fields", "bits", "_fill",
+    )
+
+    def __init__(
+        self,
+        columns: List[str],
+        n: int,
+        exact: Dict[str, np.ndarray],
+        float_fields: List[str],
+        floats: np.ndarray,
+        flag_fields: List[str],
+        bits: np.ndarray,
+        offset: int = 0,
+        ext_dtypes: Dict[str, object] | None = None,
+        fill: list | None = None,
+    ):
+        self.columns = list(columns)
+        self.n = int(n)
+        self.offset = int(offset)
+        self.exact = exact
+        self.ext_dtypes = ext_dtypes or {}
+        self.float_fields = list(float_fields)
+        self.floats = floats
+        self.flag_fields = list(flag_fields)
+        self.bits = bits
+        # fila hasta donde están escritos los buffers (compartido entre frames)
+        self._fill = fill if fill is not None else [self.offset + self.n]
+
+    def __len__(self) -> int:
+        return self.n
+
+    @property
+    def capacity(self) -> int:
+        return self.floats.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        # memoria reservada (incluye la capacidad libre)
+        return int(
+            sum(a.nbytes for a in self.exact.values())
+            + self.floats.nbytes
+            + self.bits.nbytes
+        )
+
+    @staticmethod
+    def _allocate(exact_dtypes: Dict[str, np.dtype], floats: int, flags: int, capacity: int):
+        exact = {c: np.empty(capacity, dtype=dt) for c, dt in exact_dtypes.items()}
+        return (
+            exact,
+            np.empty((floats, capacity), dtype=COMPACT_DTYPE),
+            np.zeros((flags, (capacity + 7) // 8), dtype=np.uint8),
+        )
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, keep: Iterable[str] = BASE_COLUMNS, capacity: int | None = None) -> "CompactFrame":
+        """
+        keep: columnas float que NO se reducen (por defecto OHLCV).
+        capacity: filas reservadas (>= len(df)) para futuros append.
+        """
+        keep = set(keep)
+        float_fields = [
+            c for c in df.columns
+            if c not in keep and pd.api.types.is_float_dtype(df[c])
+        ]
+        flag_fields = [c for c in df.columns if df[c].dtype == bool]
+        exact_fields = [c for c in df.columns if c not in float_fields and c not in flag_fields]
+
+        # dtypes no numpy (ej. datetime con tz) se guardan como object y se restauran
+        ext_dtypes = {c: df[c].dtype for c in exact_fields if not isinstance(df[c].dtype, np.dtype)}
+        exact_dtypes = {c: (object if c in ext_dtypes else df[c].dtype) for c in exact_fields}
+
+        n = len(df)
+        exact, floats, bits = cls._allocate(exact_dtypes, len(float_fields), len(flag_fields), max(n, capacity or 0))
+
+        for c in exact_fields:
+            exact[c][:n] = df[c].to_numpy()
+
+        for j, c in enumerate(float_fields):
+            floats[j, :n] = df[c].to_numpy(dtype=np.float64)
+
+        if flag_fields:
+            flags = np.empty((len(flag_fields), n), dtype=bool)
+            for j, c in enumerate(flag_fields):
+                flags[j] = df[c].to_numpy(dtype=bool)
+            packed = np.packbits(flags, axis=1)
+            bits[:, :packed.shape[1]] = packed
+
+        return cls(list(df.columns), n, exact, float_fields, floats, flag_fields, bits, ext_dtypes=ext_dtypes)
+
+    def _flags(self, lo: int, hi: int) -> np.ndarray:
+        """
+        Flags de las filas de buffer [lo, hi) como bool (F, hi - lo).
+        """
+        first = lo // 8
+        raw = np.unpackbits(self.bits[:, first:(hi + 7) // 8], axis=1, count=hi - first * 8)
+        return raw[:, lo - first * 8:].astype(bool)
+
+    def column(self, name: str) -> pd.Series:
+        """
+        Columna exacta (OHLCV, tiempos...) sin reconstruir el resto.
+        """
+        values = self.exact[name][self.offset:self.offset + self.n]
+        if name in self.ext_dtypes:
+            return pd.Series(values, dtype=self.ext_dtypes[name], name=name)
+        return pd.Series(values, name=name, copy=False)
+
+    def to_frame(self, start: int = 0, dtype=None) -> pd.DataFrame:
+        """
+        Reconstruye las filas [start:].
+        dtype=None deja los indicadores en float32 (vista, sin copia);
+        dtype=np.float64 los expande.
+        """
+        start = max(0, self.n + start if start < 0 else start)
+        lo, hi = self.offset + start, self.offset + self.n
+
+        floats = self.floats[:, lo:hi]
+        if dtype is not None:
+            floats = floats.astype(dtype)
+
+        exact = {
+            c: (pd.array(a[lo:hi], dtype=self.ext_dtypes[c]) if c in self.ext_dtypes else a[lo:hi])
+            for c, a in self.exact.items()
+        }
+
+        parts = [pd.DataFrame(exact, copy=False)]
+        if self.float_fields:
+            parts.append(pd.DataFrame(floats.T, columns=self.float_fields, copy=False))
+        if self.flag_fields:
+            parts.append(pd.DataFrame(self._flags(lo, hi).T, columns=self.flag_fields, copy=False))
+
+        return pd.concat(parts, axis=1)[self.columns]
+
+    def append(self, df: pd.DataFrame, max_rows: int | None = None) -> "CompactFrame":
+        """
+        Nuevo CompactFrame con las filas de df al final (mismas columnas),
+        recortado a las últimas `max_rows`. O(filas nuevas): solo se copia
+        todo al quedarse sin capacidad (se reserva un 25% extra).
+
+        No es thread-safe: quien llama serializa los append de una serie
+        (FeatureCache lo hace bajo el lock de la clave).
+        """
+        if set(df.columns) != set(self.columns):
+            return CompactFrame.from_frame(pd.concat([self.to_frame(dtype=np.float64), df], ignore_index=True))
+
+        k = len(df)
+        lo, hi = self.offset, self.offset + self.n
+        exact, floats, bits, fill = self.exact, self.floats, self.bits, self._fill
+
+        # buffers llenos, o ya hay otro frame escribiendo detrás: se copian las filas vivas
+        if fill[0] != hi or hi + k > self.capacity:
+            dtypes = {c: a.dtype for c, a in self.exact.items()}
+            exact, floats, bits = self._allocate(dtypes, len(self.float_fields), len(self.flag_fields), self.n + k + max(k, self.n // 4))
+
+            for c, a in self.exact.items():
+                exact[c][:self.n] = a[lo:hi]
+            floats[:, :self.n] = self.floats[:, lo:hi]
+            if self.flag_fields:
+                packed = np.packbits(self._flags(lo, hi), axis=1)
+                bits[:, :packed.shape[1]] = packed
+
+            lo, hi, fill = 0, self.n, [self.n]
+
+        for c in exact:
+            exact[c][hi:hi + k] = df[c].to_numpy()
+
+        for j, c in enumerate(self.float_fields):
+            floats[j, hi:hi + k] = df[c].to_numpy(dtype=np.float64)
+
+        if self.flag_fields:
+            # se re-empaqueta solo el último byte (a medio llenar) + las filas nuevas
+            first = hi // 8
+            head = np.unpackbits(bits[:, first:first + 1], axis=1, count=hi - first * 8).astype(bool)
+            new = np.empty((len(self.flag_fields), k), dtype=bool)
+            for j, c in enumerate(self.flag_fields):
+                new[j] = df[c].to_numpy(dtype=bool)
+            packed = np.packbits(np.concatenate([head, new], axis=1), axis=1)
+            bits[:, first:first + packed.shape[1]] = packed
+
+        fill[0] = hi + k
+
+        n = hi + k - lo
+        if max_rows is not None and n > max_rows:
+            lo, n = lo + n - max_rows, max_rows
+
+        return CompactFrame(
+            self.columns, n, exact, self.float_fields, floats, self.flag_fields, bits,
+            offset=lo, ext_dtypes=self.ext_dtypes, fill=fill,
+        )
+
+
+def compact_frame(df: pd.DataFrame) -> CompactFrame:
+    return CompactFrame.from_frame(df)
+
+
+def downcast_features(df: pd.DataFrame, keep: Iterable[str] = BASE_COLUMNS) -> pd.DataFrame:
+    """
+    Variante DataFrame (para backtests largos): indicadores en float32,
+    OHLCV y el resto de columnas sin tocar. Los bool ya ocupan 1 byte.
+    """
+    keep = set(keep)
+    cols = {
+        c: df[c].astype(COMPACT_DTYPE)
+        for c in df.columns
+        if c not in keep and pd.api.types.is_float_dtype(df[c]) and df[c].dtype != COMPACT_DTYPE
+    }
+    return df.assign(**cols) if cols else df
+
+
+# ============================
+# Chequeo de tolerancia
+# ============================
+def max_relative_error(df: pd.DataFrame, compact: pd.DataFrame) -> Dict[str, float]:
+    """
+    Error relativo máximo por columna float entre df y su versión compacta.
+    """
+    out = {}
+    for c in df.columns:
+        if c not in compact.columns or not pd.api.types.is_float_dtype(df[c]):
+            continue
+        a = df[c].to_numpy(dtype=np.float64)
+        b = compact[c].to_numpy(dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rel = np.abs(a - b) / np.maximum(np.abs(a), np.finfo(np.float64).tiny)
+        rel = rel[np.isfinite(rel)]
+        out[c] = float(rel.max()) if len(rel) else 0.0
+    return out
+
+
+def check_decision_tolerance(df: pd.DataFrame, engine=None, last: int = 300, min_rows: int = 60) -> dict:
+    """
+    Corre SignalEngine.generate_series sobre df en float64 y en formato
+    compacto y compara las decisiones de las últimas `last` velas.
+
+    ok=True si ninguna señal cambia y el error relativo de cada indicador
+    es <= COMPACT_RTOL. Las diferencias se listan en `mismatches`.
+    """
+    if engine is None:
+        from app.signals.signal_engine import SignalEngine
+
+        engine = SignalEngine()
+
+    df = df.reset_index(drop=True)
+    compact = CompactFrame.from_frame(df).to_frame()
+    errors = max_relative_error(df, compact)
+
+    mismatches = []
+    checked = 0
+
+    full_series = engine.generate_series(df)
+    small_series = engine.generate_series(compact)
+
+    for i in range(max(min_rows, len(df) - int(last)), len(df) + 1):
+        full = engine.signal_at(full_series, i - 1)
+        small = engine.signal_at(small_series, i - 1)
+        checked += 1
+
+        if full.get("signal") != small.get("signal") or full.get("reason") != small.get("reason"):
+            mismatches.append(
+                {
+                    "row": i - 1,
+                    "full": full.get("signal"),
+                    "compact": small.get("signal"),
+                    "reason_full": full.get("reason"),
+                    "reason_compact": small.get("reason"),
+                }
+            )
+
+    worst = max(errors.values(), default=0.0)
+
+    return {
+        "ok": not mismatches and worst <= COMPACT_RTOL,
+        "checked": checked,
+        "mismatches": mismatches,
+        "max_relative_error": worst,
+        "errors": errors,
+        "bytes_full": int(df.memory_usage(index=True, deep=True).sum()),
+        "bytes_compact": CompactFrame.from_frame(df).nbytes,
+    }
@@ -0,0 +1,328 @@
+import math
+from collections import deque
+from typing import Dict
+
+import pandas as pd
+
+from app.features.technicals import TECHNICAL_COLUMNS
+
+NAN = float("nan")
+
+# velas mínimas para sembrar el estado desde un frame ya calculado
+# (ventana más larga = 20, +1 para el diff, con margen)
+SEED_MIN_ROWS = 30
+
+
+def _finite(x: float) -> bool:
+    return not (math.isnan(x) or math.isinf(x))
+
+
+def _div(a: float, b: float) -> float:
+    """
+    a / b con la semántica de pandas tras replace(0, nan): NaN si b es 0 o NaN.
+    """
+    if b == 0 or math.isnan(b) or math.isnan(a):
+        return NAN
+    return a / b
+
+
+class _Ema:
+    """
+    EMA con adjust=False: y0 = x0, y = a*x + (1-a)*y.
+    """
+
+    __slots__ = ("alpha", "value")
+
+    def __init__(self, span: int):
+        self.alpha = 2.0 / (span + 1.0)
+        self.value = None
+
+    def update(self, x: float) -> float:
+        if self.value is None:
+            self.value = x
+        else:
+            self.value = self.alpha * x + (1.0 - self.alpha) * self.value
+        return self.value
+
+
+class _Rolling:
+    """
+    Ventana fija con suma acumulada (O(1) por vela).
+    Igual que pandas rolling(window) con min_periods=window:
+    NaN mientras la ventana no esté llena o contenga NaN.
+    La suma se recalcula cada `window` pasos para no acumular error.
+    """
+
+    __slots__ = ("window", "values", "total", "nans", "_since_resync")
+
+    def __init__(self, window: int):
+        self.window = int(window)
+        self.values: deque = deque(maxlen=self.window)
+        self.total = 0.0
+        self.nans = 0
+        self._since_resync = 0
+
+    def push(self, x: float) -> None:
+        if len(self.values) == self.window:
+            old = self.values[0]
+            if math.isnan(old):
+                self.nans -= 1
+            else:
+                self.total -= old
+
+        self.values.append(x)
+        if math.isnan(x):
+            self.nans += 1
+        else:
+            self.total += x
+
+        self._since_resync += 1
+        if self._since_resync >= self.window:
+            self.total = math.fsum(v for v in self.values if not math.isnan(v))
+            self._since_resync = 0
+
+    @property
+    def ready(self) -> bool:
+        return len(self.values) == self.window and self.nans == 0
+
+    def sum(self) -> float:
+        return self.total if self.ready else NAN
+
+    def mean(self) -> float:
+        return self.total / self.window if self.ready else NAN
+
+    def std(self) -> float:
+        """
+        Desvío muestral (ddof=1). Dos pasadas sobre la ventana (tamaño fijo).
+        """
+        if not self.ready or self.window < 2:
+            return NAN
+        m = math.fsum(self.values) / self.window
+        var = math.fsum((v - m) ** 2 for v in self.values) / (self.window - 1)
+        return math.sqrt(var)
+
+
+class IncrementalTechnicals:
+    """
+    Versión con estado de add_technicals:
+    cada vela nueva actualiza EMAs, sumas rolling y medias en O(1)
+    (sin recalcular la historia). Coincide con add_technicals
+    dentro de tolerancia de punto flotante.
+    """
+
+    def __init__(self):
+        self.ema_20 = _Ema(20)
+        self.ema_50 = _Ema(50)
+        self.ema_fast = _Ema(12)
+        self.ema_slow = _Ema(26)
+        self.macd_signal = _Ema(9)
+
+        self.gain = _Rolling(14)
+        self.loss = _Rolling(14)
+        self.tr = _Rolling(14)
+        self.plus_dm = _Rolling(14)
+        self.minus_dm = _Rolling(14)
+        self.dx = _Rolling(14)
+
+        self.ret = _Rolling(20)
+        self.close20 = _Rolling(20)
+        self.pv = _Rolling(20)
+        self.vol = _Rolling(20)
+
+        self.prev: Dict[str, float] | None = None
+        self.prev_macd = NAN
+        self.prev_signal = NAN
+        self.count = 0
+        self.last: Dict[str, float] | None = None
+
+    def update(self, open_: float, high: float, low: float, close: float, volume: float) -> Dict[str, float]:
+        """
+        Agrega una vela cerrada y devuelve la fila de indicadores.
+        """
+        high, low, close, volume = float(high), float(low), float(close), float(volume)
+        prev = self.prev
+
+        # EMAs
+        ema_20 = self.ema_20.update(close)
+        ema_50 = self.ema_50.update(close)
+        ema_fast = self.ema_fast.update(close)
+        ema_slow = self.ema_slow.update(close)
+
+        # RSI (14)
+        if prev is None:
+            delta = NAN
+        else:
+            delta = close - prev["close"]
+        self.gain.push(max(delta, 0.0) if _finite(delta) else NAN)
+        self.loss.push(max(-delta, 0.0) if _finite(delta) else NAN)
+
+        rs = _div(self.gain.mean(), self.loss.mean())
+        rsi = 100 - (100 / (1 + rs)) if _finite(rs) else 50.0
+
+        # ATR (14): el primer TR es high - low (pandas ignora los NaN del shift)
+        tr = abs(high - low)
+        if prev is not None:
+            tr = max(tr, abs(high - prev["close"]), abs(low - prev["close"]))
+        self.tr.push(tr)
+        atr = self.tr.mean()
+
+        # Volatility (20)
+        ret = close / prev["close"] - 1.0 if prev is not None and prev["close"] != 0 else NAN
+        self.ret.push(ret)
+        volatility = self.ret.std()
+
+        # MACD (12,26,9)
+        macd = ema_fast - ema_slow
+        macd_signal = self.macd_signal.update(macd)
+        cross_up = self.prev_macd <= self.prev_signal and macd > macd_signal
+        cross_down = self.prev_macd >= self.prev_signal and macd < macd_signal
+
+        # ADX (14)
+        if prev is None:
+            plus_dm = minus_dm = 0.0
+        else:
+            up_move = high - prev["high"]
+            down_move = prev["low"] - low
+            plus_dm = up_move if (up_move > down_move and up_move > 0) else 0.0
+            minus_dm = down_move if (down_move > up_move and down_move > 0) else 0.0
+        self.plus_dm.push(plus_dm)
+        self.minus_dm.push(minus_dm)
+
+        plus_di = 100 * _div(self.plus_dm.sum(), atr)
+        minus_di = 100 * _div(self.minus_dm.sum(), atr)
+        dx = 100 * _div(abs(plus_di - minus_di), plus_di + minus_di)
+        self.dx.push(dx)
+        adx = self.dx.mean()
+
+        # VWAP (proxy rolling 20)
+        typical = (high + low + close) / 3.0
+        self.pv.push(typical * volume)
+        self.vol.push(volume)
+        vol_sum = self.vol.sum()
+        if _finite(vol_sum) and vol_sum == 0:
+            vwap = NAN
+        else:
+            vwap = self.pv.sum() / vol_sum if _finite(vol_sum) else NAN
+
+        # Bollinger (20,2)
+        self.close20.push(close)
+        bb_mid = self.close20.mean()
+        std20 = self.close20.std()
+
+        # Volumen
+        vol_ma20 = self.vol.mean()
+        vol_ratio = _div(volume, vol_ma20)
+
+        row = {
+            "ema_20": ema_20,
+            "ema_50": ema_50,
+            "ema_fast": ema_fast,
+            "ema_slow": ema_slow,
+            "ema20": ema_20,
+            "ema50": ema_50,
+            "rsi": rsi,
+            "atr": atr,
+            "return": ret,
+            "volatility": volatility,
+            "macd": macd,
+            "macd_signal": macd_signal,
+            "macd_hist": macd - macd_signal,
+            "macd_cross_up": bool(cross_up),
+            "macd_cross_down": bool(cross_down),
+            "adx": adx if _finite(adx) else 0.0,
+            "plus_di": plus_di if not math.isnan(plus_di) else 0.0,
+            "minus_di": minus_di if not math.isnan(minus_di) else 0.0,
+            "vwap": vwap,
+            "bb_mid": bb_mid,
+            "bb_up": bb_mid + 2.0 * std20,
+            "bb_low": bb_mid - 2.0 * std20,
+            "vol_ma20": vol_ma20,
+            "vol_ratio": vol_ratio,
+            "trend_bull": bool(close > ema_50 and ema_20 > ema_50),
+            "trend_bear": bool(close < ema_50 and ema_20 < ema_50),
+        }
+
+        # limpieza final (igual que add_technicals)
+        for k, v in row.items():
+            if isinstance(v, float) and math.isinf(v):
+                row[k] = NAN
+
+        self.prev = {"high": high, "low": low, "close": close}
+        self.prev_macd = macd
+        self.prev_signal = macd_signal
+        self.count += 1
+        self.last = row
+        return row
+
+    def update_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Procesa varias velas en orden y devuelve sus filas de indicadores
+        (mismo índice que df).
+        """
+        rows = [
+            self.update(o, h, l, c, v)
+            for o, h, l, c, v in zip(df["open"], df["high"], df["low"], df["close"], df["volume"])
+        ]
+        return pd.DataFrame(rows, index=df.index, columns=TECHNICAL_COLUMNS)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "IncrementalTechnicals":
+        """
+        Calienta el estado con la historia disponible.
+        """
+        engine = cls()
+        for o, h, l, c, v in zip(df["open"], df["high"], df["low"], df["close"], df["volume"]):
+            engine.update(o, h, l, c, v)
+        return engine
+
+    @classmethod
+    def from_features(cls, df: pd.DataFrame) -> "IncrementalTechnicals":
+        """
+        Reconstruye el estado desde un DataFrame que YA tiene add_technicals,
+        leyendo solo las últimas velas (O(ventana), sin recorrer la historia).
+        """
+        if len(df) < SEED_MIN_ROWS or not set(TECHNICAL_COLUMNS).issubset(df.columns):
+            return cls.from_frame(df)
+
+        engine = cls()
+        tail = df.iloc[-(SEED_MIN_ROWS):]
+        last = tail.iloc[-1]
+
+        high = tail["high"].to_numpy(dtype=float)
+        low = tail["low"].to_numpy(dtype=float)
+        close = tail["close"].to_numpy(dtype=float)
+        volume = tail["volume"].to_numpy(dtype=float)
+
+        engine.ema_20.value = float(last["ema_20"])
+        engine.ema_50.value = float(last["ema_50"])
+        engine.ema_fast.value = float(last["ema_fast"])
+        engine.ema_slow.value = float(last["ema_slow"])
+        engine.macd_signal.value = float(last["macd_signal"])
+
+        # ventanas rolling: se reconstruyen con los insumos de las últimas velas
+        for i in range(1, len(tail)):
+            delta = close[i] - close[i - 1]
+            engine.gain.push(max(delta, 0.0))
+            engine.loss.push(max(-delta, 0.0))
+            engine.tr.push(max(abs(high[i] - low[i]), abs(high[i] - close[i - 1]), abs(low[i] - close[i - 1])))
+            engine.ret.push(close[i] / close[i - 1] - 1.0 if close[i - 1] != 0 else NAN)
+
+            up_move = high[i] - high[i - 1]
+            down_move = low[i - 1] - low[i]
+            engine.plus_dm.push(up_move if (up_move > down_move and up_move > 0) else 0.0)
+            engine.minus_dm.push(down_move if (down_move > up_move and down_move > 0) else 0.0)
+
+            engine.close20.push(close[i])
+            engine.pv.push((high[i] + low[i] + close[i]) / 3.0 * volume[i])
+            engine.vol.push(volume[i])
+
+        # DX desde plus_di / minus_di (NaN donde el ATR era 0, igual que el batch)
+        for p, m in zip(tail["plus_di"].to_numpy(dtype=float), tail["minus_di"].to_numpy(dtype=float)):
+            engine.dx.push(100 * _div(abs(p - m), p + m))
+
+        engine.prev = {"high": float(high[-1]), "low": float(low[-1]), "close": float(close[-1])}
+        engine.prev_macd = float(last["macd"])
+        engine.prev_signal = float(last["macd_signal"])
+        engine.count = len(df)
+        engine.last = {c: last[c] for c in TECHNICAL_COLUMNS}
+        return engine
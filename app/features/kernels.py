@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+# ============================
+# Kernels de indicadores sobre arrays
+# ============================
+# Todos operan sobre el ÚLTIMO eje:
+#   1D (T,)   -> una serie
+#   2D (S, T) -> S series alineadas (panel), una sola llamada por indicador
+# ewm / rolling delegan en pandas para mantener exactamente la misma
+# semántica de NaN y min_periods que el resto del proyecto.
+
+
+def _to_pandas(x: np.ndarray):
+    return pd.Series(x) if x.ndim == 1 else pd.DataFrame(x.T)
+
+
+def _from_pandas(obj, ndim: int) -> np.ndarray:
+    values = obj.to_numpy(dtype=np.float64)
+    return values if ndim == 1 else values.T
+
+
+def shift(x: np.ndarray, n: int = 1) -> np.ndarray:
+    out = np.full(x.shape, np.nan, dtype=np.float64)
+    if n > 0:
+        out[..., n:] = x[..., :-n]
+    elif n < 0:
+        out[..., :n] = x[..., -n:]
+    else:
+        out[...] = x
+    return out
+
+
+def diff(x: np.ndarray) -> np.ndarray:
+    out = np.full(x.shape, np.nan, dtype=np.float64)
+    out[..., 1:] = x[..., 1:] - x[..., :-1]
+    return out
+
+
+def safe_div(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    a / b con b == 0 -> NaN (equivale a b.replace(0, np.nan)).
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return a / np.where(b == 0, np.nan, b)
+
+
+def ema(x: np.ndarray, span: int, adjust: bool = False) -> np.ndarray:
+    return _from_pandas(_to_pandas(x).ewm(span=span, adjust=adjust).mean(), x.ndim)
+
+
+def rolling_mean(x: np.ndarray, window: int) -> np.ndarray:
+    return _from_pandas(_to_pandas(x).rolling(window).mean(), x.ndim)
+
+
+def rolling_sum(x: np.ndarray, window: int) -> np.ndarray:
+    return _from_pandas(_to_pandas(x).rolling(window).sum(), x.ndim)
+
+
+def rolling_std(x: np.ndarray, window: int) -> np.ndarray:
+    return _from_pandas(_to_pandas(x).rolling(window).std(), x.ndim)
+
+
+def true_range(high: np.ndarray, low: np.ndarray, prev_close: np.ndarray) -> np.ndarray:
+    """
+    max(|h-l|, |h-c_prev|, |l-c_prev|) ignorando NaN (primera vela -> h-l).
+    """
+    return np.fmax(np.fmax(np.abs(high - low), np.abs(high - prev_close)), np.abs(low - prev_close))
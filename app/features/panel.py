@@ -0,0 +1,158 @@
+from typing import Dict, Hashable, Iterable, List, Mapping
+
+import numpy as np
+import pandas as pd
+
+from app.features.registry import BASE_COLUMNS, compute_arrays
+from app.features.technicals import TECHNICAL_COLUMNS
+
+# ============================
+# Panel cross-seccional (series x tiempo x campo)
+# ============================
+# Todas las series (ej. 300 símbolos x 3 timeframes) se apilan en un solo
+# bloque alineado a la DERECHA (la última vela de cada serie en la última
+# columna) y con NaN a la izquierda. Cada indicador se calcula UNA vez
+# sobre el bloque (S, T) completo en vez de S pipelines de DataFrame.
+# El relleno NaN no altera los resultados: ewm/rolling/diff ya tratan el
+# inicio de cada serie como historia faltante.
+TIME_FIELDS = ("open_time", "close_time")
+
+
+class FeaturePanel:
+    """
+    values: (S, T, F) float64  -> OHLCV + features numéricas
+    flags:  (S, T, B) bool     -> features booleanas (cruces, trend flags)
+    times:  (S, T, 2) int64    -> open_time / close_time en ms
+    """
+
+    def __init__(
+        self,
+        keys: List[Hashable],
+        values: np.ndarray,
+        times: np.ndarray,
+        lengths: np.ndarray,
+        time_fields=TIME_FIELDS,
+        datetime_fields=(),
+    ):
+        self.keys = list(keys)
+        self.index: Dict[Hashable, int] = {k: i for i, k in enumerate(self.keys)}
+        self.fields: List[str] = list(BASE_COLUMNS)
+        self.values = values
+        self.flag_fields: List[str] = []
+        self.flags = np.zeros(values.shape[:2] + (0,), dtype=bool)
+        self.times = times
+        self.lengths = lengths
+        self.time_fields = tuple(time_fields)
+        self.datetime_fields = tuple(datetime_fields)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.index
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.values.nbytes + self.flags.nbytes + self.times.nbytes)
+
+    @classmethod
+    def from_frames(cls, frames: Mapping[Hashable, pd.DataFrame]) -> "FeaturePanel":
+        """
+        Apila DataFrames OHLCV (uno por clave) en un panel.
+        Frames vacíos o sin columnas OHLCV se ignoran.
+        """
+        items = [
+            (k, df) for k, df in frames.items()
+            if isinstance(df, pd.DataFrame) and not df.empty and set(BASE_COLUMNS).issubset(df.columns)
+        ]
+
+        S = len(items)
+        T = max((len(df) for _, df in items), default=0)
+
+        values = np.full((S, T, len(BASE_COLUMNS)), np.nan, dtype=np.float64)
+        times = np.zeros((S, T, len(TIME_FIELDS)), dtype=np.int64)
+        lengths = np.zeros(S, dtype=np.int64)
+        time_fields = [c for c in TIME_FIELDS if all(c in df.columns for _, df in items)] if items else []
+        datetime_fields = set()
+
+        for i, (_, df) in enumerate(items):
+            n = len(df)
+            lengths[i] = n
+            values[i, T - n:, :] = df[list(BASE_COLUMNS)].to_numpy(dtype=np.float64)
+
+            for j, c in enumerate(TIME_FIELDS):
+                if c not in time_fields:
+                    continue
+                col = df[c]
+                if pd.api.types.is_datetime64_any_dtype(col):
+                    datetime_fields.add(c)
+                    times[i, T - n:, j] = col.to_numpy(dtype="datetime64[ms]").astype(np.int64)
+                else:
+                    times[i, T - n:, j] = col.to_numpy(dtype=np.int64)
+
+        return cls([k for k, _ in items], values, times, lengths, time_fields, datetime_fields)
+
+    def compute(self, names: Iterable[str] = TECHNICAL_COLUMNS, overrides: Mapping[str, dict] | None = None) -> "FeaturePanel":
+        """
+        Calcula `names` para TODAS las series a la vez (una llamada por indicador).
+        """
+        names = [n for n in dict.fromkeys(names) if n not in self.fields and n not in self.flag_fields]
+        if not names or len(self) == 0:
+            return self
+
+        inputs = {c: self.values[:, :, j] for j, c in enumerate(self.fields)}
+        inputs.update({c: self.flags[:, :, j] for j, c in enumerate(self.flag_fields)})
+        out = compute_arrays(inputs, names, overrides)
+
+        float_names = [n for n in names if out[n].dtype != bool]
+        bool_names = [n for n in names if out[n].dtype == bool]
+
+        if float_names:
+            block = np.empty(self.values.shape[:2] + (len(self.fields) + len(float_names),), dtype=np.float64)
+            block[:, :, : len(self.fields)] = self.values
+            for j, n in enumerate(float_names, start=len(self.fields)):
+                v = out[n]
+                block[:, :, j] = np.where(np.isinf(v), np.nan, v)
+            self.values = block
+            self.fields += float_names
+
+        if bool_names:
+            block = np.empty(self.flags.shape[:2] + (len(self.flag_fields) + len(bool_names),), dtype=bool)
+            block[:, :, : len(self.flag_fields)] = self.flags
+            for j, n in enumerate(bool_names, start=len(self.flag_fields)):
+                block[:, :, j] = out[n]
+            self.flags = block
+            self.flag_fields += bool_names
+
+        return self
+
+    def frame(self, key: Hashable) -> pd.DataFrame:
+        """
+        DataFrame de una serie SIN copiar: cada columna es una vista del panel.
+        """
+        i = self.index[key]
+        start = self.values.shape[1] - int(self.lengths[i])
+
+        times = {}
+        for j, c in enumerate(TIME_FIELDS):
+            if c not in self.time_fields:
+                continue
+            col = self.times[i, start:, j]
+            times[c] = col.view("datetime64[ms]") if c in self.datetime_fields else col
+
+        parts = [pd.DataFrame(self.values[i, start:, :], columns=self.fields, copy=False)]
+        if "open_time" in times:
+            parts.insert(0, pd.DataFrame({"open_time": times["open_time"]}, copy=False))
+        if "close_time" in times:
+            parts.append(pd.DataFrame({"close_time": times["close_time"]}, copy=False))
+        if self.flag_fields:
+            parts.append(pd.DataFrame(self.flags[i, start:, :], columns=self.flag_fields, copy=False))
+
+        return pd.concat(parts, axis=1)
+
+
+def compute_panel(frames: Mapping[Hashable, pd.DataFrame], names: Iterable[str] = TECHNICAL_COLUMNS) -> FeaturePanel:
+    """
+    Atajo: apila `frames` y calcula `names` en una sola pasada.
+    """
+    return FeaturePanel.from_frames(frames).compute(names)
@@ -0,0 +1,402 @@
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Mapping, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.features import kernels as k
+
+# ============================
+# Registro declarativo de features
+# ============================
+# Cada feature declara:
+#   - inputs: columnas base (open/high/low/close/volume) u otras features
+#   - params: parámetros por defecto (sobrescribibles con `overrides`)
+# compute_features resuelve SOLO el subgrafo necesario para las columnas
+# pedidas; intermedios como `tr` o `delta` se calculan una vez y se comparten.
+BASE_COLUMNS = ("open", "high", "low", "close", "volume")
+
+
+@dataclass(frozen=True)
+class Feature:
+    name: str
+    inputs: Tuple[str, ...]
+    fn: Callable[..., np.ndarray]
+    params: Dict = field(default_factory=dict)
+    # intermedios: no se agregan al DataFrame salvo que se pidan
+    public: bool = True
+
+
+FEATURES: Dict[str, Feature] = {}
+
+
+def register(name: str, inputs: Iterable[str], params: Dict | None = None, public: bool = True):
+    def deco(fn):
+        FEATURES[name] = Feature(name, tuple(inputs), fn, dict(params or {}), public)
+        return fn
+    return deco
+
+
+# features paramétricas por nombre (ej. ema_14, ema_200)
+_PATTERNS: List[Tuple[re.Pattern, Callable[[re.Match], Feature]]] = [
+    (
+        re.compile(r"^ema_(\d+)$"),
+        lambda m: Feature(m.group(0), ("close",), lambda c, span, adjust: k.ema(c, span, adjust), {"span": int(m.group(1)), "adjust": False}),
+    ),
+]
+
+
+def resolve(name: str) -> Feature:
+    feat = FEATURES.get(name)
+    if feat is not None:
+        return feat
+    for pattern, factory in _PATTERNS:
+        m = pattern.match(name)
+        if m:
+            return factory(m)
+    raise KeyError(f"Unknown feature: {name}")
+
+
+def is_known(name: str) -> bool:
+    try:
+        resolve(name)
+        return True
+    except KeyError:
+        return False
+
+
+# ============================
+# Intermedios compartidos
+# ============================
+@register("prev_close", ["close"], public=False)
+def _prev_close(close):
+    return k.shift(close, 1)
+
+
+@register("delta", ["close"], public=False)
+def _delta(close):
+    return k.diff(close)
+
+
+@register("gain", ["delta"], public=False)
+def _gain(delta):
+    return np.where(np.isnan(delta), np.nan, np.maximum(delta, 0.0))
+
+
+@register("loss", ["delta"], public=False)
+def _loss(delta):
+    return np.where(np.isnan(delta), np.nan, np.maximum(-delta, 0.0))
+
+
+@register("avg_gain", ["gain"], {"window": 14}, public=False)
+def _avg_gain(gain, window):
+    return k.rolling_mean(gain, window)
+
+
+@register("avg_loss", ["loss"], {"window": 14}, public=False)
+def _avg_loss(loss, window):
+    return k.rolling_mean(loss, window)
+
+
+@register("tr", ["high", "low", "prev_close"], public=False)
+def _tr(high, low, prev_close):
+    return k.true_range(high, low, prev_close)
+
+
+@register("plus_dm", ["high", "low"], public=False)
+def _plus_dm(high, low):
+    up_move = k.diff(high)
+    down_move = -k.diff(low)
+    return np.where((up_move > down_move) & (up_move > 0), up_move, 0.0)
+
+
+@register("minus_dm", ["high", "low"], public=False)
+def _minus_dm(high, low):
+    up_move = k.diff(high)
+    down_move = -k.diff(low)
+    return np.where((down_move > up_move) & (down_move > 0), down_move, 0.0)
+
+
+@register("plus_di_raw", ["plus_dm", "atr"], {"window": 14}, public=False)
+def _plus_di_raw(plus_dm, atr, window):
+    return 100 * k.safe_div(k.rolling_sum(plus_dm, window), atr)
+
+
+@register("minus_di_raw", ["minus_dm", "atr"], {"window": 14}, public=False)
+def _minus_di_raw(minus_dm, atr, window):
+    return 100 * k.safe_div(k.rolling_sum(minus_dm, window), atr)
+
+
+@register("dx", ["plus_di_raw", "minus_di_raw"], public=False)
+def _dx(plus_di, minus_di):
+    return k.safe_div(100 * np.abs(plus_di - minus_di), plus_di + minus_di)
+
+
+@register("std20", ["close"], {"window": 20}, public=False)
+def _std20(close, window):
+    return k.rolling_std(close, window)
+
+
+@register("pv", ["high", "low", "close", "volume"], public=False)
+def _pv(high, low, close, volume):
+    return (high + low + close) / 3.0 * volume
+
+
+# ============================
+# EMAs
+# ============================
+@register("ema_fast", ["close"], {"span": 12, "adjust": False})
+def _ema_fast(close, span, adjust):
+    return k.ema(close, span, adjust)
+
+
+@register("ema_slow", ["close"], {"span": 26, "adjust": False})
+def _ema_slow(close, span, adjust):
+    return k.ema(close, span, adjust)
+
+
+# ema_20 / ema_50 salen del patrón ema_<span>; los alias apuntan a ellas
+@register("ema20", ["ema_20"])
+def _ema20(ema_20):
+    return ema_20
+
+
+@register("ema50", ["ema_50"])
+def _ema50(ema_50):
+    return ema_50
+
+
+# ============================
+# Momentum / volatilidad
+# ============================
+@register("rsi", ["avg_gain", "avg_loss"], {"fillna": 50.0, "nan_on_zero_loss": True})
+def _rsi(avg_gain, avg_loss, fillna, nan_on_zero_loss):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = k.safe_div(avg_gain, avg_loss) if nan_on_zero_loss else avg_gain / avg_loss
+        rsi = 100 - (100 / (1 + rs))
+    if fillna is not None:
+        rsi = np.where(np.isnan(rsi), fillna, rsi)
+    return rsi
+
+
+@register("atr", ["tr"], {"window": 14})
+def _atr(tr, window):
+    return k.rolling_mean(tr, window)
+
+
+@register("return", ["close", "prev_close"])
+def _return(close, prev_close):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return close / prev_close - 1.0
+
+
+@register("volatility", ["return"], {"window": 20})
+def _volatility(ret, window):
+    return k.rolling_std(ret, window)
+
+
+# ============================
+# MACD (12,26,9)
+# ============================
+@register("macd", ["ema_fast", "ema_slow"])
+def _macd(ema_fast, ema_slow):
+    return ema_fast - ema_slow
+
+
+@register("macd_signal", ["macd"], {"span": 9})
+def _macd_signal(macd, span):
+    return k.ema(macd, span, False)
+
+
+@register("macd_hist", ["macd", "macd_signal"])
+def _macd_hist(macd, macd_signal):
+    return macd - macd_signal
+
+
+@register("macd_cross_up", ["macd", "macd_signal"])
+def _macd_cross_up(macd, macd_signal):
+    return (k.shift(macd) <= k.shift(macd_signal)) & (macd > macd_signal)
+
+
+@register("macd_cross_down", ["macd", "macd_signal"])
+def _macd_cross_down(macd, macd_signal):
+    return (k.shift(macd) >= k.shift(macd_signal)) & (macd < macd_signal)
+
+
+# ============================
+# ADX (14)
+# ============================
+@register("adx", ["dx"], {"window": 14})
+def _adx(dx, window):
+    adx = k.rolling_mean(dx, window)
+    return np.where(np.isnan(adx), 0.0, adx)
+
+
+@register("plus_di", ["plus_di_raw"])
+def _plus_di(plus_di_raw):
+    return np.where(np.isnan(plus_di_raw), 0.0, plus_di_raw)
+
+
+@register("minus_di", ["minus_di_raw"])
+def _minus_di(minus_di_raw):
+    return np.where(np.isnan(minus_di_raw), 0.0, minus_di_raw)
+
+
+# ============================
+# VWAP / Bollinger / Volumen
+# ============================
+@register("vwap", ["pv", "volume"], {"window": 20})
+def _vwap(pv, volume, window):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return k.rolling_sum(pv, window) / k.rolling_sum(volume, window)
+
+
+@register("bb_mid", ["close"], {"window": 20})
+def _bb_mid(close, window):
+    return k.rolling_mean(close, window)
+
+
+@register("bb_up", ["bb_mid", "std20"], {"width": 2.0})
+def _bb_up(bb_mid, std20, width):
+    return bb_mid + width * std20
+
+
+@register("bb_low", ["bb_mid", "std20"], {"width": 2.0})
+def _bb_low(bb_mid, std20, width):
+    return bb_mid - width * std20
+
+
+@register("vol_ma20", ["volume"], {"window": 20})
+def _vol_ma20(volume, window):
+    return k.rolling_mean(volume, window)
+
+
+@register("vol_ratio", ["volume", "vol_ma20"])
+def _vol_ratio(volume, vol_ma20):
+    return k.safe_div(volume, vol_ma20)
+
+
+# ============================
+# Trend flags
+# ============================
+@register("trend_bull", ["close", "ema_20", "ema_50"])
+def _trend_bull(close, ema_20, ema_50):
+    return (close > ema_50) & (ema_20 > ema_50)
+
+
+@register("trend_bear", ["close", "ema_20", "ema_50"])
+def _trend_bear(close, ema_20, ema_50):
+    return (close < ema_50) & (ema_20 < ema_50)
+
+
+# ============================
+# Motor de cálculo
+# ============================
+def _affected(names: Iterable[str], overrides: Mapping[str, dict]) -> set:
+    """
+    Features (en el subgrafo de `names`) que dependen de algún override:
+    no se pueden reutilizar desde el DataFrame de entrada.
+    """
+    memo: Dict[str, bool] = {}
+
+    def visit(name: str) -> bool:
+        if name in memo:
+            return memo[name]
+        if name in BASE_COLUMNS:
+            memo[name] = False
+            return False
+        hit = name in overrides or any(visit(i) for i in resolve(name).inputs)
+        memo[name] = hit
+        return hit
+
+    for n in names:
+        visit(n)
+    return {n for n, hit in memo.items() if hit}
+
+
+def compute_arrays(
+    inputs: Mapping[str, np.ndarray],
+    names: Iterable[str],
+    overrides: Mapping[str, dict] | None = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Calcula `names` a partir de `inputs` (columnas base y/o features ya hechas).
+    Los arrays pueden ser 1D (una serie) o 2D (S, T) (panel).
+    Solo se evalúan las features del subgrafo de dependencias pedido.
+    """
+    overrides = overrides or {}
+    names = list(names)
+    stale = _affected(names, overrides) if overrides else set()
+
+    ctx: Dict[str, np.ndarray] = {}
+
+    def get(name: str) -> np.ndarray:
+        value = ctx.get(name)
+        if value is not None:
+            return value
+
+        if name in inputs and (name in BASE_COLUMNS or name not in stale):
+            value = inputs[name]
+        else:
+            feat = resolve(name)
+            params = {**feat.params, **overrides.get(name, {})}
+            value = feat.fn(*(get(i) for i in feat.inputs), **params)
+
+        ctx[name] = value
+        return value
+
+    return {name: get(name) for name in names}
+
+
+def compute_features(
+    df: pd.DataFrame,
+    names: Iterable[str],
+    overrides: Mapping[str, dict] | None = None,
+    reuse: bool = True,
+) -> pd.DataFrame:
+    """
+    Devuelve una copia de df con las columnas `names` agregadas.
+    - reuse=True: columnas ya presentes en df se toman tal cual (no se recalculan)
+    - overrides: {"feature": {param: valor}} ej. {"ema_20": {"adjust": True}}
+    """
+    names = list(dict.fromkeys(names))
+
+    inputs: Dict[str, np.ndarray] = {c: df[c].to_numpy(dtype=np.float64) for c in BASE_COLUMNS if c in df.columns}
+
+    if reuse:
+        for c in df.columns:
+            if c not in inputs and is_known(c):
+                inputs[c] = df[c].to_numpy()
+        stale = _affected(names, overrides) if overrides else set()
+        todo = [n for n in names if n not in df.columns or n in stale]
+    else:
+        todo = names
+
+    if not todo:
+        return df.copy()
+
+    values = compute_arrays(inputs if reuse else {c: inputs[c] for c in BASE_COLUMNS if c in inputs}, todo, overrides)
+
+    new_cols = {}
+    for name in todo:
+        v = values[name]
+        if v.dtype.kind == "f":
+            v = np.where(np.isinf(v), np.nan, v)
+        new_cols[name] = v
+
+    return df.assign(**new_cols)
+
+
+def ensure_features(df: pd.DataFrame, names: Iterable[str]) -> pd.DataFrame:
+    """
+    Garantiza que df tenga `names`. Si ya están todas, devuelve df SIN copiar.
+    Columnas desconocidas para el registro se ignoran.
+    """
+    if df is None or df.empty or not set(BASE_COLUMNS).issubset(df.columns):
+        return df
+
+    missing = [n for n in names if n not in df.columns and is_known(n)]
+    if not missing:
+        return df
+    return compute_features(df, missing)
@@ -1,3 +1,5 @@
+import os
+
 from fastapi import FastAPI
 from fastapi.responses import HTMLResponse
 from fastapi.staticfiles import StaticFiles
@@ -30,6 +32,95 @@ app.include_router(signal_router)
 app.include_router(health_router)
 app.include_router(history_router)
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
+
+# ======================
+# Stream de velas (opcional)
+# ======================
+# KLINE_STREAM_SYMBOLS=BTCUSDT,ETHUSDT activa los ring buffers en memoria
+@app.on_event("startup")
+def start_kline_stream():
+    symbols = [s.strip().upper() for s in os.getenv("KLINE_STREAM_SYMBOLS", "").split(",") if s.strip()]
+    if not symbols:
+        return
+
+    from app.data.exchange_client import get_shared_client
+    from app.data.stream import start_stream_service
+
+    timeframes = [t.strip() for t in os.getenv("KLINE_STREAM_TIMEFRAMES", "1h,4h,1d").split(",") if t.strip()]
+    capacity = int(os.getenv("KLINE_STREAM_CAPACITY", "500"))
+
+    start_stream_service(symbols, timeframes, capacity=capacity, seed_client=get_shared_client())
+
+
+@app.on_event("shutdown")
+def stop_kline_stream():
+    from app.data.stream import stop_stream_service
+
+    stop_stream_service()
+
+
+# ======================
+# Snapshot exchangeInfo + tickers 24h
+# ======================
+@app.on_event("startup")
+def start_exchange_snapshot():
+    from app.data.exchange_snapshot import get_snapshot_service
+
+    get_snapshot_service().start()
+
+
+@app.on_event("shutdown")
+def stop_exchange_snapshot():
+    from app.data.exchange_snapshot import get_snapshot_service
+
+    get_snapshot_service().stop()
+
+
+# ======================
+# Modelo activo (artifact store)
+# ======================
+# store vacío: el fallback se entrena en background (nunca en un request);
+# hasta que haya modelo /signal y /scan responden 503
+@app.on_event("startup")
+def load_model_artifact():
+    from app.models.registry import start_active_model
+
+    start_active_model()
+
+
+# ======================
+# Reentrenamiento en background
+# ======================
+# MODEL_RETRAIN_INTERVAL_S=0 lo desactiva (queda POST /model/retrain)
+@app.on_event("startup")
+def start_model_retrain():
+    from app.models.retrain import get_retrain_service
+
+    get_retrain_service().start()
+
+
+@app.on_event("shutdown")
+def stop_model_retrain():
+    from app.models.retrain import get_retrain_service
+
+    get_retrain_service().stop()
+
+
+# ======================
+# Warmup régimen 4h / 1d
+# ======================
+# REGIME_WARM_UNIVERSE=0 lo desactiva (corre en segundo plano)
+@app.on_event("startup")
+def warm_regimes():
+    import threading
+
+    from app.ai.regime_cache import REGIME_WARM_UNIVERSE, warm_regime_cache
+
+    if REGIME_WARM_UNIVERSE <= 0:
+        return
+
+    threading.Thread(target=warm_regime_cache, name="regime-warmup", daemon=True).start()
+
 # ======================
 # Schemas (NO TOCAR)
 # ======================
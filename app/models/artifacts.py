@@ -0,0 +1,176 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List
+
+# ============================
+# Store de modelos versionados
+# ============================
+# Layout:
+#   <ARTIFACT_DIR>/<name>/<version>/model.pkl
+#   <ARTIFACT_DIR>/<name>/<version>/meta.json   (features, ventana, métricas, sha256)
+#   <ARTIFACT_DIR>/<name>/ACTIVE                (versión activa)
+# Cada versión se escribe en un directorio temporal y se publica con un
+# rename atómico; ACTIVE también se reemplaza atómicamente.
+ARTIFACT_DIR = Path(os.getenv("MODEL_ARTIFACT_DIR", "app/models/artifacts"))
+
+DEFAULT_MODEL_NAME = "global"
+
+MODEL_FILE = "model.pkl"
+META_FILE = "meta.json"
+ACTIVE_FILE = "ACTIVE"
+
+
+class ArtifactError(RuntimeError):
+    pass
+
+
+@dataclass
+class ModelArtifact:
+    name: str
+    version: str
+    path: Path
+    meta: Dict[str, Any] = field(default_factory=dict)
+    model: Any = None
+
+    @property
+    def feature_columns(self) -> List[str]:
+        return list(self.meta.get("feature_columns", []))
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _name_dir(name: str, root: Path | None = None) -> Path:
+    return (root or ARTIFACT_DIR) / str(name)
+
+
+def _atomic_write(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    with os.fdopen(fd, "w") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def _new_version(name_dir: Path) -> str:
+    version = time.strftime("%Y%m%dT%H%M%S")
+    n = 1
+    candidate = version
+    while (name_dir / candidate).exists():
+        n += 1
+        candidate = f"{version}-{n}"
+    return candidate
+
+
+# ============================
+# Guardar / activar
+# ============================
+def save_model(
+    model: Any,
+    name: str = DEFAULT_MODEL_NAME,
+    meta: Dict[str, Any] | None = None,
+    activate: bool = True,
+    root: Path | None = None,
+) -> ModelArtifact:
+    """
+    Serializa `model` como nueva versión de `name` (pickle + meta.json).
+    meta: training (symbol, timeframe, start, end, rows), metrics, etc.
+    """
+    name_dir = _name_dir(name, root)
+    name_dir.mkdir(parents=True, exist_ok=True)
+
+    payload = pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)
+    version = _new_version(name_dir)
+
+    full_meta = {
+        "name": str(name),
+        "version": version,
+        "created_at": int(time.time() * 1000),
+        "model_class": f"{type(model).__module__}.{type(model).__qualname__}",
+        "feature_columns": list(getattr(model, "feature_columns", [])),
+        "sha256": _sha256(payload),
+        "size_bytes": len(payload),
+        "python": sys.version.split()[0],
+        **(meta or {}),
+    }
+
+    tmp_dir = Path(tempfile.mkdtemp(dir=name_dir, prefix=".tmp-"))
+    try:
+        (tmp_dir / MODEL_FILE).write_bytes(payload)
+        (tmp_dir / META_FILE).write_text(json.dumps(full_meta, indent=2, default=str))
+        os.replace(tmp_dir, name_dir / version)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    if activate:
+        activate_version(name, version, root=root)
+
+    return ModelArtifact(name=str(name), version=version, path=name_dir / version, meta=full_meta, model=model)
+
+
+def activate_version(name: str, version: str, root: Path | None = None) -> None:
+    name_dir = _name_dir(name, root)
+    if not (name_dir / version / META_FILE).exists():
+        raise ArtifactError(f"Unknown model version: {name}/{version}")
+    _atomic_write(name_dir / ACTIVE_FILE, version)
+
+
+def active_version(name: str = DEFAULT_MODEL_NAME, root: Path | None = None) -> str | None:
+    path = _name_dir(name, root) / ACTIVE_FILE
+    try:
+        version = path.read_text().strip()
+    except FileNotFoundError:
+        return None
+    return version or None
+
+
+def list_versions(name: str = DEFAULT_MODEL_NAME, root: Path | None = None) -> List[str]:
+    name_dir = _name_dir(name, root)
+    if not name_dir.exists():
+        return []
+    return sorted(p.name for p in name_dir.iterdir() if p.is_dir() and (p / META_FILE).exists())
+
+
+# ============================
+# Cargar
+# ============================
+def read_meta(name: str = DEFAULT_MODEL_NAME, version: str | None = None, root: Path | None = None) -> Dict[str, Any]:
+    version = version or active_version(name, root)
+    if version is None:
+        raise ArtifactError(f"No active model for {name}")
+    path = _name_dir(name, root) / version / META_FILE
+    try:
+        return json.loads(path.read_text())
+    except FileNotFoundError:
+        raise ArtifactError(f"Unknown model version: {name}/{version}")
+
+
+def load_model(name: str = DEFAULT_MODEL_NAME, version: str | None = None, root: Path | None = None) -> ModelArtifact:
+    """
+    Carga la versión pedida (o la activa) verificando el sha256.
+    """
+    meta = read_meta(name, version, root)
+    version = meta["version"]
+    path = _name_dir(name, root) / version
+
+    payload = (path / MODEL_FILE).read_bytes()
+    if _sha256(payload) != meta.get("sha256"):
+        raise ArtifactError(f"Checksum mismatch for model {name}/{version}")
+
+    model = pickle.loads(payload)
+
+    return ModelArtifact(name=str(name), version=version, path=path, meta=meta, model=model)
+
+
+def has_active_model(name: str = DEFAULT_MODEL_NAME, root: Path | None = None) -> bool:
+    return active_version(name, root) is not None
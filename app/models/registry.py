@@ -1,28 +1,359 @@
-from app.models.logistic_signal_model import LogisticSignalModel
-from app.data.loaders import load_market_data
-from app.data.features import add_features
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from app.core.logger import get_logger
+from app.data.cache import BoundedCache
+from app.data.dataset import prepare_dataset
+from app.data.timeframes import now_ms
+from app.models.artifacts import (
+    ARTIFACT_DIR,
+    DEFAULT_MODEL_NAME,
+    ArtifactError,
+    ModelArtifact,
+    active_version,
+    has_active_model,
+    list_versions,
+    load_model,
+)
+
+logger = get_logger(__name__)
+
+# ============================
+# Modelo activo
+# ============================
+# Se carga del artifact store (scripts/train_model.py) en milisegundos.
+# Solo si no hay NINGÚN artifact activo se entrena uno (y se guarda) como
+# fallback: en línea en los scripts, en un thread en la API
+# (start_active_model). Si la versión activa está corrupta no se entrena ni
+# se toca ACTIVE: se sirve la versión válida anterior o ninguna.
+# El reentrenamiento en background (app.models.retrain) publica versiones
+# nuevas con install_artifact.
+FALLBACK_TRAIN_LIMIT = 500
+
+# reintento del entrenamiento fallback en background (ej. Binance caído)
+FALLBACK_RETRY_S = float(os.getenv("MODEL_FALLBACK_RETRY_S", "60"))
+
+# una sola referencia (modelo + meta): se reemplaza con una asignación
+_active_artifact: ModelArtifact | None = None
+_lock = threading.Lock()
+
+# False en la API: el request path nunca entrena
+_inline_fallback = True
+_fallback_thread: threading.Thread | None = None
+
+
+class ModelUnavailable(ArtifactError):
+    """
+    Todavía no hay modelo activo (store vacío o artifact inservible).
+    """
+
+
+def _fallback_artifact(name: str = DEFAULT_MODEL_NAME) -> ModelArtifact:
+    from app.models.training import train_and_save
+
+    logger.warning("[MODEL] no artifact found, training fallback model")
+    return train_and_save(limit=FALLBACK_TRAIN_LIMIT, name=name)
+
+
+def _load_valid(name: str) -> ModelArtifact:
+    """
+    Versión activa; si no se puede cargar, la válida más reciente anterior.
+    ACTIVE no se modifica (lo decide el operador).
+    """
+    try:
+        return load_model(name)
+    except Exception as e:
+        error = e
+        logger.error(f"[MODEL] active version of {name} is unusable: {e}")
+
+    active = active_version(name)
+    for version in reversed(list_versions(name)):
+        if active is not None and version >= active:
+            continue
+        try:
+            artifact = load_model(name, version)
+        except Exception:
+            continue
+        logger.error(f"[MODEL] serving previous version {name}/{version}, ACTIVE still points to {active}")
+        return artifact
+
+    raise ArtifactError(f"No usable version of {name}: {error}")
+
+
+def load_active_model(name: str = DEFAULT_MODEL_NAME, train_fallback: bool = True) -> ModelArtifact:
+    """
+    Carga (o recarga) la versión activa de `name`.
+    Store vacío: entrena el fallback (train_fallback) o lanza ModelUnavailable.
+    Artifact corrupto sin versión anterior válida: ArtifactError.
+    """
+    if has_active_model(name):
+        artifact = _load_valid(name)
+    elif train_fallback:
+        artifact = _fallback_artifact(name)
+    else:
+        raise ModelUnavailable(f"No model artifact for {name}")
+
+    install_artifact(artifact)
+
+    logger.info(f"[MODEL] loaded {artifact.name}/{artifact.version}")
+    return artifact
+
+
+def _fallback_loop(name: str, retry_s: float) -> None:
+    while _active_artifact is None:
+        if has_active_model(name):
+            # alguien guardó una versión mientras tanto (train_model.py):
+            # la carga el próximo get_active_artifact
+            return
+        try:
+            install_artifact(_fallback_artifact(name))
+            logger.info(f"[MODEL] fallback model installed: {_active_artifact.version}")
+            return
+        except Exception as e:
+            logger.error(f"[MODEL] fallback training failed, retrying in {retry_s:g}s: {e}")
+            time.sleep(retry_s)
+
+
+def start_active_model(name: str = DEFAULT_MODEL_NAME, retry_s: float = FALLBACK_RETRY_S) -> None:
+    """
+    Arranque de la API: carga la versión activa sin entrenar en el request path.
+    - store vacío: el fallback se entrena en un thread (reintenta cada retry_s)
+    - artifact inservible: se loguea y ACTIVE queda como está
+    Mientras no haya modelo, get_active_artifact lanza ModelUnavailable.
+    """
+    global _inline_fallback, _fallback_thread
+
+    _inline_fallback = False
+    try:
+        load_active_model(name, train_fallback=False)
+    except ModelUnavailable:
+        with _lock:
+            if _fallback_thread is None:
+                _fallback_thread = threading.Thread(
+                    target=_fallback_loop, args=(name, retry_s), name="model-fallback", daemon=True
+                )
+                _fallback_thread.start()
+    except Exception as e:
+        logger.error(f"[MODEL] no model loaded at startup: {e}")
+
+
+def install_artifact(artifact: ModelArtifact) -> ModelArtifact:
+    """
+    Hot-swap del modelo activo: una sola asignación, los lectores ven el
+    anterior o el nuevo (nunca uno a medias) y no toman ningún lock.
+    SignalEngine guarda el modelo al crearse, así que los requests en
+    curso terminan con el que empezaron.
+    """
+    global _active_artifact
+
+    _active_artifact = artifact
+    return artifact
+
+
+def get_active_artifact() -> ModelArtifact:
+    """
+    Artifact activo (modelo + meta de la MISMA versión).
+    Sin modelo instalado se intenta leer del store (milisegundos); en la API
+    nunca se entrena aquí: ModelUnavailable hasta que haya uno.
+    """
+    artifact = _active_artifact
+    if artifact is None:
+        with _lock:
+            if _active_artifact is None:
+                try:
+                    load_active_model(train_fallback=_inline_fallback)
+                except ModelUnavailable:
+                    raise
+                except ArtifactError as e:
+                    raise ModelUnavailable(str(e)) from e
+            artifact = _active_artifact
+
+    return artifact
 
-_active_model = None
 
 def get_active_model():
-    global _active_model
+    return get_active_artifact().model
+
+
+def get_active_artifact_meta() -> dict:
+    artifact = _active_artifact
+    if artifact is None:
+        return {
+            "loaded": False,
+            "fallback_training": _fallback_thread is not None and _fallback_thread.is_alive(),
+        }
+    return {
+        "loaded": True,
+        "name": artifact.name,
+        "version": artifact.version,
+        "feature_columns": artifact.feature_columns,
+        "training": artifact.meta.get("training", {}),
+        "metrics": artifact.meta.get("metrics", {}),
+    }
+
+
+# ============================
+# Modelos por (símbolo | cluster, timeframe)
+# ============================
+# Nombres en el artifact store:
+#   <SYMBOL>_<tf>    (ej. BTCUSDT_4h)   modelo del símbolo
+#   <cluster>_<tf>   (ej. majors_1h)    modelo del grupo (clusters.json)
+#   global_<tf>                         modelo del timeframe
+# Si ninguno existe se usa el modelo activo global (get_active_model).
+# Se cargan a demanda y viven en un LRU acotado por bytes (tamaño del
+# pickle); las entradas vencen a MODEL_CACHE_TTL_S para tomar versiones
+# nuevas. Los nombres inexistentes también se cachean (miss barato).
+MODEL_CACHE_MAX_BYTES = int(os.getenv("MODEL_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+MODEL_CACHE_TTL_S = float(os.getenv("MODEL_CACHE_TTL_S", "600"))
+
+# {"BTCUSDT": "majors", "ETHUSDT": "majors", ...}
+MODEL_CLUSTERS_FILE = Path(os.getenv("MODEL_CLUSTERS_FILE", str(ARTIFACT_DIR / "clusters.json")))
+
+
+def model_name(key: str, timeframe: str) -> str:
+    return f"{key}_{timeframe}"
+
+
+class ModelEntry:
+    __slots__ = ("artifact", "nbytes")
+
+    def __init__(self, artifact: ModelArtifact | None):
+        self.artifact = artifact
+        # tamaño del pickle como aproximación del modelo en memoria
+        size = int(artifact.meta.get("size_bytes", 0) or 0) if artifact is not None else 0
+        self.nbytes = size + 128
+
+
+class ModelRegistry:
+    def __init__(
+        self,
+        max_bytes: int = MODEL_CACHE_MAX_BYTES,
+        ttl_s: float = MODEL_CACHE_TTL_S,
+        root: Path | None = None,
+        clusters_file: Path | None = None,
+    ):
+        self._cache = BoundedCache(max_bytes)
+        self.ttl_ms = int(ttl_s * 1000)
+        self.root = root
+        self.clusters_file = Path(clusters_file) if clusters_file else MODEL_CLUSTERS_FILE
+        self._clusters: Dict[str, str] | None = None
+
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+        self.loads = 0
+        self.load_failures = 0
+        self.fallbacks = 0
+        self.resolved: Dict[str, int] = {}
+
+    def _name_lock(self, name: str) -> threading.Lock:
+        with self._locks_guard:
+            lock = self._locks.get(name)
+            if lock is None:
+                lock = threading.Lock()
+                self._locks[name] = lock
+            return lock
+
+    def clusters(self) -> Dict[str, str]:
+        if self._clusters is None:
+            try:
+                data = json.loads(self.clusters_file.read_text())
+                self._clusters = {str(k).upper(): str(v) for k, v in data.items()}
+            except FileNotFoundError:
+                self._clusters = {}
+            except Exception as e:
+                logger.warning(f"[MODEL] invalid clusters file {self.clusters_file}: {e}")
+                self._clusters = {}
+        return self._clusters
+
+    def candidates(self, symbol: str | None, timeframe: str | None) -> List[str]:
+        """
+        Nombres a probar, del más específico al más general.
+        """
+        if not timeframe:
+            return []
+
+        names = []
+        if symbol:
+            symbol = str(symbol).upper()
+            names.append(model_name(symbol, timeframe))
+            cluster = self.clusters().get(symbol)
+            if cluster:
+                names.append(model_name(cluster, timeframe))
+        names.append(model_name(DEFAULT_MODEL_NAME, timeframe))
+        return names
+
+    def _load(self, name: str) -> ModelArtifact | None:
+        # lock por nombre: un solo thread carga cada modelo
+        with self._name_lock(name):
+            entry = self._cache.get(name)
+            if entry is not None:
+                return entry.artifact
+
+            artifact = None
+            if has_active_model(name, self.root):
+                try:
+                    artifact = load_model(name, root=self.root)
+                    self.loads += 1
+                    logger.info(f"[MODEL] loaded {artifact.name}/{artifact.version}")
+                except (ArtifactError, FileNotFoundError) as e:
+                    self.load_failures += 1
+                    logger.warning(f"[MODEL] could not load {name}: {e}")
+
+            self._cache.set(name, ModelEntry(artifact), expires_at=now_ms() + self.ttl_ms)
+            return artifact
+
+    def resolve(self, symbol: str | None = None, timeframe: str | None = None) -> ModelArtifact | None:
+        """
+        Artifact más específico para (symbol, timeframe); None = usar el global.
+        """
+        for name in self.candidates(symbol, timeframe):
+            artifact = self._load(name)
+            if artifact is not None:
+                self.resolved[name] = self.resolved.get(name, 0) + 1
+                return artifact
+
+        self.fallbacks += 1
+        return None
+
+    def get_model(self, symbol: str | None = None, timeframe: str | None = None):
+        artifact = self.resolve(symbol, timeframe)
+        if artifact is None:
+            return get_active_model()
+        return artifact.model
+
+    def clear(self) -> None:
+        self._cache.clear()
+        self._clusters = None
 
-    if _active_model is None:
-        model = LogisticSignalModel()
+    def stats(self) -> dict:
+        return {
+            **self._cache.stats(),
+            "loads": self.loads,
+            "load_failures": self.load_failures,
+            "fallbacks": self.fallbacks,
+            "resolved": dict(self.resolved),
+        }
 
-        # === AUTO-TRAIN ===
-        df = load_market_data("BTCUSDT", "1h", 500)
-        df = add_features(df)
-        print(df.columns)
 
-        X = df[model.feature_columns]
-        y = (df["close"].shift(-1) > df["close"]).astype(int)
+# ============================
+# Registry global
+# ============================
+_MODELS = ModelRegistry()
 
-        X = X.iloc[:-1]
-        y = y.iloc[:-1]
 
-        model.train(X, y)
+def get_model_registry() -> ModelRegistry:
+    return _MODELS
 
-        _active_model = model
 
-    return _active_model
+def get_model(symbol: str | None = None, timeframe: str | None = None):
+    """
+    Modelo para (symbol, timeframe); sin timeframe = modelo activo global.
+    """
+    if not timeframe:
+        return get_active_model()
+    return _MODELS.get_model(symbol, timeframe)
@@ -0,0 +1,193 @@
+import os
+import threading
+import time
+from typing import Any, Dict
+
+from app.core.logger import get_logger
+from app.models.artifacts import DEFAULT_MODEL_NAME, save_model
+from app.models.registry import get_active_artifact, install_artifact
+from app.models.training import (
+    DEFAULT_TRAIN_LIMIT,
+    DEFAULT_TRAIN_SYMBOL,
+    DEFAULT_TRAIN_TIMEFRAME,
+    MIN_EVAL_ROWS,
+    compare_out_of_sample,
+    train_model,
+)
+
+logger = get_logger(__name__)
+
+# ============================
+# Reentrenamiento en background
+# ============================
+# Un thread entrena un candidato con datos frescos cada RETRAIN_INTERVAL_S
+# (o a pedido), lo compara con el modelo activo sobre las velas posteriores
+# al entrenamiento del activo (fuera de muestra para los dos) y, si no
+# empeora, lo guarda como versión activa y lo publica con install_artifact.
+# Nada de esto corre en el request path.
+RETRAIN_INTERVAL_S = float(os.getenv("MODEL_RETRAIN_INTERVAL_S", "86400"))  # 0 = solo a pedido
+
+# candidato aceptado si log_loss_nuevo <= log_loss_actual * (1 + tolerancia)
+RETRAIN_TOLERANCE = float(os.getenv("MODEL_RETRAIN_TOLERANCE", "0.0"))
+
+# velas posteriores al entrenamiento del activo necesarias para comparar
+RETRAIN_MIN_EVAL_ROWS = int(os.getenv("MODEL_RETRAIN_MIN_EVAL_ROWS", str(MIN_EVAL_ROWS)))
+
+
+class RetrainService:
+    def __init__(
+        self,
+        symbol: str = DEFAULT_TRAIN_SYMBOL,
+        timeframe: str = DEFAULT_TRAIN_TIMEFRAME,
+        limit: int = DEFAULT_TRAIN_LIMIT,
+        name: str = DEFAULT_MODEL_NAME,
+        tolerance: float = RETRAIN_TOLERANCE,
+        min_eval_rows: int = RETRAIN_MIN_EVAL_ROWS,
+    ):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.limit = int(limit)
+        self.name = name
+        self.tolerance = float(tolerance)
+        self.min_eval_rows = int(min_eval_rows)
+
+        self._run_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.interval_s = 0.0
+
+        self.runs = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.skipped = 0
+        self.failures = 0
+        self.last: Dict[str, Any] | None = None
+
+    # ============================
+    # Validación
+    # ============================
+    def _accept(self, candidate: Dict[str, float], current: Dict[str, float]) -> bool:
+        new_loss = candidate.get("log_loss")
+        if new_loss is None:
+            return False
+        old_loss = current.get("log_loss")
+        if old_loss is None:
+            # el activo no puede evaluarse (features incompatibles, roto)
+            return True
+        return new_loss <= old_loss * (1 + self.tolerance)
+
+    def _retrain(self, df=None) -> Dict[str, Any]:
+        if df is None:
+            from app.data.loaders import load_binance_klines
+
+            df = load_binance_klines(self.symbol, self.timeframe, self.limit)
+
+        self.runs += 1
+        model, meta = train_model(df, symbol=self.symbol, timeframe=self.timeframe)
+
+        # solo velas posteriores al entrenamiento del activo (fuera de muestra
+        # para los dos); el candidato de evaluación se entrena con lo anterior
+        active = get_active_artifact()
+        current_version = active.version
+        after = active.meta.get("training", {}).get("end")
+
+        validation = compare_out_of_sample(active.model, df, after=after, min_rows=self.min_eval_rows)
+        validation.update({"current_version": current_version, "tolerance": self.tolerance})
+
+        if not validation["candidate"]:
+            self.skipped += 1
+            logger.info(f"[RETRAIN] skipped: {validation['rows']} out-of-sample rows after {after}")
+            return {"status": "skipped", "validation": validation}
+
+        if not self._accept(validation["candidate"], validation["current"]):
+            self.rejected += 1
+            logger.info(f"[RETRAIN] candidate rejected vs {current_version}")
+            return {"status": "rejected", "validation": validation}
+
+        artifact = save_model(model, name=self.name, meta={**meta, "validation": validation}, activate=True)
+        install_artifact(artifact)
+        self.accepted += 1
+        logger.info(f"[RETRAIN] {current_version} -> {artifact.name}/{artifact.version}")
+
+        return {"status": "accepted", "version": artifact.version, "validation": validation}
+
+    # ============================
+    # Ejecución
+    # ============================
+    def retrain(self, df=None) -> Dict[str, Any]:
+        """
+        Entrena, valida y (si pasa) publica un modelo nuevo. Bloqueante:
+        lo usan el loop y trigger(). Una sola corrida a la vez.
+        df: OHLCV ya cargado (default: descarga `limit` velas).
+        """
+        if not self._run_lock.acquire(blocking=False):
+            return {"status": "busy"}
+
+        started = time.time()
+        try:
+            result = self._retrain(df)
+        except Exception as e:
+            self.failures += 1
+            logger.warning(f"[RETRAIN] failed: {e}")
+            result = {"status": "failed", "error": str(e)}
+        finally:
+            self._run_lock.release()
+
+        result["elapsed_ms"] = int((time.time() - started) * 1000)
+        result["finished_at"] = int(time.time() * 1000)
+        self.last = result
+        return result
+
+    def trigger(self) -> Dict[str, Any]:
+        """
+        Reentrenamiento a pedido en un thread aparte (no bloquea al caller).
+        """
+        if self._run_lock.locked():
+            return {"status": "busy"}
+
+        threading.Thread(target=self.retrain, name="model-retrain-once", daemon=True).start()
+        return {"status": "started"}
+
+    def _loop(self, interval_s: float) -> None:
+        # el modelo recién cargado está fresco: primera corrida tras un intervalo
+        while not self._stop.wait(interval_s):
+            self.retrain()
+
+    def start(self, interval_s: float = RETRAIN_INTERVAL_S) -> None:
+        if self._thread is not None or interval_s <= 0:
+            return
+        self.interval_s = float(interval_s)
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._loop, args=(self.interval_s,), name="model-retrain", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "running": self._run_lock.locked(),
+            "background": self._thread is not None,
+            "interval_s": self.interval_s,
+            "runs": self.runs,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "skipped": self.skipped,
+            "failures": self.failures,
+            "last": self.last,
+        }
+
+
+# ============================
+# Servicio global
+# ============================
+_SERVICE = RetrainService()
+
+
+def get_retrain_service() -> RetrainService:
+    return _SERVICE
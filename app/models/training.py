@@ -0,0 +1,179 @@
+from typing import Any, Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.data.features import add_features
+from app.models.artifacts import DEFAULT_MODEL_NAME, ModelArtifact, save_model
+from app.models.logistic_signal_model import LogisticSignalModel
+
+# ============================
+# Entrenamiento offline
+# ============================
+# scripts/train_model.py -> train_and_save -> artifact store.
+# La API solo CARGA el artifact activo (app.models.registry).
+DEFAULT_TRAIN_SYMBOL = "BTCUSDT"
+DEFAULT_TRAIN_TIMEFRAME = "1h"
+DEFAULT_TRAIN_LIMIT = 1500
+
+# fracción final de la serie usada para validar
+HOLDOUT = 0.2
+
+# filas fuera de muestra mínimas para comparar candidato vs activo
+MIN_EVAL_ROWS = 24
+
+
+def build_training_set(df: pd.DataFrame, feature_columns) -> Tuple[pd.DataFrame, pd.Series, pd.DataFrame]:
+    """
+    X = features del modelo, y = 1 si el close siguiente sube.
+    """
+    df = add_features(df)
+
+    X = df[list(feature_columns)]
+    y = (df["close"].shift(-1) > df["close"]).astype(int)
+
+    return X.iloc[:-1], y.iloc[:-1], df.iloc[:-1]
+
+
+def _metrics(model, X: pd.DataFrame, y: pd.Series) -> Dict[str, float]:
+    if len(X) == 0:
+        return {}
+
+    proba = np.asarray(model.predict_proba(X))[:, 1]
+    pred = (proba >= 0.5).astype(int)
+    p = np.clip(proba, 1e-15, 1 - 1e-15)
+    y = y.to_numpy()
+
+    return {
+        "rows": int(len(y)),
+        "accuracy": float((pred == y).mean()),
+        "log_loss": float(-np.mean(y * np.log(p) + (1 - y) * np.log(1 - p))),
+        "base_rate": float(y.mean()),
+    }
+
+
+def _split(rows: int, holdout: float) -> int:
+    return int(rows * (1 - holdout))
+
+
+def _first_after(frame: pd.DataFrame, after) -> int | None:
+    """
+    Primera fila con open_time posterior a `after` (meta training.end).
+    """
+    if after is None or "open_time" not in frame.columns:
+        return None
+    col = frame["open_time"]
+    try:
+        bound = pd.Timestamp(after) if pd.api.types.is_datetime64_any_dtype(col) else int(after)
+    except (TypeError, ValueError):
+        return None
+    return int((col <= bound).sum())
+
+
+def compare_out_of_sample(
+    current,
+    df: pd.DataFrame,
+    after=None,
+    holdout: float = HOLDOUT,
+    min_rows: int = MIN_EVAL_ROWS,
+) -> Dict[str, Any]:
+    """
+    Candidato vs modelo `current` sobre filas que ninguno vio:
+    - after: fin del entrenamiento de `current` (meta training.end); se
+      evalúa solo lo posterior. Sin after, el tramo final `holdout`.
+    - si `after` deja menos de 50 filas para entrenar (activo más viejo que
+      toda la ventana) se usa también el tramo final `holdout`: sigue
+      siendo posterior a `after`, fuera de muestra para los dos.
+    - el candidato de evaluación se entrena solo con las filas anteriores.
+    Con menos de `min_rows` filas evaluables devuelve métricas vacías.
+    """
+    candidate = LogisticSignalModel()
+    X, y, frame = build_training_set(df, candidate.feature_columns)
+
+    split = _first_after(frame, after)
+    mode = "after"
+    if split is None or split < 50:
+        split = max(split or 0, _split(len(X), holdout))
+        mode = "holdout"
+
+    out: Dict[str, Any] = {"rows": int(len(X) - split), "after": after, "split": mode, "candidate": {}, "current": {}}
+    if out["rows"] < min_rows or split < 50 or y.iloc[:split].nunique() < 2:
+        return out
+
+    candidate.train(X.iloc[:split], y.iloc[:split])
+    out["candidate"] = _metrics(candidate, X.iloc[split:], y.iloc[split:])
+
+    # add_features descarta las mismas filas para cualquier set de columnas
+    try:
+        Xc, yc, _ = build_training_set(df, current.feature_columns)
+        out["current"] = _metrics(current, Xc.iloc[split:], yc.iloc[split:])
+    except Exception as e:
+        # activo incompatible / roto: queda sin métricas
+        out["current_error"] = str(e)
+
+    return out
+
+
+def _window(frame: pd.DataFrame) -> Dict[str, Any]:
+    if "open_time" not in frame.columns or frame.empty:
+        return {}
+    return {"start": str(frame["open_time"].iloc[0]), "end": str(frame["open_time"].iloc[-1])}
+
+
+def train_model(
+    df: pd.DataFrame,
+    symbol: str = DEFAULT_TRAIN_SYMBOL,
+    timeframe: str = DEFAULT_TRAIN_TIMEFRAME,
+    holdout: float = HOLDOUT,
+) -> Tuple[LogisticSignalModel, Dict[str, Any]]:
+    """
+    Entrena sobre df (OHLCV). Métricas sobre el tramo final (holdout);
+    el modelo devuelto se reentrena con TODA la serie.
+    """
+    model = LogisticSignalModel()
+    X, y, frame = build_training_set(df, model.feature_columns)
+
+    if len(X) < 50 or y.nunique() < 2:
+        raise ValueError(f"Not enough training data for {symbol} {timeframe}: {len(X)} rows")
+
+    split = _split(len(X), holdout)
+    metrics: Dict[str, Any] = {}
+
+    if 0 < split < len(X) and y.iloc[:split].nunique() == 2:
+        model.train(X.iloc[:split], y.iloc[:split])
+        metrics = {"train": _metrics(model, X.iloc[:split], y.iloc[:split]), "holdout": _metrics(model, X.iloc[split:], y.iloc[split:])}
+
+    model.train(X, y)
+
+    meta = {
+        "training": {
+            "symbol": symbol,
+            "timeframe": timeframe,
+            "rows": int(len(X)),
+            "holdout": float(holdout),
+            **_window(frame),
+        },
+        "metrics": metrics,
+    }
+
+    return model, meta
+
+
+def train_and_save(
+    symbol: str = DEFAULT_TRAIN_SYMBOL,
+    timeframe: str = DEFAULT_TRAIN_TIMEFRAME,
+    limit: int = DEFAULT_TRAIN_LIMIT,
+    name: str = DEFAULT_MODEL_NAME,
+    activate: bool = True,
+    df: pd.DataFrame | None = None,
+) -> ModelArtifact:
+    """
+    Descarga (o usa df), entrena y guarda una nueva versión en el store.
+    """
+    if df is None:
+        from app.data.loaders import load_binance_klines
+
+        df = load_binance_klines(symbol, timeframe, limit)
+
+    model, meta = train_model(df, symbol=symbol, timeframe=timeframe)
+    return save_model(model, name=name, meta=meta, activate=activate)
@@ -1,3 +1,5 @@
+import numpy as np
+
 from app.core.signal_types import SignalType
 
 
@@ -31,3 +33,14 @@ def compute_stop_loss(df, signal: SignalType) -> float:
     # HOLD institucional
     return round(close - atr, 4)
 
+
+def compute_stop_loss_series(close, atr, side) -> np.ndarray:
+    """
+    compute_stop_loss para cada vela (backtests).
+    side: +1 BUY, -1 SELL, 0 HOLD.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    atr = np.asarray(atr, dtype=np.float64)
+
+    return np.round(np.where(np.asarray(side) < 0, close + atr, close - atr), 4)
+
@@ -1,3 +1,5 @@
+import numpy as np
+
 from app.core.signal_types import SignalType
 
 RISK_REWARD = 2.0
@@ -20,3 +22,20 @@ def compute_take_profit(price: float, stop_loss: float, signal: SignalType) -> f
 
     # HOLD institucional
     return round(price + risk, 4)
+
+
+def compute_take_profit_series(price, stop_loss, side) -> np.ndarray:
+    """
+    compute_take_profit para cada vela (backtests).
+    side: +1 BUY, -1 SELL, 0 HOLD.
+    """
+    price = np.asarray(price, dtype=np.float64)
+    side = np.asarray(side)
+    risk = np.abs(price - np.asarray(stop_loss, dtype=np.float64))
+
+    tp = np.where(
+        side > 0,
+        price + risk * RISK_REWARD,
+        np.where(side < 0, price - risk * RISK_REWARD, price + risk),
+    )
+    return np.round(tp, 4)
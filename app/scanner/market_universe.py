@@ -1,54 +1,28 @@
 from typing import List
-import time
 import pandas as pd
-from binance.client import Client
+from app.data.exchange_client import get_shared_client
+from app.data.exchange_snapshot import get_snapshot
+from app.data.kline_store import sync_klines
+from app.data.stream import read_stream
 
 # ==========================
-# CACHE USDT UNIVERSE
+# USDT UNIVERSE (snapshot compartido)
 # ==========================
-_USDT_CACHE: List[str] = []
-_USDT_CACHE_TS: float = 0.0
-_USDT_CACHE_TTL = 60 * 10  # 10 minutos
+_FALLBACK_PAIRS = ["BTCUSDT", "ETHUSDT", "BNBUSDT", "SOLUSDT", "XRPUSDT"]
 
 
 def get_usdt_pairs() -> List[str]:
     """
     Devuelve pares USDT activos en Binance Spot.
-    Usa cache para NO llamar get_exchange_info() en cada scan.
+    Sale del snapshot de exchangeInfo en memoria (NO llama a Binance en cada scan).
     """
-    global _USDT_CACHE, _USDT_CACHE_TS
-
-    now = time.time()
-
-    # ✅ cache válido
-    if _USDT_CACHE and (now - _USDT_CACHE_TS) < _USDT_CACHE_TTL:
-        return _USDT_CACHE
-
-    client = Client(api_key=None, api_secret=None)
-
-    # ✅ blindaje por timeout / caídas
+    # ✅ blindaje por timeout / caídas (el snapshot ya sirve la copia previa si existe)
     try:
-        info = client.get_exchange_info()
+        return get_snapshot().tradable("USDT", spot_only=True)
     except Exception as e:
-        # fallback si Binance falla
-        print(f"[UNIVERSE ERROR] get_exchange_info failed: {e}")
-        if _USDT_CACHE:
-            return _USDT_CACHE
-        return ["BTCUSDT", "ETHUSDT", "BNBUSDT", "SOLUSDT", "XRPUSDT"]
-
-    symbols: List[str] = []
-    for s in info.get("symbols", []):
-        if (
-            s.get("quoteAsset") == "USDT"
-            and s.get("status") == "TRADING"
-            and s.get("isSpotTradingAllowed", False)
-        ):
-            symbols.append(s["symbol"])
-
-    # guardar cache
-    _USDT_CACHE = symbols
-    _USDT_CACHE_TS = now
-    return symbols
+        # fallback si Binance falla y nunca hubo snapshot
+        print(f"[UNIVERSE ERROR] exchange snapshot failed: {e}")
+        return list(_FALLBACK_PAIRS)
 
 
 def load_market_data(
@@ -71,44 +45,22 @@ def load_market_data(
     if limit <= 0:
         limit = 200
 
-    client = Client(api_key=None, api_secret=None)
+    # ✅ Stream en memoria (si está activo)
+    data = read_stream(symbol, timeframe, limit)
+    if data is not None:
+        return data.to_frame()
+
+    client = get_shared_client()
 
     try:
-        klines = client.get_klines(
-            symbol=symbol,
-            interval=timeframe,
-            limit=limit
-        )
+        # Store local: solo se descargan las velas nuevas
+        data = sync_klines(client, symbol, timeframe, limit)
     except Exception as e:
         print(f"[KLINES ERROR] {symbol}: {e}")
         return pd.DataFrame()
 
-    if not klines:
+    if len(data) == 0:
         return pd.DataFrame()
 
-    df = pd.DataFrame(
-        klines,
-        columns=[
-            "open_time",
-            "open",
-            "high",
-            "low",
-            "close",
-            "volume",
-            "close_time",
-            "quote_asset_volume",
-            "number_of_trades",
-            "taker_buy_base",
-            "taker_buy_quote",
-            "ignore",
-        ],
-    )
-
-    # ✅ Tipos numéricos
-    df["open"] = df["open"].astype(float)
-    df["high"] = df["high"].astype(float)
-    df["low"] = df["low"].astype(float)
-    df["close"] = df["close"].astype(float)
-    df["volume"] = df["volume"].astype(float)
-
-    return df
+    # ✅ Tipos numéricos (float64 / int64 desde el decoder)
+    return data.to_frame()
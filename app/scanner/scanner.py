@@ -1,10 +1,16 @@
 import time
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Tuple
 
 from app.data.binance_client import load_market_data, get_top_usdt_pairs_by_volume
-from app.features.technicals import add_technicals
-from app.ai.regime import detect_market_regime
-from app.signals.signal_engine import generate_signal
+from app.data.resample import can_resample, resample_frame, source_limit
+from app.features.cache import get_features
+from app.features.panel import compute_panel
+from app.features.technicals import TECHNICAL_COLUMNS
+from app.ai.cross_section import compute_cross_section
+from app.ai.ranking import rank_signals
+from app.ai.regime_cache import get_regime_cache
+from app.signals.signal_engine import SignalEngine, generate_signal
 
 
 def _safe_float(x, default=0.0) -> float:
@@ -36,6 +42,80 @@ def _normalize_regime(regime_raw) -> str:
     return "neutral"
 
 
+def _resolve_regime(cached: Dict[Tuple[str, str], Any], symbol: str, timeframe: str, df):
+    """
+    Régimen vigente desde el cache o calculado (y cacheado hasta el próximo cierre).
+    """
+    regime = cached.get((symbol, timeframe))
+    if regime is None:
+        regime = get_regime_cache().update(symbol, timeframe, df)
+    return regime
+
+
+def _cross_fields(cross, symbol: str, regime: str) -> Dict[str, Any]:
+    """
+    Fuerza relativa y score de ranking precalculados (solo con panel).
+    """
+    if cross is None or symbol not in cross:
+        return {}
+    row = cross.row(symbol)
+    return {
+        "rel_strength": None if row["rel_strength"] != row["rel_strength"] else round(row["rel_strength"], 6),
+        "rank_score": round(rank_signals(regime=regime, features=row), 6),
+    }
+
+
+# ==========================
+# Prefetch concurrente (multi-timeframe)
+# ==========================
+PREFETCH_MAX_WORKERS = 8
+PREFETCH_TIMEOUT_S = 10.0
+
+
+def _prefetch_market_data(
+    requests: List[Tuple[str, str, int]],
+    max_workers: int = PREFETCH_MAX_WORKERS,
+    timeout: float = PREFETCH_TIMEOUT_S,
+) -> Dict[Tuple[str, str], Any]:
+    """
+    Descarga en paralelo todos los pares (symbol, timeframe) antes del análisis.
+    - max_workers: requests simultáneos a Binance (pool acotado)
+    - timeout: límite por request HTTP
+
+    Devuelve {(symbol, timeframe): DataFrame | Exception}.
+    Un fallo por símbolo NUNCA rompe el resto.
+    """
+    out: Dict[Tuple[str, str], Any] = {}
+    if not requests:
+        return out
+
+    workers = max(1, min(int(max_workers), len(requests)))
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scan-fetch") as pool:
+        futures = {
+            (symbol, tf): pool.submit(load_market_data, symbol=symbol, timeframe=tf, limit=limit, timeout=timeout)
+            for symbol, tf, limit in requests
+        }
+
+        for key, fut in futures.items():
+            try:
+                out[key] = fut.result()
+            except Exception as e:
+                out[key] = e
+
+    return out
+
+
+def _tail(df, limit: int):
+    """
+    Últimas `limit` velas (un timeframe compartido entre roles se descarga
+    con el límite mayor).
+    """
+    if df is None or isinstance(df, Exception) or len(df) <= limit:
+        return df
+    return df.tail(limit).reset_index(drop=True)
+
+
 def _classify_strength(prob: float) -> str:
     """
     Swing = más exigente, pero no imposible.
@@ -53,12 +133,28 @@ def scan_universe_swing(
     timeframe_macro: str = "1d",
     universe_size: int = 50,
     top_n: int = 5,
+    max_workers: int = PREFETCH_MAX_WORKERS,
+    fetch_timeout: float = PREFETCH_TIMEOUT_S,
+    resample_higher: bool = False,
+    panel: bool = False,
 ) -> Dict[str, Any]:
     """
     Scanner institucional SWING:
     - 1D = macro filtro
     - 4H = dirección
     - 1H = entrada y ejecución
+
+    Las velas de todo el universo se descargan primero en paralelo
+    (max_workers / fetch_timeout) y luego se analizan en orden.
+
+    resample_higher=True: 4H y 1D se construyen localmente desde el
+    timeframe de entrada (1 descarga por símbolo en vez de 3). Conviene
+    solo con el kline store caliente: en frío 1D x 220 desde 1H son
+    source_limit("1h", "1d", 220) = 5304 velas (6 requests paginados por
+    símbolo contra 3 del modo normal).
+
+    panel=True: los técnicos de TODO el universo (símbolos x 3 timeframes)
+    se calculan en un solo panel vectorizado en vez de un pipeline por serie.
     """
 
     t0 = time.time()
@@ -85,31 +181,147 @@ def scan_universe_swing(
 
     candidates: List[Dict[str, Any]] = []
 
+    # límites por ROL: el timeframe de entrada puede coincidir con 4h / 1d
+    timeframes = {"entry": timeframe_entry, "direction": timeframe_direction, "macro": timeframe_macro}
+    limits = {"entry": 260, "direction": 260, "macro": 220}
+
+    derive = (
+        bool(resample_higher)
+        and can_resample(timeframe_entry, timeframe_direction)
+        and can_resample(timeframe_entry, timeframe_macro)
+    )
+
+    telemetry["resampled_higher"] = derive
+    telemetry["panel"] = bool(panel)
+
+    # ✅ regímenes 4h / 1d vigentes hasta su próximo cierre: no se descargan
+    regime_cache = get_regime_cache()
+    cached_regimes: Dict[Tuple[str, str], Any] = {}
+    for symbol in symbols:
+        for tf in (timeframe_direction, timeframe_macro):
+            regime = regime_cache.get(symbol, tf)
+            if regime is not None:
+                cached_regimes[(symbol, tf)] = regime
+
+    telemetry["regime_cache_hits"] = len(cached_regimes)
+
+    def _fetch_specs(symbol: str) -> Tuple[Tuple[str, int], ...]:
+        # la serie de entrada SIEMPRE; 4h / 1d solo si su régimen no está cacheado
+        roles = [r for r in ("direction", "macro") if (symbol, timeframes[r]) not in cached_regimes]
+
+        if derive:
+            # una sola serie fina con historia suficiente para los 4H / 1D que falten
+            limit = max(
+                [limits["entry"]]
+                + [source_limit(timeframe_entry, timeframes[r], limits[r]) for r in roles]
+            )
+            return ((timeframe_entry, limit),)
+
+        # un timeframe repetido se descarga una vez (con el límite mayor)
+        per_tf: Dict[str, int] = {timeframe_entry: limits["entry"]}
+        for role in roles:
+            tf = timeframes[role]
+            per_tf[tf] = max(per_tf.get(tf, 0), limits[role])
+        return tuple(per_tf.items())
+
+    fetch_specs = {symbol: _fetch_specs(symbol) for symbol in symbols}
+
+    # ==========================
+    # 0) Prefetch multi-timeframe (concurrente)
+    # ==========================
+    frames = _prefetch_market_data(
+        [(symbol, tf, limit) for symbol in symbols for tf, limit in fetch_specs[symbol]],
+        max_workers=max_workers,
+        timeout=fetch_timeout,
+    )
+
+    # ==========================
+    # 1) Cargar multi-timeframe (ya descargado)
+    # ==========================
+    series: Dict[str, Tuple[Any, Any, Any]] = {}
+
     for symbol in symbols:
         try:
-            # ==========================
-            # 1) Cargar multi-timeframe
-            # ==========================
-            df_entry = load_market_data(symbol=symbol, timeframe=timeframe_entry, limit=260)
-            df_dir = load_market_data(symbol=symbol, timeframe=timeframe_direction, limit=260)
-            df_mac = load_market_data(symbol=symbol, timeframe=timeframe_macro, limit=220)
+            for tf, _ in fetch_specs[symbol]:
+                fetched = frames.get((symbol, tf))
+                if isinstance(fetched, Exception):
+                    raise RuntimeError(f"fetch {tf} failed: {fetched}")
+
+            if derive:
+                df_src = frames.get((symbol, timeframe_entry))
+                df_entry = df_src.tail(limits["entry"]).reset_index(drop=True)
+                df_dir = df_mac = None
+                if (symbol, timeframe_direction) not in cached_regimes:
+                    df_dir = resample_frame(df_src, timeframe_entry, timeframe_direction)
+                    df_dir = df_dir.tail(limits["direction"]).reset_index(drop=True)
+                if (symbol, timeframe_macro) not in cached_regimes:
+                    df_mac = resample_frame(df_src, timeframe_entry, timeframe_macro)
+                    df_mac = df_mac.tail(limits["macro"]).reset_index(drop=True)
+            else:
+                df_entry = _tail(frames.get((symbol, timeframe_entry)), limits["entry"])
+                df_dir = df_mac = None
+                if (symbol, timeframe_direction) not in cached_regimes:
+                    df_dir = _tail(frames.get((symbol, timeframe_direction)), limits["direction"])
+                if (symbol, timeframe_macro) not in cached_regimes:
+                    df_mac = _tail(frames.get((symbol, timeframe_macro)), limits["macro"])
 
             if df_entry is None or getattr(df_entry, "empty", True):
                 telemetry["empty_data"] += 1
                 continue
-            if df_dir is None or getattr(df_dir, "empty", True):
+            # 4h / 1d solo hacen falta si su régimen no está cacheado
+            if (symbol, timeframe_direction) not in cached_regimes and (df_dir is None or getattr(df_dir, "empty", True)):
                 telemetry["empty_data"] += 1
                 continue
-            if df_mac is None or getattr(df_mac, "empty", True):
+            if (symbol, timeframe_macro) not in cached_regimes and (df_mac is None or getattr(df_mac, "empty", True)):
                 telemetry["empty_data"] += 1
                 continue
 
-            # ==========================
-            # 2) Técnicos PRO
-            # ==========================
-            df_entry = add_technicals(df_entry)
-            df_dir = add_technicals(df_dir)
-            df_mac = add_technicals(df_mac)
+            series[symbol] = (df_entry, df_dir, df_mac)
+
+        except Exception as e:
+            telemetry["exceptions"] += 1
+            telemetry["errors"].append({"symbol": symbol, "error": str(e)})
+            continue
+
+    # ==========================
+    # 2) Técnicos PRO (panel: una pasada para todo el universo)
+    # ==========================
+    feature_panel = None
+    if panel and series:
+        try:
+            feature_panel = compute_panel(
+                {(symbol, i): df for symbol, dfs in series.items() for i, df in enumerate(dfs) if df is not None},
+                TECHNICAL_COLUMNS,
+            )
+        except Exception as e:
+            telemetry["errors"].append({"symbol": None, "error": f"panel failed: {e}"})
+
+    # ✅ cross-section del timeframe de entrada (todo el universo a la vez)
+    cross = None
+    if feature_panel is not None:
+        try:
+            cross = compute_cross_section(feature_panel, {symbol: (symbol, 0) for symbol in series})
+        except Exception as e:
+            telemetry["errors"].append({"symbol": None, "error": f"cross-section failed: {e}"})
+
+    # candidatos que pasan los filtros de régimen -> señal en batch
+    pending: Dict[str, Tuple[Any, str, str]] = {}
+    thresholds: Dict[str, float] = {}
+
+    for symbol, (df_entry, df_dir, df_mac) in series.items():
+        try:
+            if feature_panel is not None:
+                df_entry, df_dir, df_mac = (
+                    feature_panel.frame((symbol, i)) if (symbol, i) in feature_panel else None
+                    for i in range(3)
+                )
+            else:
+                # ✅ cache por serie: solo se calculan las velas nuevas
+                df_entry = get_features(symbol, timeframe_entry, df_entry)
+                if df_dir is not None:
+                    df_dir = get_features(symbol, timeframe_direction, df_dir)
+                if df_mac is not None:
+                    df_mac = get_features(symbol, timeframe_macro, df_mac)
 
             if df_entry is None or getattr(df_entry, "empty", True):
                 telemetry["empty_data"] += 1
@@ -118,8 +330,10 @@ def scan_universe_swing(
             # ==========================
             # 3) Regímenes (macro + dirección)
             # ==========================
-            regime_dir = _normalize_regime(detect_market_regime(df_dir))
-            regime_mac = _normalize_regime(detect_market_regime(df_mac))
+            # ✅ régimen direccional (misma implementación que SignalEngine),
+            # cacheado hasta el próximo cierre de 4h / 1d
+            regime_dir = _normalize_regime(_resolve_regime(cached_regimes, symbol, timeframe_direction, df_dir))
+            regime_mac = _normalize_regime(_resolve_regime(cached_regimes, symbol, timeframe_macro, df_mac))
 
             telemetry["regimes"][regime_dir] = telemetry["regimes"].get(regime_dir, 0) + 1
 
@@ -143,10 +357,35 @@ def scan_universe_swing(
             if regime_mac == "neutral":
                 base_threshold += 0.02
 
-            # ==========================
-            # 5) Generar señal (ENTRY timeframe)
-            # ==========================
-            sig = generate_signal(df=df_entry, threshold=base_threshold)
+            pending[symbol] = (df_entry, regime_dir, regime_mac)
+            thresholds[symbol] = base_threshold
+
+        except Exception as e:
+            telemetry["exceptions"] += 1
+            telemetry["errors"].append({"symbol": symbol, "error": str(e)})
+            continue
+
+    # ==========================
+    # 5) Generar señales (ENTRY timeframe): un solo predict_proba
+    # ==========================
+    signals: Dict[str, dict] = {}
+    if pending:
+        try:
+            signals = SignalEngine().generate_batch(
+                {symbol: item[0] for symbol, item in pending.items()},
+                thresholds,
+                timeframe=timeframe_entry,
+            )
+        except Exception as e:
+            telemetry["errors"].append({"symbol": None, "error": f"batch signals failed: {e}"})
+
+    for symbol, (df_entry, regime_dir, regime_mac) in pending.items():
+        try:
+            sig = signals.get(symbol)
+            if sig is None:
+                sig = generate_signal(
+                    df=df_entry, threshold=thresholds[symbol], symbol=symbol, timeframe=timeframe_entry
+                )
 
             signal = str(sig.get("signal", "HOLD")).upper()
             entry = sig.get("entry", None)
@@ -183,6 +422,7 @@ def scan_universe_swing(
                     "regime_1d": regime_mac,
                     "timeframe_entry": timeframe_entry,
                     "debug_only": True,
+                    **_cross_fields(cross, symbol, regime_dir),
                 }
                 candidates.append(item)
                 continue
@@ -218,6 +458,7 @@ def scan_universe_swing(
                 "regime_4h": regime_dir,
                 "regime_1d": regime_mac,
                 "timeframe_entry": timeframe_entry,
+                **_cross_fields(cross, symbol, regime_dir),
             }
 
             candidates.append(item)
@@ -258,7 +499,15 @@ def scan_universe_swing(
     }
 
 
-def run_market_scan(timeframe: str = "1h", universe_size: int = 50, top_n: int = 5) -> Dict[str, Any]:
+def run_market_scan(
+    timeframe: str = "1h",
+    universe_size: int = 50,
+    top_n: int = 5,
+    max_workers: int = PREFETCH_MAX_WORKERS,
+    fetch_timeout: float = PREFETCH_TIMEOUT_S,
+    resample_higher: bool = False,
+    panel: bool = False,
+) -> Dict[str, Any]:
     """
     Wrapper compatibilidad:
     Tu API vieja importa run_market_scan
@@ -270,4 +519,8 @@ def run_market_scan(timeframe: str = "1h", universe_size: int = 50, top_n: int =
         timeframe_macro="1d",
         universe_size=int(universe_size),
         top_n=int(top_n),
+        max_workers=int(max_workers),
+        fetch_timeout=float(fetch_timeout),
+        resample_higher=bool(resample_higher),
+        panel=bool(panel),
     )
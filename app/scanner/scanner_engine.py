@@ -3,7 +3,7 @@
 from typing import List, Dict, Any, Tuple
 
 from app.data.loaders import load_market_data
-from app.features.technicals import add_technicals
+from app.features.cache import get_features
 from app.signals.signal_engine import SignalEngine
 from app.scanner.universe import get_usdt_universe
 
@@ -69,7 +69,6 @@ def scan_market(timeframe: str = "1h", limit: int = 300) -> List[Dict[str, Any]]
     if limit <= 0:
         limit = 300
 
-    engine = SignalEngine()
     results: List[Dict[str, Any]] = []
 
     # 1) Universo completo
@@ -84,9 +83,10 @@ def scan_market(timeframe: str = "1h", limit: int = 300) -> List[Dict[str, Any]]
             if df is None or df.empty:
                 continue
 
-            df = add_technicals(df)
+            df = get_features(symbol, timeframe, df)
 
-            signal = engine.generate(df)
+            # modelo del símbolo / timeframe (LRU del registry)
+            signal = SignalEngine(symbol=symbol, timeframe=timeframe).generate(df)
 
             # ✅ BLINDAJE TOTAL
             if not isinstance(signal, dict):
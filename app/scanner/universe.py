@@ -1,6 +1,6 @@
 # app/scanner/universe.py
 
-from app.data.binance_client import get_exchange_info
+from app.data.exchange_snapshot import get_snapshot
 
 
 def get_usdt_universe() -> list[str]:
@@ -9,16 +9,4 @@ def get_usdt_universe() -> list[str]:
     Ej: BTCUSDT, ETHUSDT, SOLUSDT, etc.
     """
 
-    info = get_exchange_info()
-
-    symbols = []
-
-    for s in info["symbols"]:
-        if (
-            s["quoteAsset"] == "USDT"
-            and s["status"] == "TRADING"
-            and s["isSpotTradingAllowed"]
-        ):
-            symbols.append(s["symbol"])
-
-    return symbols
+    return get_snapshot().tradable("USDT", spot_only=True)
@@ -1,16 +1,17 @@
+from typing import Dict, Hashable, List, Mapping, Tuple
+
+import numpy as np
 import pandas as pd
 
-from app.models.registry import get_active_model
-from app.risk.stop_loss import compute_stop_loss
-from app.risk.take_profit import compute_take_profit
+from app.models.registry import get_model
+from app.risk.stop_loss import compute_stop_loss, compute_stop_loss_series
+from app.risk.take_profit import compute_take_profit, compute_take_profit_series
 from app.core.signal_types import SignalType
+from app.features.registry import ensure_features
+from app.ai.regime import Regime, detect_regime, regime_labels
 
-# AI (opcional pero seguro)
-try:
-    from app.ai.market_regime import detect_regime, MarketRegime
-except ImportError:
-    detect_regime = None
-    MarketRegime = None
+# columnas de generate_series (una fila por vela)
+SERIES_COLUMNS = ("signal", "reason", "entry", "stop", "take_profit", "probability", "regime")
 
 
 class SignalEngine:
@@ -18,11 +19,18 @@ class SignalEngine:
     Motor institucional de señales (PRO):
     - ML para probabilidad (BUY bias)
     - Confirmación técnica institucional (EMA/RSI/MACD/ADX/VWAP/VOL)
-    - Régimen manda (bull/bear/range/dead)
+    - Régimen manda (bull/bear/range/chaotic)
     """
 
-    def __init__(self, threshold: float = 0.55):
-        self.model = get_active_model()
+    # columnas que leen las confirmaciones y el stop (el resto lo pide el modelo)
+    REQUIRED_FEATURES = (
+        "ema20", "ema50", "rsi", "adx", "macd", "macd_signal", "macd_hist",
+        "vol_ratio", "vwap", "atr", "ema_slow",
+    )
+
+    def __init__(self, threshold: float = 0.55, symbol: str | None = None, timeframe: str | None = None):
+        # modelo de (symbol, timeframe) si existe; si no, el global
+        self.model = get_model(symbol, timeframe)
         self.threshold = float(threshold)
 
         if not hasattr(self.model, "predict_proba"):
@@ -32,10 +40,16 @@ class SignalEngine:
             raise RuntimeError("Active model has no feature_columns attribute")
 
         # blindaje
-        if self.threshold < 0.50:
-            self.threshold = 0.50
-        if self.threshold > 0.90:
-            self.threshold = 0.90
+        self.threshold = self._clamp_threshold(self.threshold)
+
+    @staticmethod
+    def _clamp_threshold(threshold: float) -> float:
+        threshold = float(threshold)
+        if threshold < 0.50:
+            threshold = 0.50
+        if threshold > 0.90:
+            threshold = 0.90
+        return threshold
 
     # ============================
     # ✅ Helpers
@@ -143,14 +157,20 @@ class SignalEngine:
         return bool(trend_ok and rsi_ok and adx_ok and macd_ok and vol_ok and vwap_ok)
 
     # ============================
-    # ✅ Main
+    # ✅ Etapas (compartidas por generate / generate_batch)
     # ============================
-    def generate(self, df: pd.DataFrame) -> dict:
+    def _prepare(self, df: pd.DataFrame, model=None):
+        """
+        Validaciones + features ML (de `model`, default self.model).
+        Devuelve (df, price, X, None) o (df, price, None, respuesta HOLD).
+        """
+        model = self.model if model is None else model
+
         # ----------------------------
         # Validaciones base
         # ----------------------------
         if df is None or df.empty:
-            return self._hold_response(
+            return df, None, None, self._hold_response(
                 reason="no_market_data",
                 probability=0.0,
                 price=None,
@@ -159,7 +179,7 @@ class SignalEngine:
             )
 
         if "close" not in df.columns:
-            return self._hold_response(
+            return df, None, None, self._hold_response(
                 reason="missing_close",
                 probability=0.0,
                 price=None,
@@ -170,13 +190,16 @@ class SignalEngine:
         # ----------------------------
         # Features ML
         # ----------------------------
-        model_features = list(self.model.feature_columns)
+        model_features = list(model.feature_columns)
+
+        # ✅ solo calcula las columnas que falten (no-op si ya vienen)
+        df = ensure_features(df, self.REQUIRED_FEATURES + tuple(model_features))
         available_features = [f for f in model_features if f in df.columns]
 
         price = float(df["close"].iloc[-1])
 
         if not available_features:
-            return self._hold_response(
+            return df, price, None, self._hold_response(
                 reason="no_usable_features",
                 probability=0.0,
                 price=price,
@@ -184,19 +207,23 @@ class SignalEngine:
                 regime=None,
             )
 
-        X = df.tail(1)[available_features]
+        return df, price, df.tail(1)[available_features], None
 
-        # ----------------------------
-        # Probabilidad
-        # ----------------------------
+    @staticmethod
+    def _row_probability(proba_raw, row: int = 0) -> float:
+        if hasattr(proba_raw, "shape"):
+            return float(proba_raw[row][1])
+        return float(proba_raw)
+
+    def _predict_one(self, df: pd.DataFrame, price: float, X: pd.DataFrame, model=None):
+        """
+        Probabilidad de una fila; (prob, None) o (None, respuesta HOLD).
+        """
+        model = self.model if model is None else model
         try:
-            proba_raw = self.model.predict_proba(X)
-            if hasattr(proba_raw, "shape"):
-                prob = float(proba_raw[0][1])
-            else:
-                prob = float(proba_raw)
+            return self._row_probability(model.predict_proba(X)), None
         except Exception:
-            return self._hold_response(
+            return None, self._hold_response(
                 reason="model_predict_failed",
                 probability=0.0,
                 price=price,
@@ -204,31 +231,277 @@ class SignalEngine:
                 regime=None,
             )
 
+    # ============================
+    # ✅ Main
+    # ============================
+    def generate(self, df: pd.DataFrame) -> dict:
+        df, price, X, response = self._prepare(df)
+        if response is not None:
+            return response
+
         # ----------------------------
-        # Régimen (IA)
+        # Probabilidad
         # ----------------------------
-        threshold = float(self.threshold)
-        regime = None
+        prob, response = self._predict_one(df, price, X)
+        if response is not None:
+            return response
 
-        if detect_regime is not None:
+        return self._decide(df, prob, price, self.threshold)
+
+    def generate_batch(
+        self,
+        frames: Mapping[Hashable, pd.DataFrame],
+        thresholds: Mapping[Hashable, float] | None = None,
+        timeframe: str | None = None,
+    ) -> Dict[Hashable, dict]:
+        """
+        generate() para muchos símbolos con UN solo predict_proba por modelo
+        sobre las últimas filas apiladas. thresholds: umbral por clave
+        (default: self.threshold, con el mismo blindaje 0.50-0.90).
+        timeframe: las claves son símbolos y cada uno usa su modelo de
+        (symbol, timeframe); sin timeframe todos usan self.model.
+        Cada resultado es el de generate() con ese umbral (la probabilidad
+        puede diferir en el último decimal por el producto en bloque).
+        """
+        thresholds = thresholds or {}
+        results: Dict[Hashable, dict] = {}
+        models: Dict[int, object] = {}
+        ready: Dict[Tuple[int, Tuple[str, ...]], List[Tuple[Hashable, pd.DataFrame, float, pd.DataFrame]]] = {}
+
+        for key, df in frames.items():
+            model = get_model(str(key), timeframe) if timeframe else self.model
+            df, price, X, response = self._prepare(df, model)
+            if response is not None:
+                results[key] = response
+                continue
+            # agrupado por modelo + columnas disponibles
+            models[id(model)] = model
+            ready.setdefault((id(model), tuple(X.columns)), []).append((key, df, price, X))
+
+        for (model_id, _), rows in ready.items():
+            model = models[model_id]
+            probs = None
             try:
-                regime = detect_regime(df)
-
-                # rango: más estricto
-                if MarketRegime is not None and regime == MarketRegime.RANGE:
-                    threshold += 0.08
-
-                # dead: HOLD directo
-                if MarketRegime is not None and regime == MarketRegime.DEAD:
-                    return self._hold_response(
-                        reason="dead_market",
-                        probability=prob,
-                        price=price,
-                        df=df,
-                        regime=regime,
-                    )
+                proba_raw = model.predict_proba(pd.concat([X for _, _, _, X in rows], ignore_index=True))
+                if hasattr(proba_raw, "shape") and len(proba_raw) == len(rows):
+                    probs = [self._row_probability(proba_raw, i) for i in range(len(rows))]
             except Exception:
-                regime = None
+                probs = None
+
+            for i, (key, df, price, X) in enumerate(rows):
+                if probs is not None:
+                    prob = probs[i]
+                else:
+                    # el batch falló: fila por fila (aísla el símbolo roto)
+                    prob, response = self._predict_one(df, price, X, model)
+                    if response is not None:
+                        results[key] = response
+                        continue
+
+                threshold = self._clamp_threshold(thresholds.get(key, self.threshold))
+                results[key] = self._decide(df, prob, price, threshold)
+
+        return {key: results[key] for key in frames if key in results}
+
+    # ============================
+    # ✅ Serie completa (backtests)
+    # ============================
+    def _colf(self, df: pd.DataFrame, col: str, default=np.nan) -> np.ndarray:
+        """
+        _getf para todas las velas (NaN -> default).
+        """
+        if col not in df.columns:
+            return np.broadcast_to(np.asarray(default, dtype=np.float64), (len(df),)).copy()
+        v = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64)
+        return np.where(np.isnan(v), default, v)
+
+    def _confirm_masks(self, df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        _bull_confirm / _bear_confirm para todas las velas.
+        """
+        close = self._colf(df, "close")
+        ema20 = self._colf(df, "ema20", self._colf(df, "ema_20"))
+        ema50 = self._colf(df, "ema50", self._colf(df, "ema_50"))
+        rsi = self._colf(df, "rsi", 50.0)
+        adx = self._colf(df, "adx", 0.0)
+        macd = self._colf(df, "macd", 0.0)
+        macd_signal = self._colf(df, "macd_signal", 0.0)
+        macd_hist = self._colf(df, "macd_hist", 0.0)
+        vol_ratio = self._colf(df, "vol_ratio", 1.0)
+        vwap = self._colf(df, "vwap")
+
+        base = ~(np.isnan(close) | np.isnan(ema20) | np.isnan(ema50))
+        strength = (adx >= 18) & (vol_ratio >= 1.05)
+        no_vwap = np.isnan(vwap)
+
+        bull = (
+            base & strength
+            & (close > ema50) & (ema20 > ema50)
+            & (rsi >= 55)
+            & ((macd > macd_signal) | (macd_hist > 0))
+            & (no_vwap | (close >= vwap))
+        )
+        bear = (
+            base & strength
+            & (close < ema50) & (ema20 < ema50)
+            & (rsi <= 45)
+            & ((macd < macd_signal) | (macd_hist < 0))
+            & (no_vwap | (close <= vwap))
+        )
+        return bull, bear
+
+    def generate_series(self, df: pd.DataFrame, threshold: float | None = None) -> pd.DataFrame:
+        """
+        generate() para CADA vela de df en una sola pasada: un predict_proba
+        sobre toda la historia + confirmaciones como máscaras vectorizadas.
+
+        La fila i equivale a generate(df.iloc[:i + 1]) (features causales;
+        el régimen sale de la columna `regime` si existe). Mismo índice que
+        df, columnas SERIES_COLUMNS. signal_at() arma el dict de generate().
+        """
+        if df is None or df.empty:
+            return pd.DataFrame(columns=list(SERIES_COLUMNS))
+
+        threshold = self.threshold if threshold is None else self._clamp_threshold(threshold)
+        n = len(df)
+        hold = SignalType.HOLD.value
+
+        if "close" not in df.columns:
+            return pd.DataFrame(
+                {"signal": hold, "reason": "missing_close", "entry": None, "stop": None,
+                 "take_profit": None, "probability": 0.0, "regime": None},
+                index=df.index,
+            )[list(SERIES_COLUMNS)]
+
+        model_features = list(self.model.feature_columns)
+        df = ensure_features(df, self.REQUIRED_FEATURES + tuple(model_features))
+        available_features = [f for f in model_features if f in df.columns]
+
+        close = df["close"].to_numpy(dtype=np.float64)
+        atr = df["atr"].to_numpy(dtype=np.float64) if "atr" in df.columns else close * 0.005
+
+        # ----------------------------
+        # Probabilidad (filas con NaN -> model_predict_failed, como generate)
+        # ----------------------------
+        prob = np.full(n, np.nan)
+        if available_features:
+            try:
+                X = df[available_features]
+                ok = np.isfinite(X.to_numpy(dtype=np.float64)).all(axis=1)
+                if ok.any():
+                    prob[ok] = np.asarray(self.model.predict_proba(X[ok]))[:, 1]
+            except Exception:
+                prob[:] = np.nan
+        predicted = ~np.isnan(prob)
+
+        # ----------------------------
+        # Régimen (-1 = desconocido)
+        # ----------------------------
+        try:
+            codes = regime_labels(df).astype(np.int64)
+        except Exception:
+            codes = np.full(n, -1, dtype=np.int64)
+
+        regimes = list(Regime)
+        is_regime = {r: codes == i for i, r in enumerate(regimes)}
+        chaotic = is_regime[Regime.CHAOTIC]
+
+        thresholds = np.full(n, float(threshold))
+        thresholds[is_regime[Regime.RANGE]] += 0.08
+        thresholds[is_regime[Regime.BULL] | is_regime[Regime.BEAR]] += 0.02
+
+        allow_buy = ~is_regime[Regime.BEAR]
+        allow_sell = ~(is_regime[Regime.BULL] | is_regime[Regime.RANGE])
+
+        # ----------------------------
+        # Decisión
+        # ----------------------------
+        bull, bear = self._confirm_masks(df)
+        live = predicted & ~chaotic
+        buy = live & allow_buy & (prob >= thresholds) & bull
+        sell = live & ~buy & allow_sell & bear
+
+        side = np.where(buy, 1, np.where(sell, -1, 0))
+        signal = np.where(buy, SignalType.BUY.value, np.where(sell, SignalType.SELL.value, hold)).astype(object)
+
+        reason = np.full(n, "filtered_by_institutional_rules", dtype=object)
+        reason[chaotic] = "chaotic_market"
+        reason[~predicted] = "model_predict_failed" if available_features else "no_usable_features"
+        reason[buy | sell] = None
+
+        labels = np.array([r.value for r in regimes] + [None], dtype=object)
+        regime = labels[codes]
+        regime[~predicted] = None
+
+        # ----------------------------
+        # Gestión de riesgo
+        # ----------------------------
+        stop = compute_stop_loss_series(close, atr, side)
+        take_profit = compute_take_profit_series(close, stop, side)
+
+        return pd.DataFrame(
+            {
+                "signal": signal,
+                "reason": reason,
+                "entry": close,
+                "stop": stop,
+                "take_profit": take_profit,
+                "probability": np.where(predicted, prob, 0.0),
+                "regime": regime,
+            },
+            index=df.index,
+        )
+
+    @staticmethod
+    def signal_at(signals: pd.DataFrame, i: int) -> dict:
+        """
+        Fila posicional i de generate_series con el formato de generate().
+        """
+        row = signals.iloc[i]
+        out = {"signal": row["signal"]}
+
+        if row["signal"] == SignalType.HOLD.value:
+            out["reason"] = row["reason"]
+
+        out.update(
+            {
+                "entry": None if pd.isna(row["entry"]) else float(row["entry"]),
+                "stop": row["stop"],
+                "take_profit": row["take_profit"],
+                "probability": float(row["probability"]),
+                "regime": None if pd.isna(row["regime"]) else row["regime"],
+            }
+        )
+        return out
+
+    def _decide(self, df: pd.DataFrame, prob: float, price: float, threshold: float) -> dict:
+        """
+        Régimen + confirmaciones institucionales + riesgo.
+        """
+        # ----------------------------
+        # Régimen (IA)
+        # ----------------------------
+        threshold = float(threshold)
+        regime = None
+
+        try:
+            regime = detect_regime(df)
+        except Exception:
+            regime = None
+
+        # rango: más estricto
+        if regime == Regime.RANGE:
+            threshold += 0.08
+
+        # caótico: HOLD directo
+        if regime == Regime.CHAOTIC:
+            return self._hold_response(
+                reason="chaotic_market",
+                probability=prob,
+                price=price,
+                df=df,
+                regime=regime,
+            )
 
         # ----------------------------
         # Institucional: régimen manda
@@ -236,21 +509,17 @@ class SignalEngine:
         allow_buy = True
         allow_sell = True
 
-        try:
-            if MarketRegime is not None and regime is not None:
-                if regime == MarketRegime.BULL:
-                    allow_sell = False
-                    threshold += 0.02
-
-                if regime == MarketRegime.BEAR:
-                    allow_buy = False
-                    threshold += 0.02
-
-                if regime == MarketRegime.RANGE:
-                    # en rango: casi HOLD
-                    allow_sell = False
-        except Exception:
-            pass
+        if regime == Regime.BULL:
+            allow_sell = False
+            threshold += 0.02
+
+        if regime == Regime.BEAR:
+            allow_buy = False
+            threshold += 0.02
+
+        if regime == Regime.RANGE:
+            # en rango: casi HOLD
+            allow_sell = False
 
         # ----------------------------
         # Decisión
@@ -319,6 +588,11 @@ class SignalEngine:
 
 
 # Wrapper compatibilidad
-def generate_signal(df: pd.DataFrame, threshold: float = 0.55) -> dict:
-    engine = SignalEngine(threshold=threshold)
+def generate_signal(
+    df: pd.DataFrame,
+    threshold: float = 0.55,
+    symbol: str | None = None,
+    timeframe: str | None = None,
+) -> dict:
+    engine = SignalEngine(threshold=threshold, symbol=symbol, timeframe=timeframe)
     return engine.generate(df)
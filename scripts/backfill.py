@@ -0,0 +1,31 @@
+import argparse
+
+import pandas as pd
+
+from app.data.backfill import BACKFILL_MAX_WORKERS, backfill_klines
+from app.data.exchange_client import get_shared_client
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill histórico de velas al kline store")
+    parser.add_argument("--symbols", default="BTCUSDT", help="ej: BTCUSDT,ETHUSDT")
+    parser.add_argument("--timeframes", default="1h", help="ej: 1h,4h,1d")
+    parser.add_argument("--start", required=True, help="fecha inicio (YYYY-MM-DD)")
+    parser.add_argument("--end", default=None, help="fecha fin (YYYY-MM-DD), default: ahora")
+    parser.add_argument("--workers", type=int, default=BACKFILL_MAX_WORKERS)
+    args = parser.parse_args()
+
+    start_ms = int(pd.Timestamp(args.start, tz="UTC").timestamp() * 1000)
+    end_ms = int(pd.Timestamp(args.end, tz="UTC").timestamp() * 1000) if args.end else None
+
+    client = get_shared_client()
+
+    for symbol in [s.strip().upper() for s in args.symbols.split(",") if s.strip()]:
+        for tf in [t.strip() for t in args.timeframes.split(",") if t.strip()]:
+            print(f"📥 Backfill {symbol} {tf} desde {args.start}...")
+            rows = backfill_klines(client, symbol, tf, start_ms, end_ms, max_workers=args.workers)
+            print(f"✅ {symbol} {tf}: {rows} velas en el store")
+
+
+if __name__ == "__main__":
+    main()
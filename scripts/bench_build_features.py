@@ -0,0 +1,80 @@
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from app.features import build_features
+from app.features.technicals import add_technicals
+from app.features.trends import add_returns, add_target
+from app.features.volatility import add_volatility_features
+
+
+def synthetic_ohlcv(bars: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.01, bars)))
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) * (1 + rng.random(bars) * 0.005)
+    low = np.minimum(open_, close) * (1 - rng.random(bars) * 0.005)
+    open_time = np.arange(bars, dtype=np.int64) * 3_600_000
+
+    return pd.DataFrame(
+        {
+            "open_time": pd.to_datetime(open_time, unit="ms"),
+            "open": open_,
+            "high": high,
+            "low": low,
+            "close": close,
+            "volume": rng.random(bars) * 1000,
+            "close_time": open_time + 3_599_999,
+        }
+    )
+
+
+def build_features_legacy(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cadena anterior (4 copias del DataFrame), como referencia.
+    """
+    df = add_technicals(df)
+    df = add_returns(df)
+    df = add_target(df)
+    df = add_volatility_features(df)
+    return df
+
+
+def measure(fn, df: pd.DataFrame, repeat: int) -> dict:
+    fn(df)  # warm-up
+
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn(df)
+    elapsed = (time.perf_counter() - t0) / repeat
+
+    tracemalloc.start()
+    fn(df)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"ms": elapsed * 1000, "peak_mb": peak / 1e6}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="build_features vs cadena legacy (tiempo y memoria pico)")
+    parser.add_argument("--bars", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    df = synthetic_ohlcv(args.bars)
+
+    legacy = measure(build_features_legacy, df, args.repeat)
+    current = measure(build_features, df, args.repeat)
+
+    print(f"📊 {args.bars} velas")
+    print(f"legacy         : {legacy['ms']:.1f} ms | pico {legacy['peak_mb']:.1f} MB")
+    print(f"build_features : {current['ms']:.1f} ms | pico {current['peak_mb']:.1f} MB")
+    print(f"✅ speedup x{legacy['ms'] / current['ms']:.2f} | memoria x{legacy['peak_mb'] / current['peak_mb']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+import argparse
+import csv
+import json
+import platform
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.data.features import add_features
+from app.data.technicals import add_technicals as add_technicals_legacy
+from app.features import build_features
+from app.features import kernels as k
+from app.features.panel import compute_panel
+from app.features.registry import BASE_COLUMNS, compute_arrays
+from app.features.technicals import TECHNICAL_COLUMNS, add_technicals
+from app.features.volatility import add_atr, add_volatility, add_volatility_features
+from scripts.bench_build_features import measure, synthetic_ohlcv
+
+# ============================
+# Benchmark de kernels / features / pipelines
+# ============================
+# python -m scripts.bench_features --bars 1000,100000,1000000 --symbols 1
+# python -m scripts.bench_features --output bench.json
+# python -m scripts.bench_features --output new.json --compare bench.json
+#
+# Grupos:
+#   kernel   -> app/features/kernels.py sobre (S, T)
+#   feature  -> subgrafo de cada columna de TECHNICAL_COLUMNS (compute_arrays)
+#   module   -> volatility.py / data/features.py / data/technicals.py
+#   pipeline -> add_technicals / build_features / panel
+# Cada fila: ms por corrida, velas/s y memoria pico (tracemalloc).
+
+# regresión si tarda más de esto respecto del baseline
+REGRESSION_RATIO = 1.25
+
+
+def _kernel_cases(inputs: Dict[str, np.ndarray]) -> Dict[str, Callable]:
+    close, high, low = inputs["close"], inputs["high"], inputs["low"]
+    prev_close = k.shift(close, 1)
+    return {
+        "shift": lambda: k.shift(close, 1),
+        "diff": lambda: k.diff(close),
+        "safe_div": lambda: k.safe_div(close, prev_close),
+        "ema_20": lambda: k.ema(close, 20),
+        "rolling_mean_14": lambda: k.rolling_mean(close, 14),
+        "rolling_sum_20": lambda: k.rolling_sum(close, 20),
+        "rolling_std_20": lambda: k.rolling_std(close, 20),
+        "true_range": lambda: k.true_range(high, low, prev_close),
+    }
+
+
+def _per_symbol(fn: Callable, frames: List[pd.DataFrame]) -> Callable:
+    return lambda: [fn(df) for df in frames]
+
+
+def build_cases(frames: List[pd.DataFrame], groups: List[str]) -> Dict[str, Callable]:
+    # (S, T): una fila por símbolo, mismo largo
+    inputs = {c: np.stack([df[c].to_numpy(dtype=np.float64) for df in frames]) for c in BASE_COLUMNS}
+    if len(frames) == 1:
+        inputs = {c: v[0] for c, v in inputs.items()}
+
+    cases: Dict[str, Callable] = {}
+
+    if "kernel" in groups:
+        for name, fn in _kernel_cases(inputs).items():
+            cases[f"kernel:{name}"] = fn
+
+    if "feature" in groups:
+        for name in TECHNICAL_COLUMNS:
+            cases[f"feature:{name}"] = lambda name=name: compute_arrays(inputs, [name])
+
+    if "module" in groups:
+        cases["module:volatility.add_atr"] = _per_symbol(add_atr, frames)
+        cases["module:volatility.add_volatility"] = _per_symbol(add_volatility, frames)
+        cases["module:volatility.add_volatility_features"] = _per_symbol(add_volatility_features, frames)
+        cases["module:data.features.add_features"] = _per_symbol(add_features, frames)
+        cases["module:data.technicals.add_technicals"] = _per_symbol(add_technicals_legacy, frames)
+
+    if "pipeline" in groups:
+        cases["pipeline:add_technicals"] = _per_symbol(add_technicals, frames)
+        cases["pipeline:build_features"] = _per_symbol(build_features, frames)
+        if len(frames) > 1:
+            cases["pipeline:panel"] = lambda: compute_panel(dict(enumerate(frames)), TECHNICAL_COLUMNS)
+
+    return cases
+
+
+def run(bars_list: List[int], symbols: int, repeat: int, groups: List[str], only: str | None) -> List[dict]:
+    results = []
+
+    for bars in bars_list:
+        frames = [synthetic_ohlcv(bars, seed=s) for s in range(symbols)]
+        total = bars * symbols
+
+        for case, fn in build_cases(frames, groups).items():
+            if only and only not in case:
+                continue
+
+            m = measure(lambda _: fn(), None, repeat)
+            row = {
+                "case": case,
+                "group": case.split(":", 1)[0],
+                "bars": bars,
+                "symbols": symbols,
+                "total_bars": total,
+                "ms": round(m["ms"], 3),
+                "bars_per_s": round(total / (m["ms"] / 1000), 1) if m["ms"] > 0 else None,
+                "peak_mb": round(m["peak_mb"], 3),
+                "repeat": repeat,
+            }
+            results.append(row)
+            print(f"{case:<48} {bars:>9} x{symbols:<3} {row['ms']:>10.2f} ms  {row['bars_per_s'] or 0:>14,.0f} velas/s  pico {row['peak_mb']:.1f} MB")
+
+    return results
+
+
+def environment() -> dict:
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+    }
+
+
+# ============================
+# Persistencia / comparación
+# ============================
+def save(path: Path, results: List[dict], env: dict) -> None:
+    if path.suffix.lower() == ".csv":
+        with path.open("w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(results[0].keys()) + list(env.keys()))
+            writer.writeheader()
+            for row in results:
+                writer.writerow({**row, **env})
+    else:
+        path.write_text(json.dumps({"environment": env, "results": results}, indent=2))
+
+
+def load(path: Path) -> List[dict]:
+    if path.suffix.lower() == ".csv":
+        with path.open(newline="") as f:
+            return [
+                {**row, "bars": int(row["bars"]), "symbols": int(row["symbols"]), "ms": float(row["ms"])}
+                for row in csv.DictReader(f)
+            ]
+    return json.loads(path.read_text())["results"]
+
+
+def compare(results: List[dict], baseline: List[dict], ratio: float) -> Tuple[List[dict], int]:
+    """
+    Filas que tardan más de `ratio` veces que el baseline (mismo caso / tamaño)
+    y cuántas filas se pudieron comparar.
+    """
+    base = {(r["case"], r["bars"], r["symbols"]): r for r in baseline}
+    slow = []
+    matched = 0
+
+    for row in results:
+        ref = base.get((row["case"], row["bars"], row["symbols"]))
+        if ref is None or not ref["ms"]:
+            continue
+        matched += 1
+        r = row["ms"] / ref["ms"]
+        if r > ratio:
+            slow.append({**row, "baseline_ms": ref["ms"], "ratio": round(r, 2)})
+
+    return slow, matched
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de kernels, features y pipelines (velas/s y memoria pico)")
+    parser.add_argument("--bars", default="1000,100000", help="largos a medir, ej: 1000,100000,5000000")
+    parser.add_argument("--symbols", type=int, default=1, help="series por corrida (kernels en bloque (S, T))")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--groups", default="kernel,feature,module,pipeline")
+    parser.add_argument("--only", default=None, help="solo casos que contengan este texto")
+    parser.add_argument("--output", default=None, help="archivo .json o .csv")
+    parser.add_argument("--compare", default=None, help="baseline .json / .csv para detectar regresiones")
+    parser.add_argument("--ratio", type=float, default=REGRESSION_RATIO)
+    args = parser.parse_args()
+
+    bars_list = [int(b) for b in args.bars.split(",") if b.strip()]
+    groups = [g.strip() for g in args.groups.split(",") if g.strip()]
+
+    results = run(bars_list, max(1, args.symbols), max(1, args.repeat), groups, args.only)
+    env = environment()
+
+    if args.output and results:
+        save(Path(args.output), results, env)
+        print(f"✅ guardado en {args.output}")
+
+    if args.compare:
+        slow, matched = compare(results, load(Path(args.compare)), args.ratio)
+        print(f"📊 {matched}/{len(results)} casos comparados contra {args.compare}")
+        if not matched:
+            # baseline de otros casos / tamaños: no hay nada que comparar
+            print("⚠️ ningún caso (case, bars, symbols) coincide con el baseline")
+            sys.exit(2)
+        for row in slow:
+            print(f"⚠️ {row['case']} ({row['bars']} x{row['symbols']}): {row['ms']:.2f} ms vs {row['baseline_ms']:.2f} ms (x{row['ratio']})")
+        if slow:
+            sys.exit(1)
+        print("✅ sin regresiones")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import argparse
+import sys
+
+from app.data.cleaners import clean_market_data
+from app.data.loaders import load_binance_klines
+from app.features.compact import COMPACT_RTOL, check_decision_tolerance
+from app.features.technicals import add_technicals
+from app.signals.signal_engine import SignalEngine
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica que las features compactas (float32) no cambien decisiones")
+    parser.add_argument("--symbol", default="BTCUSDT")
+    parser.add_argument("--timeframe", default="1h")
+    parser.add_argument("--limit", type=int, default=1500)
+    parser.add_argument("--last", type=int, default=300, help="velas finales a comparar")
+    args = parser.parse_args()
+
+    print("📥 Loading data...")
+    df = load_binance_klines(args.symbol, args.timeframe, args.limit)
+    df = clean_market_data(df, timeframe=args.timeframe)
+    df = add_technicals(df)
+
+    if df.empty:
+        print("❌ Sin datos")
+        sys.exit(2)
+
+    print("🔍 Comparando decisiones float64 vs compacto...")
+    report = check_decision_tolerance(
+        df,
+        engine=SignalEngine(symbol=args.symbol, timeframe=args.timeframe),
+        last=args.last,
+    )
+
+    print(f"velas comparadas : {report['checked']}")
+    print(f"error relativo   : {report['max_relative_error']:.2e} (máx {COMPACT_RTOL:.0e})")
+    print(f"memoria          : {report['bytes_full']} -> {report['bytes_compact']} bytes")
+
+    for m in report["mismatches"]:
+        print(f"⚠️ fila {m['row']}: {m['full']} ({m['reason_full']}) vs {m['compact']} ({m['reason_compact']})")
+
+    if not report["ok"]:
+        print("❌ Tolerancia superada")
+        sys.exit(1)
+
+    print("✅ Decisiones idénticas")
+
+
+if __name__ == "__main__":
+    main()
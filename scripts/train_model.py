@@ -1,24 +1,44 @@
-from app.data.loaders import load_binance_klines
-from app.data.cleaners import clean_market_data
-from app.features.technicals import add_technicals
-from app.models.registry import prepare_dataset
-from app.models.ml_models import LogisticSignalModel
+import argparse
+import json
+
+from app.models.artifacts import DEFAULT_MODEL_NAME
+from app.models.registry import model_name
+from app.models.training import (
+    DEFAULT_TRAIN_LIMIT,
+    DEFAULT_TRAIN_SYMBOL,
+    DEFAULT_TRAIN_TIMEFRAME,
+    train_and_save,
+)
 
 
 def main():
-    print("📥 Loading market data...")
-    df = load_binance_klines("BTCUSDT", "1h", 1500)
-    df = clean_market_data(df)
-    df = add_technicals(df)
+    parser = argparse.ArgumentParser(description="Entrena el modelo y lo guarda en el artifact store")
+    parser.add_argument("--symbol", default=DEFAULT_TRAIN_SYMBOL)
+    parser.add_argument("--timeframe", default=DEFAULT_TRAIN_TIMEFRAME)
+    parser.add_argument("--limit", type=int, default=DEFAULT_TRAIN_LIMIT)
+    parser.add_argument("--name", default=DEFAULT_MODEL_NAME, help="nombre del modelo en el store")
+    parser.add_argument("--per-symbol", action="store_true", help="guardar como <symbol>_<timeframe>")
+    parser.add_argument("--group", default=None, help="guardar como <group>_<timeframe> (cluster o global)")
+    parser.add_argument("--no-activate", action="store_true", help="guardar sin marcar como activo")
+    args = parser.parse_args()
 
-    print("🧠 Preparing dataset...")
-    X, y = prepare_dataset(df)
+    name = args.name
+    if args.per_symbol:
+        name = model_name(args.symbol.upper(), args.timeframe)
+    elif args.group:
+        name = model_name(args.group, args.timeframe)
 
     print("🤖 Training model...")
-    model = LogisticSignalModel()
-    model.train(X, y)
+    artifact = train_and_save(
+        symbol=args.symbol,
+        timeframe=args.timeframe,
+        limit=args.limit,
+        name=name,
+        activate=not args.no_activate,
+    )
 
-    print("✅ Model trained successfully")
+    print(f"✅ Saved {artifact.name}/{artifact.version} -> {artifact.path}")
+    print(json.dumps(artifact.meta.get("metrics", {}), indent=2))
 
 
 if __name__ == "__main__":